@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.account"
+
+    def ready(self):
+        # Connect the model signal handlers
+        from api.account import signals  # noqa: F401
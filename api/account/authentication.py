@@ -0,0 +1,137 @@
+"""
+JWT authentication serving the authenticated user from the cache.
+
+JWTAuthentication verifies the token signature and then SELECTs the user on
+every request. CachedJWTAuthentication keeps the users it loads in the
+default cache for AUTH_USER_CACHE_TTL seconds, keyed by the user id claim
+of the token, so most authenticated requests do not query the database
+before the view runs. With the two-tier default cache the users are served
+from the in-process LRU, and Redis is only read when a worker first sees a
+user or after an invalidation.
+
+Only the fields authentication and the views need are cached, see
+CACHED_USER_FIELDS, plus the MD5 digest of the password hash for the
+revocation check: the password hash itself never reaches the cache. Cached
+users are rebuilt as User instances holding just those fields, without a
+password, and must not be saved.
+
+Cached users are invalidated whenever the user is saved or deleted (see
+api/account/signals.py), which covers deactivations and password changes
+made through the ORM. Changes that bypass the signals, such as
+``User.objects.update(is_active=False)``, are only seen once the entry
+expires: call ``invalidate_user`` after them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY = "auth-user:{user_id}"
+CACHED_USER_FIELDS = ("username", "is_active", "is_staff", "is_superuser")
+
+
+def user_cache_key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def invalidate_user(user_id):
+    """
+    Evicts the cached user right away, and again once the transaction
+    commits: a request that cached the previous row in between is
+    invalidated by the second eviction.
+    """
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    if not transaction.get_autocommit():
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication reading the user through the cache. Users which are
+    missing or inactive are never cached, and the active and revocation
+    checks of JWTAuthentication still run on cached users. ``aauthenticate``
+    is the same for AsyncBaseAPIView.
+    """
+
+    def get_user(self, validated_token):
+        timeout = settings.AUTH_USER_CACHE_TTL
+        if not timeout:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(self.get_user_id(validated_token))
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, self.make_entry(user), timeout=timeout)
+            return user
+
+        return self.user_from_entry(entry, validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views, reading the user with the async
+        cache and ORM APIs.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        timeout = settings.AUTH_USER_CACHE_TTL
+        user_id = self.get_user_id(validated_token)
+        key = user_cache_key(user_id)
+        entry = await cache.aget(key) if timeout else None
+        if entry is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(user, validated_token)
+            if timeout:
+                await cache.aset(key, self.make_entry(user), timeout=timeout)
+            return user
+
+        return self.user_from_entry(entry, validated_token)
+
+    def make_entry(self, user):
+        entry = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        entry["pk"] = user.pk
+        entry["password_md5"] = get_md5_hash_password(user.password)
+        return entry
+
+    def user_from_entry(self, entry, validated_token):
+        fields = dict(entry)
+        password_md5 = fields.pop("password_md5")
+        self.check_user_fields(fields["is_active"], password_md5, validated_token)
+        user = self.user_model(**fields)
+        # Loaded from the database as far as the ORM is concerned, e.g. for foreign keys
+        user._state.adding = False
+        user._state.db = self.user_model.objects.db
+        return user
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token):
+        # The checks of JWTAuthentication.get_user, for users it did not load itself
+        self.check_user_fields(user.is_active, get_md5_hash_password(user.password), validated_token)
+
+    def check_user_fields(self, is_active, password_md5, validated_token):
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
@@ -0,0 +1,147 @@
+"""
+Password verification off the request threads.
+
+Password hashers are deliberately slow (PBKDF2 runs hundreds of thousands
+of iterations), so a login storm pins the CPU of every worker. Passwords
+are verified in a BoundedThreadPool of PASSWORD_HASHING_WORKERS threads,
+one per core by default: hashlib releases the GIL while hashing, so the
+other requests of the process keep being served, and at most
+PASSWORD_HASHING_MAX_PENDING verifications are queued before logins are
+shed with PasswordHashingBusy. Under ASGI, AsyncLoginView awaits the
+verification with averify_password instead of blocking a thread on it.
+
+Only the hash runs in the pool. Upgrading the stored hash to the preferred
+hasher, as ``User.check_password`` does, happens afterwards on the calling
+thread, which owns the database connection. The hashers are resolved once
+per process and refreshed when PASSWORD_HASHERS changes.
+"""
+import asyncio
+import functools
+import os
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from api.core.workers import BoundedThreadPool
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Raised when too many password verifications are already in flight.
+    """
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        workers = settings.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1
+        _pool = BoundedThreadPool(workers, settings.PASSWORD_HASHING_MAX_PENDING, thread_name_prefix="password-hashing")
+    return _pool
+
+
+@functools.cache
+def preferred_hasher():
+    return get_hasher("default")
+
+
+@functools.cache
+def hasher_for(algorithm):
+    return get_hasher(algorithm)
+
+
+@receiver(setting_changed)
+def reset_hashers(setting, **kwargs):
+    global _pool
+    if setting == "PASSWORD_HASHERS":
+        preferred_hasher.cache_clear()
+        hasher_for.cache_clear()
+    elif setting in ("PASSWORD_HASHING_WORKERS", "PASSWORD_HASHING_MAX_PENDING") and _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _identify(encoded):
+    algorithm = encoded.partition("$")[0]
+    try:
+        return hasher_for(algorithm)
+    except ValueError:
+        # Hashes without an algorithm prefix, e.g. unsalted MD5
+        return identify_hasher(encoded)
+
+
+def _submit(user, password):
+    """
+    Schedules the verification of ``password`` against the hash of ``user``
+    and returns its Future with the hasher, or None when the password can
+    never match.
+    """
+    encoded = user.password
+    if password is None or not encoded or not user.has_usable_password():
+        return None
+    try:
+        hasher = _identify(encoded)
+    except ValueError:
+        return None
+    future = get_pool().submit(hasher.verify, password, encoded)
+    if future is None:
+        raise PasswordHashingBusy("Too many password verifications in flight")
+    return future, hasher
+
+
+def _needs_upgrade(user, hasher):
+    # Same condition as AbstractBaseUser.check_password
+    preferred = preferred_hasher()
+    return hasher.algorithm != preferred.algorithm or hasher.must_update(user.password)
+
+
+def verify_password(user, password):
+    """
+    Checks ``password`` against the hash of ``user`` in the hashing pool,
+    blocking the calling thread only, and upgrades the hash when the
+    hashers changed. Raises PasswordHashingBusy when the pool is saturated.
+    """
+    submitted = _submit(user, password)
+    if submitted is None or not submitted[0].result():
+        return False
+    if _needs_upgrade(user, submitted[1]):
+        user.set_password(password)
+        user.save(update_fields=["password"])
+    return True
+
+
+async def averify_password(user, password):
+    """
+    verify_password for async code: the event loop keeps running while the
+    password is hashed.
+    """
+    submitted = _submit(user, password)
+    if submitted is None or not await asyncio.wrap_future(submitted[0]):
+        return False
+    if _needs_upgrade(user, submitted[1]):
+        await asyncio.to_thread(user.set_password, password)
+        await user.asave(update_fields=["password"])
+    return True
+
+
+def setup_worker(settings_module, hashers):
+    """
+    Initializer of the spawned processes hashing passwords in bulk (see
+    api/account/importing.py), which start without Django. ``hashers`` are
+    the PASSWORD_HASHERS of the parent process, which may differ from those
+    of the settings module.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+    settings.PASSWORD_HASHERS = hashers
+
+
+def hash_passwords(passwords):
+    """
+    Hashes a batch of passwords with the preferred hasher, each with its own salt.
+    """
+    hasher = preferred_hasher()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
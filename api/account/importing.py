@@ -0,0 +1,253 @@
+"""
+Bulk import of user accounts, behind the import_users command.
+
+Records are streamed from CSV or JSONL and handled in batches, so memory
+does not depend on the size of the input:
+
+* every record is validated like a registration (ImportUserSerializer);
+* usernames and emails are checked for uniqueness within the batch,
+  against the batches still in flight and with one query each against the
+  database, which already holds every earlier batch;
+* the passwords of the batch are hashed in a BoundedProcessPool, one task
+  per batch, while the next batches are read and checked;
+* batches are inserted with ``bulk_create`` in input order, and after each
+  one the number of records handled is written to the checkpoint, from
+  which an interrupted import resumes.
+
+At most ``workers * 2`` batches (one without workers) are in flight at a time.
+"""
+import csv
+import json
+import os
+import tempfile
+import time
+from collections import Counter, deque
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from api.account.hashing import hash_passwords, setup_worker
+from api.account.serializers import ImportUserSerializer
+from api.core.workers import BoundedProcessPool
+
+FIELDS = ("first_name", "last_name", "username", "email", "password")
+
+
+def read_csv(stream):
+    """
+    Yields the records of a CSV file with a header row.
+    """
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    """
+    Yields the records of a JSON Lines file; lines which are not valid JSON
+    are yielded as the error message, and reported as invalid.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield f"Invalid JSON: {e}"
+
+
+class Batch:
+    """
+    Records read together. Their rejections are only counted and reported
+    once the batch is inserted, so the checkpoint never runs ahead of them.
+    """
+    __slots__ = ("users", "passwords", "future", "end", "skipped", "errors")
+
+    def __init__(self, end):
+        self.users = []
+        self.passwords = []
+        self.future = None
+        # Number of records handled once this batch is inserted
+        self.end = end
+        self.skipped = Counter()
+        self.errors = []
+
+    def reject(self, index, record, reason, errors):
+        self.skipped[reason] += 1
+        username = record.get("username") if isinstance(record, dict) else None
+        self.errors.append({"record": index, "username": username, "reason": reason, "errors": errors})
+
+
+class UserImporter:
+    """
+    Imports the records of an iterable of dicts, see the module docstring.
+    ``workers=0`` hashes in the importing process.
+    """
+
+    def __init__(self, batch_size=1000, workers=None, checkpoint=None, errors=None):
+        self.batch_size = batch_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.checkpoint = checkpoint
+        self.errors = errors
+        # Batches read but not inserted yet, beyond which the oldest is inserted first
+        self.max_pending = max(self.workers * 2, 1)
+        self.pool = None
+        if self.workers:
+            settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "api.settings")
+            self.pool = BoundedProcessPool(
+                self.workers, self.max_pending, initializer=setup_worker,
+                initargs=(settings_module, list(settings.PASSWORD_HASHERS)),
+            )
+        self.serializer = ImportUserSerializer()
+        self.pending = deque()
+        # Usernames and emails of the batches read but not inserted yet
+        self.in_flight = {"username": Counter(), "email": Counter()}
+        self.records = 0
+        self.created = 0
+        self.skipped = Counter()
+
+    def run(self, records, start=0, created=0, skipped=None):
+        """
+        Imports ``records``, skipping the first ``start`` ones (handled by a
+        previous run whose counts are ``created`` and ``skipped``), and
+        returns the summary.
+        """
+        started = time.perf_counter()
+        self.records, self.created, self.skipped = start, created, Counter(skipped or {})
+        batch = []
+        try:
+            for index, record in enumerate(records):
+                if index < start:
+                    continue
+                batch.append((index, record))
+                if len(batch) == self.batch_size:
+                    self.submit(batch)
+                    batch = []
+            if batch:
+                self.submit(batch)
+            while self.pending:
+                self.insert(self.pending.popleft())
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False)
+        return self.summary(time.perf_counter() - started, start)
+
+    def summary(self, elapsed, start):
+        return {
+            "records": self.records,
+            "created": self.created,
+            "skipped": dict(self.skipped),
+            "resumed_at": start,
+            "elapsed": elapsed,
+        }
+
+    def validate(self, entry, batch):
+        valid = []
+        for index, record in batch:
+            if not isinstance(record, dict):
+                entry.reject(index, record, "invalid", {"non_field_errors": [str(record) if isinstance(record, str) else "Expected an object."]})
+                continue
+            try:
+                attrs = self.serializer.run_validation({field: record.get(field) for field in FIELDS})
+            except serializers.ValidationError as e:
+                entry.reject(index, record, "invalid", e.detail)
+                continue
+            valid.append((index, record, attrs))
+        return valid
+
+    def taken(self, field, values):
+        """
+        Returns the values of ``field`` already used by a user or by a
+        batch in flight.
+        """
+        existing = set(User.objects.filter(**{f"{field}__in": values}).values_list(field, flat=True))
+        return existing | {value for value in values if self.in_flight[field][value]}
+
+    def submit(self, batch):
+        entry = Batch(batch[-1][0] + 1)
+        valid = self.validate(entry, batch)
+        taken = {field: self.taken(field, {attrs[field] for _, _, attrs in valid}) for field in ("username", "email")}
+        for index, record, attrs in valid:
+            field = next((field for field in ("username", "email") if attrs[field] in taken[field]), None)
+            if field is not None:
+                entry.reject(index, record, f"{field}_taken", {field: [f"A user with this {field} already exists."]})
+                continue
+            # Later records of the batch with the same username or email are duplicates
+            taken["username"].add(attrs["username"])
+            taken["email"].add(attrs["email"])
+            entry.passwords.append(attrs.pop("password"))
+            entry.users.append(User(**attrs))
+
+        for user in entry.users:
+            self.in_flight["username"][user.username] += 1
+            self.in_flight["email"][user.email] += 1
+        if self.pool is not None and entry.passwords:
+            entry.future = self.pool.submit(hash_passwords, entry.passwords)
+            while entry.future is None and self.pending:
+                # The pool is saturated, the oldest batch is likely hashed by now
+                self.insert(self.pending.popleft())
+                entry.future = self.pool.submit(hash_passwords, entry.passwords)
+        self.pending.append(entry)
+        while len(self.pending) > self.max_pending:
+            self.insert(self.pending.popleft())
+
+    def insert(self, entry):
+        hashes = entry.future.result() if entry.future is not None else hash_passwords(entry.passwords)
+        for user, encoded in zip(entry.users, hashes):
+            user.password = encoded
+        users = entry.users
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+        except IntegrityError:
+            # Users registered meanwhile, outside of the import
+            users = self.without_conflicts(entry, users)
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+        for user in entry.users:
+            self.forget(user)
+        self.created += len(users)
+        self.skipped.update(entry.skipped)
+        if self.errors is not None:
+            self.errors.writelines(json.dumps(error) + "\n" for error in entry.errors)
+            self.errors.flush()
+        self.records = entry.end
+        self.save_checkpoint()
+
+    def without_conflicts(self, entry, users):
+        usernames = set(User.objects.filter(username__in=[user.username for user in users]).values_list("username", flat=True))
+        emails = set(User.objects.filter(email__in=[user.email for user in users]).values_list("email", flat=True))
+        kept = []
+        for user in users:
+            if user.username in usernames or user.email in emails:
+                field = "username" if user.username in usernames else "email"
+                entry.reject(None, {"username": user.username}, f"{field}_taken", {field: [f"A user with this {field} already exists."]})
+            else:
+                kept.append(user)
+        return kept
+
+    def forget(self, user):
+        for field, value in (("username", user.username), ("email", user.email)):
+            counts = self.in_flight[field]
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+
+    def save_checkpoint(self):
+        if self.checkpoint is None:
+            return
+        state = {"records": self.records, "created": self.created, "skipped": dict(self.skipped)}
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".import-", suffix=".tmp")
+        with os.fdopen(descriptor, "w") as output:
+            json.dump(state, output)
+        os.replace(temporary, self.checkpoint)
+
+
+def load_checkpoint(path):
+    """
+    Returns the state saved by a previous run, or None.
+    """
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)
+    except FileNotFoundError:
+        return None
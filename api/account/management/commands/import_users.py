@@ -0,0 +1,75 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from api.account.importing import UserImporter, load_checkpoint, read_csv, read_jsonl
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates user accounts in bulk from a CSV (with a header row) or JSONL file with the "
+        "first_name, last_name, username, email and password of each user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - for the standard input.")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users checked, hashed and inserted together.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Processes hashing the passwords (one per core by default, 0 hashes in this process).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording the progress after every batch (PATH.checkpoint by default).",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the records handled according to the checkpoint of a previous run.",
+        )
+        parser.add_argument("--errors", help="Write the rejected records, without passwords, to this JSONL file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or path.rpartition(".")[2].lower()
+        if input_format not in READERS:
+            raise CommandError("Cannot guess the input format, use --format csv or --format jsonl.")
+        if options["batch_size"] < 1 or (options["workers"] is not None and options["workers"] < 0):
+            raise CommandError("--batch-size must be positive and --workers not negative.")
+        checkpoint = options["checkpoint"] or (None if path == "-" else f"{path}.checkpoint")
+        if options["resume"] and checkpoint is None:
+            raise CommandError("--resume needs --checkpoint when reading the standard input.")
+
+        state = (load_checkpoint(checkpoint) if options["resume"] else None) or {}
+        errors = open(options["errors"], "a" if state else "w") if options["errors"] else None
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            importer = UserImporter(
+                batch_size=options["batch_size"], workers=options["workers"], checkpoint=checkpoint, errors=errors,
+            )
+            summary = importer.run(
+                READERS[input_format](stream),
+                start=state.get("records", 0), created=state.get("created", 0), skipped=state.get("skipped"),
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if errors is not None:
+                errors.close()
+
+        handled = summary["records"] - summary["resumed_at"]
+        rate = handled / summary["elapsed"] if summary["elapsed"] else 0
+        if summary["resumed_at"]:
+            self.stdout.write(f"Resumed after {summary['resumed_at']} records")
+        for reason, count in sorted(summary["skipped"].items()):
+            self.stdout.write(f"Skipped {count} records: {reason.replace('_', ' ')}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} users from {summary['records']} records "
+            f"in {summary['elapsed']:.2f}s ({rate:.0f} records/s)"
+        ))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
+from django.contrib.auth.signals import user_login_failed
+from api.account.hashing import averify_password, verify_password
 from rest_framework_simplejwt.tokens import RefreshToken
 
 '''
@@ -20,10 +21,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ['first_name', 'last_name', 'username', 'email', 'password']
 
+    def validate_email(self, value):
+        if not value.count('@') > 0 or not value.count('.') > 0:
+            raise serializers.ValidationError("Please enter a valid email address")
+        return value
+
     def validate(self, attrs):
-        if not attrs['email'].count('@') > 0 or not attrs['email'].count('.') > 0:
-            raise serializers.ValidationError(
-                {"email": "Please enter a valid email address"})
         if User.objects.filter(email=attrs['email']).exists():
             raise serializers.ValidationError(
                 {"email": "A user with this email already exists."})
@@ -45,9 +48,26 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+'''
+Serializer validating one account of the import_users command.
+Same fields and checks as RegisterSerializer, except uniqueness, which the importer checks per batch.
+'''
+class ImportUserSerializer(RegisterSerializer):
+    # Bounded by the User columns, rows are inserted without the model validation
+    first_name = serializers.CharField(max_length=User._meta.get_field('first_name').max_length, min_length=3)
+    last_name = serializers.CharField(max_length=User._meta.get_field('last_name').max_length, min_length=3)
+    username = serializers.CharField(max_length=User._meta.get_field('username').max_length, min_length=3)
+    email = serializers.EmailField(max_length=User._meta.get_field('email').max_length, min_length=3)
+
+    def validate(self, attrs):
+        # The email is checked by the inherited validate_email
+        return attrs
+
+
 '''
 Serializer for user login with username and password.
-Validates the username and checks if the user exists in the database.
+Fetches the user once and checks the password in the hashing pool (see api/account/hashing.py),
+awaiting it with aget_jwt_token in async views.
 Generates a JWT token for the authenticated user and returns it along with a success message.
 '''
 class LoginSerializer(serializers.Serializer):
@@ -57,18 +77,31 @@ class LoginSerializer(serializers.Serializer):
     def validate(self, attrs):
         username = attrs.get('username')
 
-        if not User.objects.filter(username=username).exists():
+        # The only query of the login, the password is checked against this row
+        user = User.objects.filter(username=username).first()
+        if user is None:
             raise serializers.ValidationError('Account not found')
+        attrs['user'] = user
         return attrs
         
 
-    def get_jwt_token(self, user):
-        user = authenticate(request=self.context.get('request'),
-                            username=user['username'], password=user['password'])
-        
-        if not user:
-           return {'message':'Invalid credentials'}
+    def get_jwt_token(self, credentials):
+        # Same checks as authenticate() with the ModelBackend, without fetching the user again
+        user = credentials['user']
+        if not user.is_active or not verify_password(user, credentials['password']):
+            user_login_failed.send(sender=__name__, credentials={'username': credentials['username']}, request=self.context.get('request'))
+            return {'message':'Invalid credentials'}
+        return self.issue_tokens(user)
+
+    async def aget_jwt_token(self, credentials):
+        # get_jwt_token without blocking the event loop while the password is hashed
+        user = credentials['user']
+        if not user.is_active or not await averify_password(user, credentials['password']):
+            await user_login_failed.asend(sender=__name__, credentials={'username': credentials['username']}, request=self.context.get('request'))
+            return {'message':'Invalid credentials'}
+        return self.issue_tokens(user)
 
+    def issue_tokens(self, user):
         refresh = RefreshToken.for_user(user)
         return {
             "message":"Login successful",
@@ -0,0 +1,56 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from api.account.authentication import user_cache_key
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication(BaseTestClient):
+
+    def get_blogs(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog'), {'page_size': 1})
+        user_queries = [query for query in queries if 'FROM "auth_user"' in query['sql'] and 'INNER JOIN' not in query['sql']]
+        return response, len(user_queries)
+
+    def test_user_is_read_once(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        assert self.get_blogs()[1] == 1
+        response, user_queries = self.get_blogs()
+        assert response.status_code == 200
+        assert user_queries == 0
+        assert cache.get(user_cache_key(self.test_user.pk))['username'] == 'testuser'
+
+    def test_password_hash_is_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        self.get_blogs()
+        entry = cache.get(user_cache_key(self.test_user.pk))
+        assert self.test_user.password not in entry.values()
+        assert set(entry) == {'pk', 'username', 'is_active', 'is_staff', 'is_superuser', 'password_md5'}
+
+    def test_saving_the_user_invalidates_it(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        self.get_blogs()
+        self.test_user.is_active = False
+        self.test_user.save()
+        assert cache.get(user_cache_key(self.test_user.pk)) is None
+
+        response, user_queries = self.get_blogs()
+        assert response.status_code == 401
+        assert user_queries == 1
+
+    def test_deleted_users_are_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        self.get_blogs()
+        self.test_user.delete()
+        assert self.get_blogs()[0].status_code == 401
+
+    def test_cache_can_be_disabled(self, settings):
+        settings.AUTH_USER_CACHE_TTL = 0
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        self.get_blogs()
+        assert self.get_blogs()[1] == 1
+        assert cache.get(user_cache_key(self.test_user.pk)) is None
@@ -0,0 +1,98 @@
+import io
+import json
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from api.account.importing import UserImporter, read_jsonl
+from api.account.serializers import ImportUserSerializer, RegisterSerializer
+
+
+def account(number, **fields):
+    return {
+        "first_name": "First", "last_name": "Last", "username": f"user{number}",
+        "email": f"user{number}@example.com", "password": f"secret-{number}", **fields,
+    }
+
+
+def write_csv(path, accounts):
+    lines = ["first_name,last_name,username,email,password"]
+    lines += [",".join(item[field] for field in ("first_name", "last_name", "username", "email", "password")) for item in accounts]
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.django_db
+def test_import_users_checks_uniqueness_in_batches(tmp_path, test_user):
+    accounts = [account(number) for number in range(10)]
+    accounts += [
+        account(10, username="testuser"),
+        account(11, email="user3@example.com"),
+        account(12, username="user4"),
+        account(13, email="not-an-email"),
+    ]
+    source = tmp_path / "users.csv"
+    write_csv(source, accounts)
+
+    out = io.StringIO()
+    call_command("import_users", str(source), "--batch-size", "4", "--workers", "0", "--errors", str(tmp_path / "errors.jsonl"), stdout=out)
+    assert "Imported 10 users from 14 records" in out.getvalue()
+    assert "Skipped 2 records: username taken" in out.getvalue()
+    assert User.objects.count() == 11
+
+    user = User.objects.get(username="user7")
+    assert user.check_password("secret-7")
+    assert user.email == "user7@example.com"
+    errors = [json.loads(line) for line in (tmp_path / "errors.jsonl").read_text().splitlines()]
+    assert sorted((error["record"], error["reason"]) for error in errors) == [(10, "username_taken"), (11, "email_taken"), (12, "username_taken"), (13, "invalid")]
+    assert "secret" not in (tmp_path / "errors.jsonl").read_text()
+    assert json.loads((tmp_path / "users.csv.checkpoint").read_text())["records"] == 14
+
+
+def test_fields_are_bounded_by_the_user_columns():
+    serializer = ImportUserSerializer(data=account(1, first_name="F" * 151))
+    assert not serializer.is_valid()
+    assert "first_name" in serializer.errors
+    assert not ImportUserSerializer(data=account(1, last_name="L" * 151)).is_valid()
+    assert ImportUserSerializer(data=account(1, first_name="F" * 150)).is_valid()
+
+
+@pytest.mark.django_db
+def test_email_is_checked_like_registrations():
+    data = account(1, email="user1@localhost")
+    for serializer in (ImportUserSerializer(data=data), RegisterSerializer(data=data)):
+        assert not serializer.is_valid()
+        assert serializer.errors["email"] == ["Please enter a valid email address"]
+
+
+@pytest.mark.django_db
+def test_interrupted_imports_resume_from_the_checkpoint(tmp_path, monkeypatch):
+    source = tmp_path / "users.jsonl"
+    source.write_text("".join(json.dumps(account(number)) + "\n" for number in range(10)) + "{broken\n")
+    inserted = []
+    original = UserImporter.insert
+
+    def crash_after_two_batches(self, entry):
+        if len(inserted) == 2:
+            raise KeyboardInterrupt
+        inserted.append(entry)
+        original(self, entry)
+
+    monkeypatch.setattr(UserImporter, "insert", crash_after_two_batches)
+    with pytest.raises(KeyboardInterrupt):
+        call_command("import_users", str(source), "--batch-size", "3", "--workers", "0", stdout=io.StringIO())
+    assert User.objects.count() == 6
+    monkeypatch.undo()
+
+    out = io.StringIO()
+    call_command("import_users", str(source), "--batch-size", "3", "--workers", "0", "--resume", stdout=out)
+    assert "Resumed after 6 records" in out.getvalue()
+    assert "Imported 10 users from 11 records" in out.getvalue()
+    assert "Skipped 1 records: invalid" in out.getvalue()
+    assert sorted(User.objects.values_list("username", flat=True)) == sorted(f"user{number}" for number in range(10))
+
+
+@pytest.mark.django_db
+def test_passwords_are_hashed_in_worker_processes():
+    records = read_jsonl(io.StringIO("".join(json.dumps(account(number)) + "\n" for number in range(4))))
+    summary = UserImporter(batch_size=2, workers=1).run(records)
+    assert summary["created"] == 4
+    assert User.objects.get(username="user3").check_password("secret-3")
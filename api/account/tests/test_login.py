@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.account import hashing
+from api.account.hashing import averify_password, verify_password
+from api.account.views import AsyncLoginView
+from api.core.workers import BoundedThreadPool
+from rest_framework.test import APIRequestFactory
+
+LOGIN_URL = '/account/login/'
+
+
+def login(client, username, password):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(LOGIN_URL, {'username': username, 'password': password})
+    return response, [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+
+@pytest.mark.django_db
+def test_login_reads_the_user_once(client, test_user):
+    response, selects = login(client, 'testuser', 'testpass')
+    assert response.status_code == 200
+    assert response.data['data']['access']
+    assert len(selects) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('username,password', [('testuser', 'wrong'), ('nobody', 'testpass')])
+def test_invalid_credentials(client, test_user, username, password):
+    assert login(client, username, password)[0].status_code == 400
+
+
+@pytest.mark.django_db
+def test_inactive_users_cannot_login(client, test_user):
+    test_user.is_active = False
+    test_user.save()
+    assert login(client, 'testuser', 'testpass')[0].status_code == 400
+
+
+@pytest.mark.django_db
+def test_outdated_hashes_are_upgraded(client, test_user, settings):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    test_user.password = make_password('testpass', hasher='md5')
+    test_user.save()
+    assert login(client, 'testuser', 'testpass')[0].status_code == 200
+    test_user.refresh_from_db()
+    assert test_user.password.startswith('scrypt$')
+    assert test_user.check_password('testpass')
+
+
+@pytest.mark.django_db
+def test_logins_are_shed_when_the_pool_is_saturated(client, test_user, monkeypatch):
+    pool = BoundedThreadPool(1, max_pending=1)
+    monkeypatch.setattr(hashing, 'get_pool', lambda: pool)
+    pool._slots.acquire()
+    response = login(client, 'testuser', 'testpass')[0]
+    assert response.status_code == 503
+    assert response['Retry-After'] == '1'
+    pool._slots.release()
+    assert login(client, 'testuser', 'testpass')[0].status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_login(test_user, settings):
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ]
+    view = AsyncLoginView.as_view()
+    request = APIRequestFactory().post(LOGIN_URL, {'username': 'testuser', 'password': 'testpass'})
+    response = async_to_sync(view)(request)
+    assert response.status_code == 200
+    assert response.data['data']['access']
+    test_user.refresh_from_db()
+    assert test_user.password.startswith('scrypt$')
+
+    request = APIRequestFactory().post(LOGIN_URL, {'username': 'testuser', 'password': 'wrong'})
+    assert async_to_sync(view)(request).status_code == 400
+
+
+def test_passwords_are_verified_in_the_pool():
+    user = User(username='someone')
+    user.set_password('secret')
+    assert verify_password(user, 'secret')
+    assert not verify_password(user, 'guess')
+    assert asyncio.run(averify_password(user, 'secret'))
+    assert not asyncio.run(averify_password(user, 'guess'))
+    user.set_unusable_password()
+    assert not verify_password(user, 'secret')
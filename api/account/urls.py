@@ -1,5 +1,10 @@
+from django.conf import settings
 from django.urls import path
-from .views import RegisterView, LoginView
+from .views import RegisterView, LoginView, AsyncLoginView
+
+# Native async login for the ASGI application, see ASYNC_API_VIEWS
+if settings.ASYNC_API_VIEWS:
+    LoginView = AsyncLoginView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
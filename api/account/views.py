@@ -1,6 +1,8 @@
+from asgiref.sync import sync_to_async  # Runs the synchronous validation of the login in a thread
 from rest_framework import status  # Provides HTTP status codes for API responses
 from .serializers import RegisterSerializer, LoginSerializer  # Importing serializers for user registration and login
-from api.core.views import BaseAPIView  # Custom base view providing common API response methods
+from .hashing import PasswordHashingBusy  # Raised when too many password verifications are in flight
+from api.core.views import AsyncBaseAPIView, BaseAPIView, same_schema_as  # Custom base views providing common API response methods
 from drf_yasg.utils import swagger_auto_schema # Utility function for generating Swagger documentation
 from drf_yasg import openapi # OpenAPI schema objects for generating Swagger documentation
 
@@ -116,6 +118,17 @@ class LoginView(BaseAPIView):
                     }
                 )
             ),
+            503: openapi.Response(
+                description="Too many logins in flight on this server, retry after the `Retry-After` delay.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
         }
     )
     def post(self, request):
@@ -133,11 +146,50 @@ class LoginView(BaseAPIView):
             if not serializer.is_valid(raise_exception=True):
                 return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Return failure if data is invalid
 
-            response = serializer.get_jwt_token(request.data)  # Get JWT token for valid credentials
+            response = serializer.get_jwt_token(serializer.validated_data)  # Get JWT token for valid credentials
+            return self.login_response(response)
+        except PasswordHashingBusy:
+            return self.busy_response()
+        except Exception as e:
+            return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Handle and respond to exceptions
+
+    def login_response(self, response):
+        if response['message'] == 'Invalid credentials':
+            return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Handle invalid credentials
 
-            if response['message'] == 'Invalid credentials':
-                return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Handle invalid credentials
+        return self.success_response(message="Login successful", data=response, status_code=status.HTTP_200_OK)  # Return success response with JWT token
+
+    def busy_response(self):
+        response = self.failure_response(message="Too many logins, please retry", status_code=status.HTTP_503_SERVICE_UNAVAILABLE)  # Shed logins while the hashing pool is saturated
+        response['Retry-After'] = '1'
+        return response
+
+'''
+Native async version of LoginView for the ASGI application.
+The password is hashed in the pool while the event loop keeps serving other requests;
+only the user lookup runs in a thread. api/account/urls.py routes to it with ASYNC_API_VIEWS.
+'''
+class AsyncLoginView(AsyncBaseAPIView, LoginView):
+
+    @same_schema_as(LoginView.post)
+    async def post(self, request):
+        '''
+        Authenticates a user based on provided credentials.
+
+        Parameters:
+            request (Request): The HTTP request object containing login credentials.
+
+        Returns:
+            Response: A JSON response indicating the result of the user login process.
+        '''
+        try:
+            serializer = LoginSerializer(data=request.data, context={'request': request})  # Initialize the serializer with incoming login data
+            if not await sync_to_async(serializer.is_valid)(raise_exception=True):
+                return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Return failure if data is invalid
 
-            return self.success_response(message="Login successful", data=response, status_code=status.HTTP_200_OK)  # Return success response with JWT token
+            response = await serializer.aget_jwt_token(serializer.validated_data)  # Get JWT token without blocking the event loop
+            return self.login_response(response)
+        except PasswordHashingBusy:
+            return self.busy_response()
         except Exception as e:
             return self.failure_response(message="Login failed", status_code=status.HTTP_400_BAD_REQUEST)  # Handle and respond to exceptions
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.blog"
+
+    def ready(self):
+        # Connect the model signal handlers
+        from api.blog import signals  # noqa: F401
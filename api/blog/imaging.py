@@ -0,0 +1,77 @@
+"""
+Image variant rendering for blog images.
+
+This module only depends on Pillow and the standard library, and never on
+Django: it is imported by the spawned worker processes of the image pool
+(see ``BlogImageService``), which do not set Django up.
+"""
+import io
+from PIL import Image, ImageOps
+
+# Formats the variants are encoded in, next to their WebP copy
+OPAQUE_FORMAT = "JPEG"
+TRANSPARENT_FORMAT = "PNG"
+
+EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG": "png",
+    "WEBP": "webp",
+}
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _encode(image, image_format, quality):
+    # Nothing but the pixels is written: EXIF (GPS position, camera, ...),
+    # XMP, ICC profiles and comments of the source are all dropped
+    buffer = io.BytesIO()
+    options = {"optimize": True}
+    if image_format in ("JPEG", "WEBP"):
+        options["quality"] = quality
+    if image_format == "JPEG":
+        options["progressive"] = True
+    if image_format == "WEBP":
+        options["method"] = 4
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(data, variants, quality=82):
+    """
+    Decodes an uploaded image and renders its variants.
+
+    ``variants`` maps variant names to ``(width, height)`` bounding boxes;
+    every variant fits its box, keeping the aspect ratio and never upscaling.
+    Each variant is encoded as JPEG (PNG for images with transparency) and
+    as WebP, without any metadata of the source, once the EXIF orientation
+    has been applied to the pixels.
+
+    Returns a dict with the ``width``, ``height`` and ``format`` of the
+    source and, per variant, its ``width``, ``height``, ``extension`` and the
+    encoded ``content`` and ``webp`` bytes.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source_format = source.format
+        image = ImageOps.exif_transpose(source)
+        width, height = image.size
+
+        transparent = _has_alpha(image)
+        image_format = TRANSPARENT_FORMAT if transparent else OPAQUE_FORMAT
+        image = image.convert("RGBA" if transparent else "RGB")
+
+        rendered = {}
+        for name, box in variants.items():
+            variant = image.copy()
+            # thumbnail() only ever shrinks, and keeps the aspect ratio
+            variant.thumbnail(tuple(box), Image.Resampling.LANCZOS)
+            rendered[name] = {
+                "width": variant.width,
+                "height": variant.height,
+                "extension": EXTENSIONS[image_format],
+                "content": _encode(variant, image_format, quality),
+                "webp": _encode(variant, "WEBP", quality),
+            }
+
+    return {"width": width, "height": height, "format": source_format, "variants": rendered}
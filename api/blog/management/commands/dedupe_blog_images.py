@@ -0,0 +1,85 @@
+import posixpath
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.blog.models import Blog
+from api.blog.signals import BLOG_NAMESPACE, bump_namespace
+from api.core.storage import file_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the blog images stored before content-addressed storage under the hash of their "
+        "content, so duplicates share one file, and points the blogs at them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the duplicates, without moving any file.",
+        )
+        parser.add_argument(
+            "--keep-originals",
+            action="store_true",
+            help="Leave the original files in place once the blogs point at the deduplicated ones.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        field = Blog._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to
+
+        # Files written before are directly in the upload directory, hashed
+        # ones are in its sub directories
+        names = []
+        if storage.exists(directory):
+            names = [posixpath.join(directory, name) for name in storage.listdir(directory)[1] if not name.startswith('.')]
+
+        groups = {}
+        total_size = 0
+        for name in names:
+            with storage.open(name, 'rb') as content:
+                digest = file_digest(content)
+            groups.setdefault(storage.hashed_name(name, digest), (digest, []))[1].append(name)
+            total_size += storage.size(name)
+
+        self.stdout.write(f"{len(names)} files, {len(groups)} distinct contents")
+        if options["dry_run"]:
+            for target, (digest, duplicates) in groups.items():
+                if len(duplicates) > 1:
+                    self.stdout.write(f"{target}: {', '.join(sorted(duplicates))}")
+            return
+
+        written_size = relinked = 0
+        for target, (digest, duplicates) in groups.items():
+            if not storage.exists(target):
+                with storage.open(duplicates[0], 'rb') as content:
+                    content.sha256 = digest
+                    storage.save(duplicates[0], content)
+                written_size += storage.size(target)
+
+            with transaction.atomic():
+                blogs = list(Blog.objects.filter(image__in=duplicates).only('uid', 'image', 'image_variants'))
+                for blog in blogs:
+                    if blog.image_variants.get('source') == blog.image.name:
+                        # The variants were rendered from the very same content
+                        blog.image_variants['source'] = target
+                    blog.image = target
+                Blog.objects.bulk_update(blogs, ['image', 'image_variants'], batch_size=500)
+                if blogs:
+                    # bulk_update() sends no post_save
+                    bump_namespace(BLOG_NAMESPACE)
+            relinked += len(blogs)
+
+            if not options["keep_originals"]:
+                for name in duplicates:
+                    storage.delete(name)
+
+        elapsed = time.perf_counter() - started
+        reclaimed = total_size - written_size if not options["keep_originals"] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Deduplicated {len(names)} files into {len(groups)} in {elapsed:.2f}s, "
+            f"{relinked} blogs relinked, {reclaimed} bytes reclaimed"
+        ))
@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from api.blog.models import Blog
+from api.core.services import BlogImageService
+
+
+class Command(BaseCommand):
+    help = "Renders the variants of blog images that do not have up to date ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render the variants of every image again, e.g. after BLOG_IMAGE_VARIANTS changed.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        processed = failed = 0
+        blogs = Blog.objects.exclude(image='').exclude(image__isnull=True).only('uid', 'image', 'image_variants').order_by()
+        for blog in blogs.iterator(chunk_size=500):
+            if not options["all"] and not BlogImageService.needs_processing(blog):
+                continue
+            try:
+                BlogImageService.process(blog.pk, blog.image.name)
+                processed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{blog.image.name}: {e}")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images in {elapsed:.2f}s, {failed} failed"))
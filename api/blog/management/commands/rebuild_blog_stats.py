@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand
+from api.blog import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-category, per-author and per-hour blog rollups from the database."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rollups.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written['categories']} category, {written['authors']} author "
+            f"and {written['periods']} hourly rows in {elapsed:.2f}s"
+        ))
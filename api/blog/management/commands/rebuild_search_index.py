@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from api.blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the blog full-text search index from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of blogs indexed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.perf_counter()
+        total = backend.rebuild(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} blogs with {type(backend).__name__} in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_category_blog_category"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="blog",
+            options={"ordering": ["-created_at", "uid"]},
+        ),
+        migrations.AddIndex(
+            model_name="blog",
+            index=models.Index(
+                fields=["-created_at", "uid"], name="blog_created_at_uid_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:03
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The GIN index and the trigger are PostgreSQL-only and therefore live outside
+# of the model state; other databases fall back to the in-process index of
+# api/blog/search.py.
+CREATE_SEARCH_SQL = [
+    """
+    CREATE FUNCTION blog_blog_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english'::regconfig, coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(NEW.content, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER blog_blog_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON blog_blog
+    FOR EACH ROW EXECUTE FUNCTION blog_blog_search_vector_update()
+    """,
+    # Touching the columns fires the trigger for the existing rows
+    "UPDATE blog_blog SET title = title",
+    "CREATE INDEX blog_search_vector_gin ON blog_blog USING gin (search_vector)",
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS blog_search_vector_gin",
+    "DROP TRIGGER IF EXISTS blog_blog_search_vector_trigger ON blog_blog",
+    "DROP FUNCTION IF EXISTS blog_blog_search_vector_update()",
+]
+
+
+def create_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in CREATE_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for statement in DROP_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0004_blog_ordering_created_at_uid_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blog",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:30
+
+from datetime import timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def seed_rollups(apps, schema_editor):
+    Blog = apps.get_model("blog", "Blog")
+    CategoryStats = apps.get_model("blog", "CategoryStats")
+    AuthorStats = apps.get_model("blog", "AuthorStats")
+    BlogActivity = apps.get_model("blog", "BlogActivity")
+    blogs = Blog.objects.order_by()
+    CategoryStats.objects.bulk_create(
+        CategoryStats(category_id=row["category"], blog_count=row["total"])
+        for row in blogs.exclude(category=None).values("category").annotate(total=Count("pk"))
+    )
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=row["author"], blog_count=row["total"])
+        for row in blogs.values("author").annotate(total=Count("pk"))
+    )
+    BlogActivity.objects.bulk_create(
+        BlogActivity(period=row["period"], blog_count=row["total"])
+        for row in blogs.annotate(period=TruncHour("created_at", tzinfo=timezone.utc))
+        .values("period")
+        .annotate(total=Count("pk"))
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("blog", "0005_blog_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BlogActivity",
+            fields=[
+                ("period", models.DateTimeField(primary_key=True, serialize=False)),
+                ("blog_count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["period"],
+            },
+        ),
+        migrations.CreateModel(
+            name="AuthorStats",
+            fields=[
+                (
+                    "author",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="blog_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("blog_count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-blog_count"], name="blog_authorstats_count_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="CategoryStats",
+            fields=[
+                (
+                    "category",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="blog.category",
+                    ),
+                ),
+                ("blog_count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-blog_count"], name="blog_categorystats_count_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0006_blog_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blog",
+            name="image_height",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="image_size",
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="image_width",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
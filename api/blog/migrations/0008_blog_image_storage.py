@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:38
+
+import api.blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0007_blog_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="blog",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=api.blog.models.blog_image_storage,
+                upload_to="blogs",
+            ),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:10
+
+from datetime import timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def seed_rollups(apps, schema_editor):
+    # The previous rows are dropped with their tables, every total starts on shard 0
+    Blog = apps.get_model("blog", "Blog")
+    CategoryStats = apps.get_model("blog", "CategoryStats")
+    BlogActivity = apps.get_model("blog", "BlogActivity")
+    blogs = Blog.objects.order_by()
+    CategoryStats.objects.bulk_create(
+        CategoryStats(category_id=row["category"], blog_count=row["total"])
+        for row in blogs.exclude(category=None).values("category").annotate(total=Count("pk"))
+    )
+    BlogActivity.objects.bulk_create(
+        BlogActivity(period=row["period"], blog_count=row["total"])
+        for row in blogs.annotate(period=TruncHour("created_at", tzinfo=timezone.utc))
+        .values("period")
+        .annotate(total=Count("pk"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_blog_image_storage"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="CategoryStats",
+        ),
+        migrations.DeleteModel(
+            name="BlogActivity",
+        ),
+        migrations.CreateModel(
+            name="CategoryStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField(default=0)),
+                ("blog_count", models.BigIntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to="blog.category",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("category", "shard"),
+                        name="blog_categorystats_category_shard_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="BlogActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.DateTimeField()),
+                ("shard", models.PositiveSmallIntegerField(default=0)),
+                ("blog_count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["period", "shard"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "shard"),
+                        name="blog_blogactivity_period_shard_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
 
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import storages
 import uuid
 
 
+def blog_image_storage():
+    # A callable keeps the storage backend, set in STORAGES, out of the migrations
+    return storages['blog_images']
+
+
 class BaseModel(models.Model):
     uid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -11,23 +18,98 @@ class BaseModel(models.Model):
     
     class Meta:
         abstract = True
+
+    def save(self, *args, **kwargs):
+        # The row and the side effects of its signals, such as the row counters
+        # of api/core/counters.py, commit or roll back together
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
         
         
+class BlogManager(models.Manager):
+    def get_queryset(self):
+        # The search vector is only ever read by the database itself
+        return super().get_queryset().defer('search_vector')
+
+
 class Blog(BaseModel):
     title = models.CharField(max_length=200)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blogs')
-    image = models.ImageField(upload_to='blogs', blank=True, null=True)
+    # Stored under the hash of its content, several blogs may share a file
+    image = models.ImageField(upload_to='blogs', storage=blog_image_storage, blank=True, null=True)
+    # Filled in by the image pipeline once the variants are rendered, see BlogImageService
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_size = models.PositiveBigIntegerField(null=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.ForeignKey('Category', on_delete=models.CASCADE, related_name='blogs', null=True, blank=True)
+    # Maintained by a PostgreSQL trigger, see api/blog/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BlogManager()
 
     def __str__(self):
         return self.title
 
     class Meta:
-        ordering = ['-created_at']
+        # (-created_at, uid) is a total ordering, which keyset pagination relies on
+        ordering = ['-created_at', 'uid']
+        indexes = [
+            models.Index(fields=['-created_at', 'uid'], name='blog_created_at_uid_idx'),
+        ]
 
 class Category(BaseModel):
     name = models.CharField(max_length=200)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+# Rollups behind StatsService, maintained incrementally by api/blog/rollups.py
+# so the stats endpoint never groups the blog table itself.
+
+class CategoryStats(models.Model):
+    # Sharded like the row counters of api/core/counters.py: blogs created
+    # concurrently in a category update different rows, summed on read
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='stats')
+    shard = models.PositiveSmallIntegerField(default=0)
+    blog_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'shard'], name='blog_categorystats_category_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id}[{self.shard}]: {self.blog_count}"
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='blog_stats')
+    blog_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-blog_count'], name='blog_authorstats_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id}: {self.blog_count}"
+
+
+class BlogActivity(models.Model):
+    # Start of the UTC hour the blogs were created in
+    period = models.DateTimeField()
+    # Every blog created in the hour is counted here, so the hour is sharded too
+    shard = models.PositiveSmallIntegerField(default=0)
+    blog_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['period', 'shard']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'shard'], name='blog_blogactivity_period_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m-%d %H:00}[{self.shard}]: {self.blog_count}"
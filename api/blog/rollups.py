@@ -0,0 +1,193 @@
+from collections import Counter
+from datetime import timedelta, timezone
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from api.blog.models import AuthorStats, Blog, BlogActivity, CategoryStats
+from api.core.counters import add_to, random_shard
+
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def hour_of(moment):
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_period(moment, granularity):
+    moment = hour_of(moment)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+def _add_to_shard(model, lookup, delta):
+    """
+    Adds ``delta`` to a random shard of the sharded rollup row matching
+    ``lookup``, as counters.increment does for the row counters.
+
+    Decrements never create rows: the counted category may be deleted
+    together with its blogs. They fall back to an existing shard when the
+    random one was never written.
+    """
+    if delta > 0:
+        add_to(model, {**lookup, "shard": random_shard()}, delta, field="blog_count")
+        return
+    using = router.db_for_write(model)
+    rows = model._base_manager.using(using).filter(**lookup)
+    if rows.filter(shard=random_shard()).update(blog_count=F("blog_count") + delta):
+        return
+    shard = rows.order_by("shard").values_list("shard", flat=True).first()
+    if shard is not None:
+        rows.filter(shard=shard).update(blog_count=F("blog_count") + delta)
+
+
+def _apply(deltas, sign):
+    categories, authors, periods = deltas
+    for category_id, count in categories.items():
+        _add_to_shard(CategoryStats, {"category_id": category_id}, sign * count)
+    # Authors are not sharded, only the author's own writes contend on the row.
+    # Decrements never create rows: the author may be deleted together with its blogs
+    for author_id, count in authors.items():
+        add_to(AuthorStats, {"author_id": author_id}, sign * count, field="blog_count", create=sign > 0)
+    for period, count in periods.items():
+        _add_to_shard(BlogActivity, {"period": period}, sign * count)
+
+
+def _deltas(blogs):
+    return (
+        Counter(blog.category_id for blog in blogs if blog.category_id is not None),
+        Counter(blog.author_id for blog in blogs),
+        Counter(hour_of(blog.created_at) for blog in blogs),
+    )
+
+
+def record_created(blogs):
+    """
+    Counts new blogs in the rollups, with one upsert per distinct category,
+    author and hour.
+    """
+    _apply(_deltas(blogs), 1)
+
+
+def record_deleted(blogs):
+    _apply(_deltas(blogs), -1)
+
+
+def record_moved(blog, previous_category_id, previous_author_id):
+    """
+    Moves an updated blog between the category and author rollups.
+    """
+    if previous_category_id != blog.category_id:
+        if previous_category_id is not None:
+            _add_to_shard(CategoryStats, {"category_id": previous_category_id}, -1)
+        if blog.category_id is not None:
+            _add_to_shard(CategoryStats, {"category_id": blog.category_id}, 1)
+    if previous_author_id != blog.author_id:
+        add_to(AuthorStats, {"author_id": previous_author_id}, -1, field="blog_count", create=False)
+        add_to(AuthorStats, {"author_id": blog.author_id}, 1, field="blog_count")
+
+
+def rebuild():
+    """
+    Recomputes every rollup from the blog table and returns the number of
+    rows written per rollup. On PostgreSQL blog writes wait for the rebuild
+    to commit, so no increment is lost in between.
+    """
+    using = router.db_for_write(BlogActivity)
+    blogs = Blog.objects.using(using).order_by()
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {Blog._meta.db_table} IN SHARE MODE")
+
+        CategoryStats.objects.using(using).all().delete()
+        AuthorStats.objects.using(using).all().delete()
+        BlogActivity.objects.using(using).all().delete()
+
+        categories = CategoryStats.objects.using(using).bulk_create(
+            CategoryStats(category_id=row["category"], blog_count=row["total"])
+            for row in blogs.exclude(category=None).values("category").annotate(total=Count("pk"))
+        )
+        authors = AuthorStats.objects.using(using).bulk_create(
+            AuthorStats(author_id=row["author"], blog_count=row["total"])
+            for row in blogs.values("author").annotate(total=Count("pk"))
+        )
+        periods = BlogActivity.objects.using(using).bulk_create(
+            BlogActivity(period=row["period"], blog_count=row["total"])
+            for row in blogs.annotate(period=TruncHour("created_at", tzinfo=timezone.utc)).values("period").annotate(total=Count("pk"))
+        )
+    return {"categories": len(categories), "authors": len(authors), "periods": len(periods)}
+
+
+def _top_categories(limit):
+    # Sums the shards of every category, a few rows per category
+    return (
+        CategoryStats.objects.values("category_id", "category__name")
+        .annotate(blogs=Sum("blog_count"))
+        .filter(blogs__gt=0)
+        .order_by("-blogs", "category_id")[:limit]
+    )
+
+
+def _top_authors(limit):
+    return AuthorStats.objects.select_related("author").filter(blog_count__gt=0).order_by("-blog_count", "author_id")[:limit]
+
+
+def _category_row(row):
+    return {"uid": row["category_id"], "name": row["category__name"], "blogs": row["blogs"]}
+
+
+def top_categories(limit):
+    return [_category_row(row) for row in _top_categories(limit)]
+
+
+async def atop_categories(limit):
+    return [_category_row(row) async for row in _top_categories(limit)]
+
+
+def top_authors(limit):
+    return [{"id": row.author_id, "username": row.author.username, "blogs": row.blog_count} for row in _top_authors(limit)]
+
+
+async def atop_authors(limit):
+    return [{"id": row.author_id, "username": row.author.username, "blogs": row.blog_count} async for row in _top_authors(limit)]
+
+
+def activity(start, end, granularity):
+    """
+    Returns the number of blogs created per ``granularity`` period within
+    [start, end), including the empty periods. Reads one row per hour of the
+    range at most, whatever the number of blogs.
+    """
+    start = floor_period(start, granularity)
+    return _series(_activity_rows(start, end), start, end, granularity)
+
+
+async def aactivity(start, end, granularity):
+    start = floor_period(start, granularity)
+    return _series([row async for row in _activity_rows(start, end)], start, end, granularity)
+
+
+def _activity_rows(start, end):
+    # The shards of every hour are summed by the database
+    return (
+        BlogActivity.objects.filter(period__gte=start, period__lt=end)
+        .values("period").annotate(total=Sum("blog_count")).order_by()
+        .values_list("period", "total")
+    )
+
+
+def _series(rows, start, end, granularity):
+    step = GRANULARITIES[granularity]
+    totals = Counter()
+    for period, count in rows:
+        totals[floor_period(period, granularity)] += count
+
+    series = []
+    period = start
+    while period < end:
+        series.append({"period": period, "blogs": totals[period]})
+        period += step
+    return series
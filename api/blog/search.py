@@ -0,0 +1,170 @@
+import re
+import threading
+from collections import defaultdict
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast
+from api.blog.models import Blog
+
+# Text search configuration used by the PostgreSQL trigger and rebuilds
+SEARCH_CONFIG = "english"
+
+# Weighted vector matching the one maintained by the blog_blog trigger
+SEARCH_VECTOR = (
+    SearchVector("title", weight="A", config=SEARCH_CONFIG)
+    + SearchVector("content", weight="B", config=SEARCH_CONFIG)
+)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# ts_rank is a float4: it is scaled to an integer so that the ORDER BY and the
+# keyset cursor, which round-trips through JSON, compare exactly the same value
+SEARCH_RANK_SCALE = 1_000_000
+
+
+def tokenize(text):
+    """
+    Splits text into lower-cased word tokens.
+    """
+    return TOKEN_RE.findall((text or "").lower())
+
+
+class PostgresSearchBackend:
+    """
+    Full-text search over the ``search_vector`` column.
+
+    The column is kept current by a database trigger on every INSERT and
+    UPDATE of ``title``/``content`` (see migration 0005), so writes that bypass
+    the ORM signals, such as ``bulk_create``, are indexed too. Lookups are
+    served by a GIN index and results are ranked with ``ts_rank``, scaled to
+    an integer (see SEARCH_RANK_SCALE) for the keyset cursors.
+    """
+
+    # Ranked first, then the stable blog ordering so keyset cursors stay total
+    ordering = ("-search_rank", "-created_at", "uid")
+
+    def search(self, queryset, query):
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), search_query) * SEARCH_RANK_SCALE, BigIntegerField())
+        )
+
+    def index(self, blog):
+        # Maintained by the database trigger
+        pass
+
+    def index_many(self, blogs):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self, batch_size=2000):
+        """
+        Recomputes every search vector in primary-key batches and returns the
+        number of indexed blogs.
+        """
+        pks = Blog.objects.order_by().values_list("pk", flat=True).iterator(chunk_size=batch_size)
+        total = 0
+        batch = []
+        for pk in pks:
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                total += Blog.objects.filter(pk__in=batch).update(search_vector=SEARCH_VECTOR)
+                batch = []
+        if batch:
+            total += Blog.objects.filter(pk__in=batch).update(search_vector=SEARCH_VECTOR)
+        return total
+
+
+class InvertedIndexSearchBackend:
+    """
+    In-process inverted index used on databases without full-text search
+    (SQLite in tests and local development).
+
+    The index is built lazily from the database on first use and kept current
+    by the ``Blog`` save/delete signals of this process. A query matches the
+    blogs containing every one of its tokens in the title or the content.
+    """
+
+    ordering = tuple(Blog._meta.ordering)
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._documents = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def search(self, queryset, query):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return queryset.none()
+        self._ensure_loaded()
+        with self._lock:
+            postings = sorted((self._postings.get(token, set()) for token in tokens), key=len)
+            matches = set.intersection(*postings) if postings[0] else set()
+        return queryset.filter(pk__in=matches)
+
+    def index(self, blog):
+        with self._lock:
+            if self._loaded:
+                self._add(blog.pk, blog.title, blog.content)
+
+    def index_many(self, blogs):
+        with self._lock:
+            if self._loaded:
+                for blog in blogs:
+                    self._add(blog.pk, blog.title, blog.content)
+
+    def remove(self, pk):
+        with self._lock:
+            self._discard(pk)
+
+    def rebuild(self, batch_size=2000):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            rows = Blog.objects.order_by().values_list("pk", "title", "content").iterator(chunk_size=batch_size)
+            for pk, title, content in rows:
+                self._add(pk, title, content)
+            self._loaded = True
+            return len(self._documents)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.rebuild()
+
+    def _add(self, pk, title, content):
+        self._discard(pk)
+        tokens = frozenset(tokenize(title)) | frozenset(tokenize(content))
+        self._documents[pk] = tokens
+        for token in tokens:
+            self._postings[token].add(pk)
+
+    def _discard(self, pk):
+        for token in self._documents.pop(pk, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(pk)
+                if not postings:
+                    del self._postings[token]
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Returns the search backend matching the default database.
+    """
+    vendor = connection.vendor
+    backend = _backends.get(vendor)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(vendor)
+            if backend is None:
+                backend = PostgresSearchBackend() if vendor == "postgresql" else InvertedIndexSearchBackend()
+                _backends[vendor] = backend
+    return backend
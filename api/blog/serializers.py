@@ -1,21 +1,61 @@
 from rest_framework import serializers
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from api.blog.models import Blog, Category
+from api.blog.rollups import GRANULARITIES
+from api.core.mixins import EagerLoadingMixin, SparseFieldsetMixin
+from api.core.serializers import TimeRangeQuerySerializer
 
 class CategoryField(serializers.RelatedField):
     def to_representation(self, value):
         return value.name
 
     def to_internal_value(self, data):
+        # Bulk writes resolve every category name up front, see BlogBulkCreateService
+        categories = self.context.get('categories')
+        if categories is not None:
+            try:
+                return categories[data]
+            except (KeyError, TypeError):
+                raise serializers.ValidationError("Category with this name does not exist.")
         try:
             return Category.objects.get(name=data)
         except Category.DoesNotExist:
             raise serializers.ValidationError("Category with this name does not exist.")
 
-class BlogSerializer(serializers.ModelSerializer):
+class AuthorField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        # Bulk writes pass the already authenticated authors, see BlogBulkCreateService
+        authors = self.context.get('authors')
+        if authors is not None:
+            try:
+                return authors[int(data)]
+            except (KeyError, TypeError, ValueError):
+                self.fail('does_not_exist', pk_value=data)
+        return super().to_internal_value(data)
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    URLs and dimensions of the rendered variants of the blog image, empty
+    until the image pipeline (BlogImageService) has processed it.
+    """
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for name, variant in (value or {}).get('variants', {}).items():
+            url, webp_url = default_storage.url(variant['name']), default_storage.url(variant['webp_name'])
+            if request is not None:
+                url, webp_url = request.build_absolute_uri(url), request.build_absolute_uri(webp_url)
+            variants[name] = {'width': variant['width'], 'height': variant['height'], 'url': url, 'webp_url': webp_url}
+        return variants
+
+class BlogSerializer(SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
     category = CategoryField(queryset=Category.objects.all())
+    author = AuthorField(queryset=User.objects.all())
+    image_variants = ImageVariantsField()
     class Meta:
         model = Blog
-        exclude = ['created_at', 'updated_at']
+        exclude = ['created_at', 'updated_at', 'search_vector']
      
     def validate(self, attrs):
         return super().validate(attrs)
@@ -26,4 +66,12 @@ class CategorySerializer(serializers.ModelSerializer):
         exclude = ['created_at', 'updated_at']
     
     def validate(self, attrs):
-        return super().validate(attrs)
\ No newline at end of file
+        return super().validate(attrs)
+
+class StatsQuerySerializer(TimeRangeQuerySerializer):
+    """
+    Query parameters of the stats endpoint, over a range of periods of the
+    granularity.
+    """
+    granularity = serializers.ChoiceField(choices=list(GRANULARITIES), default='day')
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
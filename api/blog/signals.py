@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from api.blog import rollups
+from api.blog.models import Blog, Category
+from api.blog.search import get_search_backend
+from api.core import counters
+from api.core.versioning import bump_version
+
+# Version namespaces bumped on every write, see api/core/versioning.py
+BLOG_NAMESPACE = "blog"
+CATEGORY_NAMESPACE = "category"
+
+# Sent with the list of `instances` after Blog.objects.bulk_create, which
+# bypasses post_save. Receivers run inside the inserting transaction.
+blogs_bulk_created = Signal()
+
+# Row counters read by StatsService, see api/core/counters.py
+BLOG_COUNTER = counters.register(Blog)
+CATEGORY_COUNTER = counters.register(Category)
+
+
+@receiver(post_save, sender=Blog)
+def index_blog(sender, instance, **kwargs):
+    # Keep the search index current on every save
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Blog)
+def unindex_blog(sender, instance, **kwargs):
+    # Drop deleted blogs from the search index
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(blogs_bulk_created, sender=Blog)
+def index_blogs(sender, instances, **kwargs):
+    get_search_backend().index_many(instances)
+
+
+def bump_namespace(namespace, timestamp=None):
+    """
+    Bumps the namespace right away, and again once the transaction commits:
+    a reader that cached still uncommitted state under the first bump is
+    invalidated by the second one.
+    """
+    bump_version(namespace, timestamp=timestamp)
+    if not transaction.get_autocommit():
+        transaction.on_commit(lambda: bump_version(namespace, timestamp=timestamp))
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def bump_blog_version(sender, instance, **kwargs):
+    bump_namespace(BLOG_NAMESPACE, timestamp=instance.updated_at if "created" in kwargs else None)
+
+
+@receiver(blogs_bulk_created, sender=Blog)
+def bump_blog_version_in_bulk(sender, instances, **kwargs):
+    bump_namespace(BLOG_NAMESPACE)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_version(sender, instance, **kwargs):
+    bump_namespace(CATEGORY_NAMESPACE, timestamp=instance.updated_at if "created" in kwargs else None)
+
+
+@receiver(post_save, sender=Blog)
+def count_blog(sender, instance, created, **kwargs):
+    # Runs in the saving transaction (see BaseModel.save)
+    if created:
+        counters.increment(BLOG_COUNTER)
+
+
+@receiver(post_delete, sender=Blog)
+def uncount_blog(sender, instance, **kwargs):
+    counters.increment(BLOG_COUNTER, -1)
+
+
+@receiver(blogs_bulk_created, sender=Blog)
+def count_blogs(sender, instances, **kwargs):
+    counters.increment(BLOG_COUNTER, len(instances))
+
+
+@receiver(post_save, sender=Category)
+def count_category(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(CATEGORY_COUNTER)
+
+
+@receiver(post_delete, sender=Category)
+def uncount_category(sender, instance, **kwargs):
+    counters.increment(CATEGORY_COUNTER, -1)
+
+
+@receiver(pre_save, sender=Blog)
+def remember_blog_rollup_keys(sender, instance, update_fields=None, **kwargs):
+    # The stored category and author, to move an updated blog between rollups.
+    # Saves restricted to other fields cannot move it
+    if update_fields is not None and not {'category', 'category_id', 'author', 'author_id'} & set(update_fields):
+        return
+    if not instance._state.adding:
+        instance._rollup_keys = Blog.objects.filter(pk=instance.pk).values_list('category_id', 'author_id').first()
+
+
+@receiver(post_save, sender=Blog)
+def update_blog_rollups(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_created([instance])
+    elif getattr(instance, '_rollup_keys', None) is not None:
+        rollups.record_moved(instance, *instance._rollup_keys)
+        instance._rollup_keys = None
+
+
+@receiver(post_delete, sender=Blog)
+def remove_blog_from_rollups(sender, instance, **kwargs):
+    rollups.record_deleted([instance])
+
+
+@receiver(blogs_bulk_created, sender=Blog)
+def update_blog_rollups_in_bulk(sender, instances, **kwargs):
+    rollups.record_created(instances)
+
+
+@receiver(post_save, sender=Blog)
+def process_blog_image(sender, instance, **kwargs):
+    # Imported here, the services import this module
+    from api.core.services import BlogImageService
+    BlogImageService.schedule(instance)
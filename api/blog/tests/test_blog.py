@@ -1,9 +1,17 @@
 import pytest
+from datetime import timedelta
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.models import User
 from api.blog.models import Blog, Category
 from rest_framework.test import APIClient
 from api.core.tests.text_client import BaseTestClient
+from api.blog.signals import BLOG_NAMESPACE
+from api.core.caching import cache_stats
+from api.core.pagination import KeysetPagination
+from api.core.versioning import bump_version
+from api.core.query_budget import query_budget
+from api.core.tests.factories import BlogFactory, CategoryFactory
 
 
 @pytest.mark.django_db
@@ -56,4 +64,165 @@ class TestBlogAPI(BaseTestClient):
 
         # Check if the blog creation request was unauthorized
         assert response.status_code == 401
-        assert Blog.objects.count() == 1
\ No newline at end of file
+        assert Blog.objects.count() == 1
+
+    def test_get_blogs_paginates_with_cursor(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        # Create enough blogs for three pages
+        for i in range(4):
+            Blog.objects.create(title=f"Paged Blog {i}", content="Paged content", author=self.test_user, category=self.test_category)
+
+        # Walk every page forwards by following the next cursor
+        seen = []
+        response = self.client.get(reverse('blog'), {'page_size': 2})
+        while True:
+            assert response.status_code == 200
+            seen.extend(blog['uid'] for blog in response.data['data'])
+            next_cursor = response.data['pagination']['next']
+            if next_cursor is None:
+                break
+            response = self.client.get(reverse('blog'), {'page_size': 2, 'cursor': next_cursor})
+
+        # Every blog is returned exactly once, in the model's ordering
+        expected = [str(uid) for uid in Blog.objects.values_list('uid', flat=True)]
+        assert seen == expected
+
+        # The previous cursor of the last page leads back to the middle page
+        response = self.client.get(reverse('blog'), {'page_size': 2, 'cursor': response.data['pagination']['previous']})
+        assert [blog['uid'] for blog in response.data['data']] == expected[2:4]
+
+    def test_get_blogs_invalid_cursor(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        # Send a GET request with a tampered cursor
+        response = self.client.get(reverse('blog'), {'cursor': 'not-a-cursor'})
+
+        # Check if the request was rejected
+        assert response.status_code == 400
+        assert 'cursor' in response.data['data']
+
+    def test_cursor_bounds_the_leading_ordering_column(self):
+        # The seek predicate starts the index scan at the cursor, deep pages cost the same as the first
+        paginator = KeysetPagination(ordering=Blog._meta.ordering)
+        cursor = self.test_blog.created_at
+        forwards = str(Blog.objects.filter(paginator._seek_filter([cursor, self.test_blog.uid], reverse=False)).query)
+        backwards = str(Blog.objects.filter(paginator._seek_filter([cursor, self.test_blog.uid], reverse=True)).query)
+        assert forwards.split(' WHERE ')[1].startswith('("blog_blog"."created_at" <= ')
+        assert backwards.split(' WHERE ')[1].startswith('("blog_blog"."created_at" >= ')
+
+    @pytest.mark.parametrize('extra_blogs', [0, 9])
+    def test_get_blogs_query_count_is_constant(self, extra_blogs):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        # Every blog gets its own category so any lazy loading would show up
+        for _ in range(extra_blogs):
+            BlogFactory(author=self.test_user, category=CategoryFactory())
+
+        # One query authenticates the user, one fetches the page with its categories
+        with query_budget(2, label="BlogView.get"):
+            response = self.client.get(reverse('blog'))
+
+        assert response.status_code == 200
+        assert len(response.data['data']) == extra_blogs + 1
+
+    def test_get_blogs_sparse_fieldset(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        # Only the requested fields are rendered, and content is never read
+        with query_budget(2, label="BlogView.get") as counter:
+            response = self.client.get(reverse('blog'), {'fields': 'uid,title,category'})
+
+        assert response.status_code == 200
+        assert set(response.data['data'][0]) == {'uid', 'title', 'category'}
+        assert response.data['data'][0]['category'] == self.test_category.name
+        assert '"content"' not in counter.queries[-1]
+
+        # Excluded fields are left out
+        response = self.client.get(reverse('blog'), {'exclude': 'content,image,image_width,image_height,image_size,image_variants'})
+        assert set(response.data['data'][0]) == {'uid', 'title', 'author', 'category'}
+
+    def test_get_blogs_unknown_fields(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('blog'), {'fields': 'title,password'})
+
+        # Check if the request was rejected
+        assert response.status_code == 400
+        assert 'password' in response.data['data']['fields']
+
+    def test_get_blogs_conditional(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('blog'))
+        etag = response['ETag']
+        assert response.status_code == 200
+        assert response['Last-Modified']
+
+        # An unchanged list is answered with 304 after the authentication query alone
+        with query_budget(1, label="conditional BlogView.get"):
+            response = self.client.get(reverse('blog'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+        # Other query parameters have their own validators
+        response = self.client.get(reverse('blog'), {'fields': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+        # Any write to a blog invalidates the validators
+        Blog.objects.create(title="Fresh Blog", content="Fresh content", author=self.test_user, category=self.test_category)
+        response = self.client.get(reverse('blog'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_get_blogs_if_modified_since(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('blog'))
+        last_modified = response['Last-Modified']
+
+        # Revalidation with the date alone
+        response = self.client.get(reverse('blog'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+        # Writes, even within the same second, move Last-Modified forward
+        Blog.objects.create(title="Fresh Blog", content="Fresh content", author=self.test_user, category=self.test_category)
+        response = self.client.get(reverse('blog'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 200
+        assert response['Last-Modified'] != last_modified
+        assert any(blog['title'] == "Fresh Blog" for blog in response.data['data'])
+
+    def test_versions_have_distinct_seconds(self):
+        second = (timezone.now() + timedelta(hours=1)).replace(microsecond=0)
+        first = bump_version(BLOG_NAMESPACE, timestamp=second.replace(microsecond=100000))
+        assert bump_version(BLOG_NAMESPACE, timestamp=second.replace(microsecond=900000)) == first + 1_000_000
+        assert first % 1_000_000 == 0
+
+    def test_get_blogs_response_cache(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        cache_stats.reset()
+
+        first = self.client.get(reverse('blog'), {'page_size': 5, 'fields': 'uid,title'})
+        assert first['X-Cache'] == 'MISS'
+
+        # The same parameters, in any order, are served without querying the blogs
+        with query_budget(1, label="cached BlogView.get"):
+            second = self.client.get(reverse('blog') + '?fields=uid,title&page_size=5')
+        assert second['X-Cache'] == 'HIT'
+        assert second.json() == first.json()
+        assert cache_stats.snapshot()['blog-list'] == {'hits': 1, 'misses': 1}
+
+        # Renaming a category moves every reader to a new cache generation
+        self.test_category.name = "Renamed Category"
+        self.test_category.save()
+        third = self.client.get(reverse('blog'), {'page_size': 5})
+        assert third['X-Cache'] == 'MISS'
+        assert third.json()['data'][0]['category'] == "Renamed Category"
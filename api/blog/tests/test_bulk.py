@@ -0,0 +1,71 @@
+import pytest
+from django.urls import reverse
+from api.blog import rollups
+from api.blog.models import Blog
+from api.core.query_budget import query_budget
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.mark.django_db
+class TestBlogBulkAPI(BaseTestClient):
+
+    def bulk_item(self, **overrides):
+        item = {'title': 'Bulk Blog', 'content': 'Bulk content', 'author': self.test_user.id, 'category': self.test_category.name}
+        item.update(overrides)
+        return item
+
+    def test_bulk_create(self, settings):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        settings.BLOG_BULK_BATCH_SIZE = 10
+        # The rollups of the test blog on a single shard, so every upsert below is one UPDATE
+        settings.COUNTER_SHARDS = 1
+        rollups.rebuild()
+        items = [self.bulk_item(title=f"Bulk Blog {i}") for i in range(25)]
+
+        # Authentication, the category lookup, three batched INSERTs, the blog counter and one
+        # upsert per category, author and hour rollup, plus the transaction savepoints
+        with query_budget(11, label="BlogBulkView.post"):
+            response = self.client.post(reverse('blog-bulk'), items, format='json')
+
+        assert response.status_code == 201
+        assert len(response.data['data']['created']) == 25
+        assert response.data['data']['errors'] == []
+        assert Blog.objects.filter(title__startswith="Bulk Blog ").count() == 25
+
+    def test_bulk_create_reports_item_errors(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        items = [
+            self.bulk_item(title="Valid Bulk Blog"),
+            self.bulk_item(category="Missing Category"),
+            self.bulk_item(author=self.admin_user.id),
+            self.bulk_item(title=""),
+        ]
+
+        response = self.client.post(reverse('blog-bulk'), items, format='json')
+
+        # The valid entry is created, the others are reported by index
+        assert response.status_code == 201
+        assert len(response.data['data']['created']) == 1
+        errors = {error['index']: error['errors'] for error in response.data['data']['errors']}
+        assert set(errors) == {1, 2, 3}
+        assert 'category' in errors[1]
+        assert 'author' in errors[2]
+        assert 'title' in errors[3]
+        assert Blog.objects.filter(title="Valid Bulk Blog").exists()
+
+    def test_bulk_create_rejects_non_list(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.post(reverse('blog-bulk'), self.bulk_item(), format='json')
+
+        assert response.status_code == 400
+        assert Blog.objects.count() == 1
+
+    def test_bulk_create_unauthorized(self):
+        # Send a POST request without logging in
+        response = self.client.post(reverse('blog-bulk'), [self.bulk_item()], format='json')
+
+        assert response.status_code == 401
@@ -1,9 +1,12 @@
+import time
 import pytest
 from django.urls import reverse
 from django.contrib.auth.models import User
 from api.blog.models import Category
 from rest_framework.test import APIClient
 from api.core.tests.text_client import BaseTestClient
+from api.core.query_budget import query_budget
+from api.core.caching import RefreshLock
 
 @pytest.mark.django_db
 class TestCategoryAPI(BaseTestClient):
@@ -46,4 +49,69 @@ class TestCategoryAPI(BaseTestClient):
 
         # Kategori oluşturma isteğinin yetkisiz olup olmadığını kontrol etme
         assert response.status_code == 401
-        
\ No newline at end of file
+        
+    def test_get_categories_conditional(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+
+        response = self.client.get(reverse('category'))
+        assert response.status_code == 200
+
+        # Kategoriler değişmediyse 304 dönmeli
+        response = self.client.get(reverse('category'), HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+
+        # Yeni kategori önbelleği geçersiz kılmalı
+        etag = response['ETag']
+        self.client.post(reverse('category'), {'name': 'Another Category'})
+        response = self.client.get(reverse('category'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.data['data']) == 2
+
+    def test_get_categories_serves_rendered_bytes(self):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+
+        first = self.client.get(reverse('category'))
+        assert first['X-Cache'] == 'MISS'
+
+        # İkinci istek, sadece kimlik doğrulama sorgusuyla önbellekten gelmeli
+        with query_budget(1, label="cached CategoryView.get"):
+            second = self.client.get(reverse('category'))
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+        assert second['Content-Length'] == str(len(first.content))
+        assert second['ETag'] == first['ETag']
+
+    def test_get_categories_served_stale_during_refresh(self, monkeypatch):
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+
+        first = self.client.get(reverse('category'))
+        Category.objects.create(name="Refreshing Category")
+
+        # Başka bir işçi listeyi yeniden oluştururken eski yanıt sunulmalı
+        monkeypatch.setattr(RefreshLock, 'acquire', lambda lock: False)
+        stale = self.client.get(reverse('category'))
+        assert stale['X-Cache'] == 'STALE'
+        assert stale.content == first.content
+        assert stale['ETag'] == first['ETag']
+
+        # Kilit serbest kaldığında yeni liste oluşturulmalı
+        monkeypatch.undo()
+        fresh = self.client.get(reverse('category'))
+        assert fresh['X-Cache'] == 'MISS'
+        assert len(fresh.data['data']) == 2
+
+    def test_uncached_categories_do_not_wait_for_the_lock(self, monkeypatch, settings):
+        settings.RESPONSE_CACHE_TTLS = {'category-list': 0}
+        settings.CACHE_LOCK_TIMEOUT = 3
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+
+        # Başka bir işçi kilidi tutsa bile yanıt beklemeden oluşturulmalı
+        monkeypatch.setattr(RefreshLock, 'acquire', lambda lock: False)
+        started = time.monotonic()
+        response = self.client.get(reverse('category'))
+        assert time.monotonic() - started < 1
+        assert response.status_code == 200
+        assert 'X-Cache' not in response
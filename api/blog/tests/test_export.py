@@ -0,0 +1,81 @@
+import json
+import tracemalloc
+import pytest
+from django.urls import reverse
+from api.blog.models import Blog
+from api.core.tests.text_client import BaseTestClient
+
+# Rows seeded for the memory test and the peak allowed while streaming them
+STREAMED_ROWS = 200_000
+PEAK_MEMORY_LIMIT = 16 * 1024 * 1024
+
+
+def seed_blogs(author, category, count, batch_size=10_000):
+    for start in range(0, count, batch_size):
+        Blog.objects.bulk_create(
+            Blog(title=f"Exported blog {index}", content="Exported content", author=author, category=category)
+            for index in range(start, min(start + batch_size, count))
+        )
+
+
+@pytest.mark.django_db
+class TestBlogExportAPI(BaseTestClient):
+
+    def test_export_json(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        seed_blogs(self.test_user, self.test_category, 3)
+
+        response = self.client.get(reverse('blog-export'))
+
+        # The streamed body is the usual success envelope
+        assert response.status_code == 200
+        assert response.streaming
+        body = json.loads(b''.join(response.streaming_content))
+        assert body['status'] == 'success'
+        assert body['message'] == "Blogs exported successfully"
+        assert len(body['data']) == 4
+        assert body['data'][0]['category'] == self.test_category.name
+
+    def test_export_ndjson(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        seed_blogs(self.test_user, self.test_category, 3)
+
+        response = self.client.get(reverse('blog-export'), {'output': 'ndjson'})
+
+        # The envelope comes first, then one blog per line
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert json.loads(lines[0])['status'] == 'success'
+        assert [json.loads(line)['uid'] for line in lines[1:]] == [str(uid) for uid in Blog.objects.values_list('uid', flat=True)]
+
+    def test_export_invalid_output(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('blog-export'), {'output': 'xml'})
+
+        assert response.status_code == 400
+
+    @pytest.mark.slow
+    def test_export_memory_is_flat(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        seed_blogs(self.test_user, self.test_category, STREAMED_ROWS - 1)
+
+        tracemalloc.start()
+        try:
+            response = self.client.get(reverse('blog-export'), {'output': 'ndjson'})
+            lines = 0
+            size = 0
+            for chunk in response.streaming_content:
+                lines += chunk.count(b'\n')
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Every row went through, but only a chunk of them was ever held in memory
+        assert lines == STREAMED_ROWS + 1
+        assert peak < PEAK_MEMORY_LIMIT, f"peak {peak} bytes for a {size} bytes body"
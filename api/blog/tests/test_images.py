@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import time
+import pytest
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from api.blog.imaging import render_variants
+from api.blog.models import Blog
+from api.core.services import BlogImageService
+from api.core.tests.text_client import BaseTestClient
+from api.core.workers import BoundedProcessPool
+
+VARIANTS = {'thumbnail': (320, 320), 'large': (1600, 1600)}
+
+
+def make_image(size=(2000, 1000), image_format='JPEG', mode='RGB', exif=None):
+    buffer = io.BytesIO()
+    image = Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30))
+    options = {'exif': exif} if exif is not None else {}
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def camera_exif():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotated 90° clockwise
+    exif[0x010F] = "Camera Maker"
+    return exif
+
+
+def test_render_variants_resizes_and_strips_metadata():
+    result = render_variants(make_image(exif=camera_exif()), VARIANTS, quality=80)
+
+    # The orientation is applied to the pixels, then dropped with the rest of the metadata
+    assert (result['width'], result['height'], result['format']) == (1000, 2000, 'JPEG')
+    thumbnail = result['variants']['thumbnail']
+    assert (thumbnail['width'], thumbnail['height'], thumbnail['extension']) == (160, 320, 'jpg')
+    for content in (thumbnail['content'], thumbnail['webp']):
+        with Image.open(io.BytesIO(content)) as variant:
+            assert variant.size == (160, 320)
+            assert not variant.getexif()
+    with Image.open(io.BytesIO(thumbnail['webp'])) as webp:
+        assert webp.format == 'WEBP'
+
+
+def test_render_variants_never_upscales_and_keeps_transparency():
+    result = render_variants(make_image(size=(400, 200), image_format='PNG', mode='RGBA'), VARIANTS)
+
+    large = result['variants']['large']
+    assert (large['width'], large['height'], large['extension']) == (400, 200, 'png')
+    with Image.open(io.BytesIO(large['content'])) as variant:
+        assert variant.mode == 'RGBA'
+
+
+def test_bounded_process_pool_sheds_load():
+    pool = BoundedProcessPool(max_workers=1, max_pending=1)
+    try:
+        busy = pool.submit(time.sleep, 0.5)
+        assert pool.submit(time.sleep, 0) is None
+        busy.result(timeout=30)
+
+        # Spawned workers import the pipeline without Django
+        rendered = pool.submit(render_variants, make_image(), VARIANTS).result(timeout=30)
+        assert rendered['variants']['thumbnail']['width'] == 320
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.django_db
+class TestBlogImages(BaseTestClient):
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+        settings.IMAGE_PROCESSING_WORKERS = 0
+        settings.BLOG_IMAGE_VARIANTS = VARIANTS
+
+    def test_create_blog_renders_variants_after_commit(self, django_capture_on_commit_callbacks):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        upload = SimpleUploadedFile('photo.jpg', make_image(exif=camera_exif()), content_type='image/jpeg')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(reverse('blog'), {**self.blog_data, 'image': upload}, format='multipart')
+        assert response.status_code == 200
+        # The response does not wait for the variants
+        assert response.data['data']['image_variants'] == {}
+
+        blog = Blog.objects.get(uid=response.data['data']['uid'])
+        assert (blog.image_width, blog.image_height) == (1000, 2000)
+        assert blog.image_size == blog.image.size
+
+        response = self.client.get(reverse('blog'), {'fields': 'uid,image_variants'})
+        variants = next(item['image_variants'] for item in response.data['data'] if item['uid'] == str(blog.uid))
+        assert set(variants) == {'thumbnail', 'large'}
+        assert variants['thumbnail']['width'] == 160
+        stem = os.path.splitext(os.path.basename(blog.image.name))[0]
+        assert variants['thumbnail']['url'] == default_storage.url(f'blogs/{stem[:2]}/variants/{stem}_thumbnail.jpg')
+        assert variants['thumbnail']['webp_url'].endswith('.webp')
+
+    def test_stale_renderings_are_discarded(self):
+        self.test_blog.image = SimpleUploadedFile('first.png', make_image(image_format='PNG'), content_type='image/png')
+        self.test_blog.save()
+        first = self.test_blog.image.name
+        result = render_variants(make_image(image_format='PNG'), VARIANTS)
+
+        # The blog got another image while the first one was being rendered
+        self.test_blog.image = SimpleUploadedFile('second.png', make_image(size=(300, 300), image_format='PNG'), content_type='image/png')
+        self.test_blog.save()
+
+        assert not BlogImageService.store(self.test_blog.pk, first, 100, result)
+        assert not default_storage.listdir(os.path.join(os.path.dirname(first), 'variants'))[1]
+
+    def test_identical_uploads_share_one_file_and_its_variants(self, django_capture_on_commit_callbacks):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        data = make_image()
+
+        names = []
+        for filename in ('photo.jpg', 'copy.JPG'):
+            upload = SimpleUploadedFile(filename, data, content_type='image/jpeg')
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self.client.post(reverse('blog'), {**self.blog_data, 'image': upload}, format='multipart')
+            assert response.status_code == 200
+            names.append(Blog.objects.get(uid=response.data['data']['uid']).image.name)
+
+        digest = hashlib.sha256(data).hexdigest()
+        assert names == [f'blogs/{digest[:2]}/{digest}.jpg'] * 2
+        first, second = Blog.objects.filter(image=names[0]).order_by('created_at')
+        # The second blog reuses the variants rendered for the first one
+        assert second.image_variants == first.image_variants
+
+    def test_oversized_uploads_are_rejected(self, settings):
+        settings.UPLOAD_MAX_IMAGE_PIXELS = 1000 * 1000
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        upload = SimpleUploadedFile('photo.jpg', make_image(), content_type='image/jpeg')
+
+        response = self.client.post(reverse('blog'), {**self.blog_data, 'image': upload}, format='multipart')
+        assert response.status_code == 400
+        assert 'pixels' in response.data['detail']
+
+    def test_dedupe_blog_images(self, tmp_path):
+        data = make_image(size=(200, 100))
+        (tmp_path / 'blogs').mkdir()
+        for name in ('photo.jpg', 'photo_x1Yz2.jpg', 'other.jpg'):
+            (tmp_path / 'blogs' / name).write_bytes(data if name != 'other.jpg' else make_image(size=(100, 100)))
+        Blog.objects.filter(pk=self.test_blog.pk).update(
+            image='blogs/photo_x1Yz2.jpg', image_variants={'source': 'blogs/photo_x1Yz2.jpg', 'variants': {}},
+        )
+
+        out = io.StringIO()
+        call_command('dedupe_blog_images', stdout=out)
+        assert '3 files into 2' in out.getvalue()
+
+        digest = hashlib.sha256(data).hexdigest()
+        blog = Blog.objects.get(pk=self.test_blog.pk)
+        assert blog.image.name == f'blogs/{digest[:2]}/{digest}.jpg'
+        assert blog.image_variants['source'] == blog.image.name
+        assert blog.image.read() == data
+        assert sorted(os.listdir(tmp_path / 'blogs')) == sorted({digest[:2], hashlib.sha256(make_image(size=(100, 100))).hexdigest()[:2]})
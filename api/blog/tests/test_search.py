@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import BigIntegerField
+from django.urls import reverse
+from api.blog.models import Blog
+from api.blog.search import InvertedIndexSearchBackend, PostgresSearchBackend, get_search_backend, tokenize
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.mark.django_db
+class TestBlogSearchAPI(BaseTestClient):
+
+    def test_search_matches_title_and_content(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        # Create blogs matching the search term in the title and in the content
+        in_title = Blog.objects.create(title="Tuning Postgres", content="Indexes everywhere.", author=self.test_user, category=self.test_category)
+        in_content = Blog.objects.create(title="Weekly notes", content="We spent the week tuning queries.", author=self.test_user, category=self.test_category)
+        Blog.objects.create(title="Unrelated", content="Nothing to see here.", author=self.test_user, category=self.test_category)
+
+        # Send a GET request with a search term
+        response = self.client.get(reverse('blog'), {'search': 'Tuning'})
+
+        # Check if only the matching blogs are returned
+        assert response.status_code == 200
+        assert {blog['uid'] for blog in response.data['data']} == {str(in_title.uid), str(in_content.uid)}
+
+    def test_search_index_follows_saves_and_deletes(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        blog = Blog.objects.create(title="Original headline", content="Body", author=self.test_user, category=self.test_category)
+        # Make sure the index has been loaded before the blog changes
+        self.client.get(reverse('blog'), {'search': 'original'})
+
+        # Rename the blog
+        blog.title = "Renamed headline"
+        blog.save()
+        assert self.client.get(reverse('blog'), {'search': 'original'}).data['data'] == []
+        assert len(self.client.get(reverse('blog'), {'search': 'renamed'}).data['data']) == 1
+
+        # Delete the blog
+        blog.delete()
+        assert self.client.get(reverse('blog'), {'search': 'renamed'}).data['data'] == []
+
+
+@pytest.mark.django_db
+def test_inverted_index_requires_every_token(test_user, test_category):
+    both = Blog.objects.create(title="Fast search", content="with an inverted index", author=test_user, category=test_category)
+    Blog.objects.create(title="Fast cars", content="nothing else", author=test_user, category=test_category)
+
+    backend = InvertedIndexSearchBackend()
+    assert list(backend.search(Blog.objects.all(), "fast INDEX")) == [both]
+    assert list(backend.search(Blog.objects.all(), "!!!")) == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(test_blog, capsys):
+    call_command('rebuild_search_index', batch_size=1)
+
+    assert "Indexed 1 blogs" in capsys.readouterr().out
+    assert list(get_search_backend().search(Blog.objects.all(), tokenize(test_blog.title)[0])) == [test_blog]
+
+
+def test_postgres_rank_is_an_exact_cursor_value():
+    # A float rank would be rounded through the JSON cursor and skip or repeat rows
+    queryset = PostgresSearchBackend().search(Blog.objects.all(), "tuning")
+    rank = queryset.query.annotations['search_rank']
+    assert isinstance(rank.output_field, BigIntegerField)
+    assert PostgresSearchBackend.ordering[0] == '-search_rank'
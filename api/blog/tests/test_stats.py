@@ -1,7 +1,15 @@
 import pytest
+from datetime import datetime, timedelta, timezone
+from django.core.management import call_command
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
+from api.blog.models import AuthorStats, Blog, BlogActivity, CategoryStats
+from api.core.query_budget import query_budget
+from api.core.tests.factories import BlogFactory, CategoryFactory, UserFactory
 from api.core.tests.text_client import BaseTestClient
 
 @pytest.mark.django_db
@@ -17,4 +25,128 @@ class TestStatsAPI(BaseTestClient):
         # Check if the request was successful
         assert response.status_code == 200
         assert 'data' in response.data
-        assert response.data['message'] == "Stats fetched successfully"
\ No newline at end of file
+        assert response.data['message'] == "Stats fetched successfully"
+        assert response.data['data']['total_blogs'] == 1
+        assert response.data['data']['total_categories'] == 1
+
+    def test_get_stats_breakdowns(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        other_category = CategoryFactory(name="Other Category")
+        BlogFactory.create_batch(2, author=self.test_user, category=self.test_category)
+        BlogFactory(author=self.admin_user, category=other_category)
+
+        response = self.client.get(reverse('stats'), {'top': 1})
+
+        data = response.json()['data']
+        assert data['total_blogs'] == 4
+        assert data['top_categories'] == [{'uid': str(self.test_category.uid), 'name': self.test_category.name, 'blogs': 3}]
+        assert data['top_authors'] == [{'id': self.test_user.id, 'username': self.test_user.username, 'blogs': 3}]
+        activity = data['activity']
+        assert activity['granularity'] == 'day'
+        assert len(activity['series']) == 31
+        assert activity['series'][-1]['blogs'] == 4
+        assert sum(period['blogs'] for period in activity['series']) == 4
+
+    def test_get_stats_hourly_range(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        hour = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+        Blog.objects.filter(pk=self.test_blog.pk).update(created_at=hour + timedelta(minutes=30))
+        call_command('rebuild_blog_stats')
+
+        response = self.client.get(reverse('stats'), {'granularity': 'hour', 'start': '2024-05-01T09:15:00Z', 'end': '2024-05-01T12:00:00Z'})
+
+        series = response.json()['data']['activity']['series']
+        assert [period['blogs'] for period in series] == [0, 1, 0]
+        assert series[0]['period'] == '2024-05-01T09:00:00Z'
+
+    def test_get_stats_invalid_parameters(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('stats'), {'granularity': 'hour', 'start': '2024-01-01', 'end': '2024-06-01'})
+        assert response.status_code == 400
+        assert 'start' in response.data['data']
+
+        response = self.client.get(reverse('stats'), {'granularity': 'week', 'top': 0})
+        assert response.status_code == 400
+        assert set(response.data['data']) == {'granularity', 'top'}
+
+    def test_get_stats_cost_does_not_grow_with_blogs(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        BlogFactory.create_batch(20, author=self.test_user, category=self.test_category)
+
+        # Authentication, the counters, and one query per rollup
+        with query_budget(5, label="StatsView.get"):
+            response = self.client.get(reverse('stats'))
+        assert response.json()['data']['total_blogs'] == 21
+
+
+def category_total(category):
+    return CategoryStats.objects.filter(category=category).aggregate(total=Sum('blog_count'))['total']
+
+
+def rollup_totals():
+    return (
+        sorted(CategoryStats.objects.values_list('category_id').annotate(Sum('blog_count')).order_by()),
+        sorted(AuthorStats.objects.values_list('author_id', 'blog_count')),
+        sorted(BlogActivity.objects.values_list('period').annotate(Sum('blog_count')).order_by()),
+    )
+
+
+@pytest.mark.django_db
+def test_rollups_follow_updates_and_deletes():
+    author, other_author = UserFactory(), UserFactory()
+    category, other_category = CategoryFactory(), CategoryFactory()
+    blog = BlogFactory(author=author, category=category)
+
+    blog.category = other_category
+    blog.author = other_author
+    blog.save()
+    assert category_total(category) == 0
+    assert category_total(other_category) == 1
+    assert AuthorStats.objects.get(author=author).blog_count == 0
+    assert AuthorStats.objects.get(author=other_author).blog_count == 1
+
+    # Deleting the category deletes its blogs and its rollup together
+    other_category.delete()
+    assert not CategoryStats.objects.filter(category_id=other_category.pk).exists()
+    assert AuthorStats.objects.get(author=other_author).blog_count == 0
+    assert BlogActivity.objects.aggregate(total=Sum('blog_count'))['total'] == 0
+
+
+@pytest.mark.django_db
+def test_rollups_are_sharded(settings):
+    settings.COUNTER_SHARDS = 4
+    category = CategoryFactory()
+    BlogFactory.create_batch(40, category=category)
+    assert category_total(category) == 40
+    assert CategoryStats.objects.filter(category=category).count() > 1
+    assert BlogActivity.objects.count() > 1
+
+    # Decrements land on an existing shard
+    for blog in Blog.objects.filter(category=category)[:30]:
+        blog.delete()
+    assert category_total(category) == 10
+
+
+@pytest.mark.django_db
+def test_saves_of_other_fields_do_not_read_the_rollup_keys(test_blog):
+    test_blog.title = 'Renamed'
+    with CaptureQueriesContext(connection) as queries:
+        test_blog.save(update_fields=['title', 'updated_at'])
+    assert not [query for query in queries if query['sql'].startswith('SELECT')]
+
+
+@pytest.mark.django_db
+def test_rebuild_blog_stats_matches_incremental_rollups(capsys):
+    BlogFactory.create_batch(3)
+    incremental = rollup_totals()
+    CategoryStats.objects.all().delete()
+
+    call_command('rebuild_blog_stats')
+
+    assert "Rebuilt 3 category, 3 author" in capsys.readouterr().out
+    assert incremental == rollup_totals()
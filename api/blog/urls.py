@@ -1,8 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from .views import BlogView, CategoryView, StatsView
+from .views import (
+    AsyncBlogView, AsyncCategoryView, AsyncStatsView, BlogView, BlogBulkView, BlogExportView, CategoryView, StatsView,
+)
+
+# Native async views for the ASGI application, see ASYNC_API_VIEWS
+if settings.ASYNC_API_VIEWS:
+    BlogView, CategoryView, StatsView = AsyncBlogView, AsyncCategoryView, AsyncStatsView
 
 urlpatterns = [
     path('', BlogView.as_view(), name='blog'),
+    path('bulk/', BlogBulkView.as_view(), name='blog-bulk'),
+    path('export/', BlogExportView.as_view(), name='blog-export'),
     path('category/', CategoryView.as_view(), name='category'),
     path('stats/', StatsView.as_view(), name='stats')
 ]
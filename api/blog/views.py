@@ -2,24 +2,42 @@
 from rest_framework.permissions import IsAuthenticated
 from .models import Blog  # Importing the Blog model from the local app's models
 # Importing serializers for Blog and Category models
-from .serializers import BlogSerializer, CategorySerializer
+from .serializers import BlogSerializer, CategorySerializer, StatsQuerySerializer
 # Provides standard HTTP status codes for use in API responses
 from rest_framework import status
-# JWT-based authentication class for security
-from rest_framework_simplejwt.authentication import JWTAuthentication
+# JWT authentication serving the user from the cache
+from api.account.authentication import CachedJWTAuthentication
 # Importing the Category model from the local app's models
 from .models import Category
-# Custom base view class for common API response methods
-from api.core.views import BaseAPIView
-# Django's caching framework to optimize performance
-from django.core.cache import cache
-# Service class for business logic related to statistics
-from api.core.services import StatsService
+# Custom base view classes for common API response methods, and the schema helper of their async handlers
+from api.core.views import AsyncBaseAPIView, BaseAPIView, same_schema_as
+# Runs the synchronous parts of the async views in a thread
+from asgiref.sync import sync_to_async
+# Project settings for tunables such as the export chunk size
+from django.conf import settings
+# Service classes for business logic related to statistics and bulk writes
+from api.core.services import BlogBulkCreateService, StatsService
+# Rendered response cache keyed on query parameters and data versions
+from api.core.caching import RenderedResponseCache
+# Keyset pagination that avoids OFFSET scans and COUNT(*) queries
+from api.core.pagination import KeysetPagination
+# Full-text search engine over blog titles and contents
+from .search import get_search_backend
+# Version namespaces bumped on every blog and category write
+from .signals import BLOG_NAMESPACE, CATEGORY_NAMESPACE
+# Raised by the paginator for malformed query parameters
+from rest_framework.exceptions import ValidationError
 # Utility function for generating Swagger documentation
 from drf_yasg.utils import swagger_auto_schema
 # OpenAPI schema objects for generating Swagger documentation
 from drf_yasg import openapi
 
+# Rendered blog list pages, invalidated by bumping the blog or category version
+blog_list_cache = RenderedResponseCache("blog-list", (BLOG_NAMESPACE, CATEGORY_NAMESPACE))
+# Rendered category list, invalidated by bumping the category version on every category write
+category_list_cache = RenderedResponseCache("category-list", (CATEGORY_NAMESPACE,))
+
+
 '''
 API view for handling operations related to blogs.
 This class supports GET and POST methods for retrieving and creating blog entries.
@@ -31,18 +49,46 @@ class BlogView(BaseAPIView):
     # Restricts access to authenticated users
     permission_classes = [IsAuthenticated]
     # Utilizes JWT tokens for user authentication
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    # Maximum number of SQL queries per request, including authentication
+    query_budget = {"GET": 2}
+    # Answer unchanged polls with 304 Not Modified, validated by the blog and category versions
+    conditional_namespaces = (BLOG_NAMESPACE, CATEGORY_NAMESPACE)
 
     @swagger_auto_schema(
         operation_summary="Retrieve list of blog entries",
-        operation_description="Retrieves a list of blog entries, optionally filtered by a search term in the title.",
+        operation_description="Retrieves a page of blog entries, optionally filtered by a full-text search over titles and contents. Pages are navigated with the opaque cursors returned in `pagination`.",
         manual_parameters=[
             openapi.Parameter(
                 'search',
                 openapi.IN_QUERY,
-                description="Optional search term to filter blog entries by title",
+                description="Optional full-text search terms matched against blog titles and contents",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from `pagination.next` or `pagination.previous` of a previous response",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of blog entries per page (max 100)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Optional comma separated list of fields to return (uid, title, content, author, image, category); other columns are not read from the database",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'exclude',
+                openapi.IN_QUERY,
+                description="Optional comma separated list of fields to leave out of the response",
                 type=openapi.TYPE_STRING
-            )
+            ),
         ],
         responses={
             200: openapi.Response(
@@ -67,9 +113,30 @@ class BlogView(BaseAPIView):
                                 }
                             )
                         ),
+                        'pagination': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'next': openapi.Schema(type=openapi.TYPE_STRING, description='Cursor of the next page, null on the last page'),
+                                'previous': openapi.Schema(type=openapi.TYPE_STRING, description='Cursor of the previous page, null on the first page'),
+                            }
+                        ),
                     }
                 )
             ),
+            400: openapi.Response(
+                description="Bad Request - invalid cursor, page size or field names.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
+            304: openapi.Response(
+                description="Not Modified - the ETag in If-None-Match (or the date in If-Modified-Since) is still current; the response has no body.",
+            ),
             401: openapi.Response(
                 description="Unauthorized - authentication credentials were not provided or are invalid.",
                 schema=openapi.Schema(
@@ -85,27 +152,74 @@ class BlogView(BaseAPIView):
     )
     def get(self, request):
         '''
-        Retrieves a list of blog entries, optionally filtered by a search term.
+        Retrieves a page of blog entries, optionally filtered by a search term.
+
+        Parameters:
+            request (Request): The HTTP request object containing optional query parameters.
+
+        Returns:
+            Response: A JSON response containing the page of blog entries and its cursors.
+        '''
+        # Serve identical list requests as rendered bytes until a blog or category changes
+        return self.cached_get(request, blog_list_cache, lambda: self.list_blogs(request))
+
+    def list_blogs(self, request):
+        '''
+        Builds the response for a page of blog entries when it is not cached.
 
         Parameters:
             request (Request): The HTTP request object containing optional query parameters.
 
         Returns:
-            Response: A JSON response containing the list of blog entries.
+            Response: A JSON response containing the page of blog entries and its cursors.
         '''
         search = request.query_params.get(
             'search', None)  # Extract 'search' query parameter from request
 
+        try:
+            # Resolve the optional sparse fieldset (?fields= / ?exclude=)
+            fieldset = BlogSerializer.get_fieldset(request.query_params.get('fields'), request.query_params.get('exclude'))
+        except ValidationError as e:
+            return self.failure_response(message="Invalid fields", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        blogs, ordering = self.get_blogs(fieldset, search)
+        paginator = KeysetPagination(ordering=ordering)
+        try:
+            page = paginator.paginate_queryset(blogs, request)
+        except ValidationError as e:
+            return self.failure_response(message="Invalid pagination parameters", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        return self.blogs_response(page, fieldset, paginator)
+
+    def get_blogs(self, fieldset, search=None):
+        '''
+        Builds the queryset of the blog entries to list.
+
+        Parameters:
+            fieldset (list): The serializer fields to render, or None for all of them.
+            search (str): Optional full-text search terms.
+
+        Returns:
+            tuple: The queryset and the ordering it is paginated on.
+        '''
+        # Retrieve all blog entries along with the relations the serializer renders
+        blogs = BlogSerializer.setup_eager_loading(Blog.objects.all(), fields=fieldset)
+        ordering = Blog._meta.ordering  # Seek on the (-created_at, uid) ordering of Blog.Meta
+
         if search:
-            # Filter blogs by title using the search term
-            blogs = Blog.objects.filter(title__icontains=search)
-        else:
-            blogs = Blog.objects.all()  # Retrieve all blog entries
+            # Match the search term against the full-text index of titles and contents
+            search_backend = get_search_backend()
+            blogs = search_backend.search(blogs, search)
+            ordering = search_backend.ordering
 
-        # Serialize the list of blog objects
-        serializer = BlogSerializer(blogs, many=True)
-        # Return serialized data
-        return self.success_response(data=serializer.data, message="Blogs fetched successfully")
+        # Only read the columns backing the requested fields
+        return BlogSerializer.defer_unused_columns(blogs, fieldset, required=ordering), ordering
+
+    def blogs_response(self, page, fieldset, paginator):
+        # Serialize the page of blog objects
+        serializer = BlogSerializer(page, many=True, fields=fieldset)
+        # Return serialized data along with the cursors of the neighbouring pages
+        return self.success_response(data=serializer.data, message="Blogs fetched successfully", pagination=paginator.get_pagination_data())
 
     @swagger_auto_schema(
         operation_summary="Create a new blog entry",
@@ -186,6 +300,252 @@ class BlogView(BaseAPIView):
             return self.failure_response(message="Blog creation failed", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
 
 
+'''
+API view for creating many blog entries in a single request.
+Category names are resolved with a single query and the blogs are inserted in batches inside one transaction.
+'''
+
+
+class BlogBulkView(BaseAPIView):
+    # Restricts access to authenticated users
+    permission_classes = [IsAuthenticated]
+    # Utilizes JWT tokens for user authentication
+    authentication_classes = [CachedJWTAuthentication]
+
+    @swagger_auto_schema(
+        operation_summary="Create many blog entries",
+        operation_description="Creates a list of blog entries for the authenticated user. Valid entries are created even when others are rejected; the errors of the rejected ones are returned by index.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'title': openapi.Schema(type=openapi.TYPE_STRING, description='Blog title'),
+                    'content': openapi.Schema(type=openapi.TYPE_STRING, description='Blog content'),
+                    'author': openapi.Schema(type=openapi.TYPE_INTEGER, description='Author ID, must be the authenticated user'),
+                    'category': openapi.Schema(type=openapi.TYPE_STRING, description='Category name'),
+                },
+                required=['title', 'content', 'author', 'category'],
+            ),
+        ),
+        responses={
+            201: openapi.Response(
+                description="Blogs created, possibly with some entries rejected.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "success")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Response message'),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'created': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING, format='uuid'), description='Unique IDs of the created blogs, in request order'),
+                                'errors': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'index': openapi.Schema(type=openapi.TYPE_INTEGER, description='Position of the rejected entry in the request'),
+                                            'errors': openapi.Schema(type=openapi.TYPE_OBJECT, description='Validation errors by field'),
+                                        }
+                                    ),
+                                ),
+                            }
+                        ),
+                    }
+                )
+            ),
+            400: openapi.Response(
+                description="Bad Request - the body is not a list, is too large, or no entry is valid.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
+            401: openapi.Response(
+                description="Unauthorized - authentication credentials were not provided or are invalid.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
+        }
+    )
+    def post(self, request):
+        '''
+        Creates many blog entries for the authenticated user.
+
+        Parameters:
+            request (Request): The HTTP request object containing a list of blog entries.
+
+        Returns:
+            Response: A JSON response with the created blogs and the errors of the rejected entries.
+        '''
+        items = request.data  # The body is a JSON list of blog entries
+
+        if not isinstance(items, list):
+            return self.failure_response(message="Expected a list of blogs", status_code=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BLOG_BULK_MAX_ITEMS:
+            return self.failure_response(message=f"At most {settings.BLOG_BULK_MAX_ITEMS} blogs can be created per request", status_code=status.HTTP_400_BAD_REQUEST)
+
+        blogs, errors = BlogBulkCreateService.create(items, request.user)  # Validate and insert the valid entries in batches
+
+        data = {'created': [str(blog.uid) for blog in blogs], 'errors': errors}
+        if not blogs and errors:
+            return self.failure_response(message="Blog creation failed", data=data, status_code=status.HTTP_400_BAD_REQUEST)
+        return self.success_response(data=data, message="Blogs created successfully", status_code=status.HTTP_201_CREATED)
+
+
+'''
+API view for exporting every blog entry in a single response.
+The response is streamed from a server-side cursor so memory stays flat whatever the number of blogs.
+'''
+
+
+class BlogExportView(BaseAPIView):
+    # Restricts access to authenticated users
+    permission_classes = [IsAuthenticated]
+    # Utilizes JWT tokens for user authentication
+    authentication_classes = [CachedJWTAuthentication]
+    # Maximum number of SQL queries per request, including authentication
+    query_budget = {"GET": 2}
+    # Answer unchanged polls with 304 Not Modified, validated by the blog and category versions
+    conditional_namespaces = (BLOG_NAMESPACE, CATEGORY_NAMESPACE)
+    # Output formats supported by the export
+    OUTPUTS = ('json', 'ndjson')
+
+    @swagger_auto_schema(
+        operation_summary="Export all blog entries",
+        operation_description="Streams every blog entry, optionally filtered by a full-text search, as JSON (the usual response envelope) or NDJSON (the envelope on the first line, then one blog per line).",
+        manual_parameters=[
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="Output format, `json` (default) or `ndjson`",
+                type=openapi.TYPE_STRING,
+                enum=['json', 'ndjson']
+            ),
+            openapi.Parameter(
+                'search',
+                openapi.IN_QUERY,
+                description="Optional full-text search terms matched against blog titles and contents",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Optional comma separated list of fields to return (uid, title, content, author, image, category); other columns are not read from the database",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'exclude',
+                openapi.IN_QUERY,
+                description="Optional comma separated list of fields to leave out of the response",
+                type=openapi.TYPE_STRING
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="A streamed JSON or NDJSON response containing every blog entry.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "success")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Response message'),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'uid': openapi.Schema(type=openapi.TYPE_STRING, format='uuid', description='Unique ID'),
+                                    'title': openapi.Schema(type=openapi.TYPE_STRING, description='Blog title'),
+                                    'content': openapi.Schema(type=openapi.TYPE_STRING, description='Blog content'),
+                                    'author': openapi.Schema(type=openapi.TYPE_INTEGER, description='Author ID'),
+                                    'image': openapi.Schema(type=openapi.TYPE_STRING, description='Image URL'),
+                                    'category': openapi.Schema(type=openapi.TYPE_STRING, description='Category name'),
+                                }
+                            )
+                        ),
+                    }
+                )
+            ),
+            400: openapi.Response(
+                description="Bad Request - unsupported output format or invalid field names.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
+            304: openapi.Response(
+                description="Not Modified - the ETag in If-None-Match (or the date in If-Modified-Since) is still current; the response has no body.",
+            ),
+            401: openapi.Response(
+                description="Unauthorized - authentication credentials were not provided or are invalid.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "error")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                    }
+                )
+            ),
+        }
+    )
+    def get(self, request):
+        '''
+        Streams every blog entry, optionally filtered by a search term.
+
+        Parameters:
+            request (Request): The HTTP request object containing optional query parameters.
+
+        Returns:
+            StreamingHttpResponse: A JSON or NDJSON stream containing the blog entries.
+        '''
+        output = request.query_params.get('output', 'json')  # Extract the requested output format
+        if output not in self.OUTPUTS:
+            return self.failure_response(message="Unsupported output format", data={'output': f"Choose one of: {', '.join(self.OUTPUTS)}."}, status_code=status.HTTP_400_BAD_REQUEST)
+
+        search = request.query_params.get('search', None)  # Extract 'search' query parameter from request
+
+        try:
+            # Resolve the optional sparse fieldset (?fields= / ?exclude=)
+            fieldset = BlogSerializer.get_fieldset(request.query_params.get('fields'), request.query_params.get('exclude'))
+        except ValidationError as e:
+            return self.failure_response(message="Invalid fields", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        # Retrieve all blog entries along with the relations the serializer renders
+        blogs = BlogSerializer.setup_eager_loading(Blog.objects.all(), fields=fieldset)
+        ordering = Blog._meta.ordering
+
+        if search:
+            # Match the search term against the full-text index of titles and contents
+            search_backend = get_search_backend()
+            blogs = search_backend.search(blogs, search)
+            ordering = search_backend.ordering
+
+        # Only read the columns backing the requested fields
+        blogs = BlogSerializer.defer_unused_columns(blogs, fieldset, required=ordering)
+
+        # Read the rows through a server-side cursor, chunk by chunk, instead of caching the whole result set
+        blogs = blogs.order_by(*ordering).iterator(chunk_size=settings.BLOG_EXPORT_CHUNK_SIZE)
+        return self.streaming_success_response(blogs, BlogSerializer(fields=fieldset), message="Blogs exported successfully", output=output)
+
+
 '''
 API view for managing category-related operations.
 Supports GET and POST methods for retrieving and creating categories.
@@ -197,7 +557,9 @@ class CategoryView(BaseAPIView):
     # Restricts access to authenticated users
     permission_classes = [IsAuthenticated]
     # Utilizes JWT tokens for user authentication
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    # Answer unchanged polls with 304 Not Modified, validated by the category version
+    conditional_namespaces = (CATEGORY_NAMESPACE,)
 
     @swagger_auto_schema(
         operation_summary="Retrieve list of categories",
@@ -224,6 +586,9 @@ class CategoryView(BaseAPIView):
                     }
                 )
             ),
+            304: openapi.Response(
+                description="Not Modified - the ETag in If-None-Match (or the date in If-Modified-Since) is still current; the response has no body.",
+            ),
             401: openapi.Response(
                 description="Unauthorized - authentication credentials were not provided or are invalid.",
                 schema=openapi.Schema(
@@ -247,19 +612,19 @@ class CategoryView(BaseAPIView):
         Returns:
             Response: A JSON response containing the list of categories.
         '''
-        cache_key = "categories"  # Define a cache key for storing category data
-        # Attempt to retrieve cached category data
-        cached_categories = cache.get(cache_key)
+        # Serve the rendered list straight from the cache until a category changes
+        return self.cached_get(request, category_list_cache, self.list_categories)
 
-        if cached_categories is None:
-            categories = Category.objects.all()  # Retrieve all categories if no cached data
-            serializer = CategorySerializer(
-                categories, many=True)  # Serialize category data
-            # Cache the serialized data for 1 hour
-            cache.set(cache_key, serializer.data, timeout=3600)
-        else:
-            # Use cached data if available
-            serializer = CategorySerializer(cached_categories, many=True)
+    def list_categories(self):
+        '''
+        Builds the response for the list of categories when it is not cached.
+
+        Returns:
+            Response: A JSON response containing the list of categories.
+        '''
+        categories = Category.objects.all()  # Retrieve all categories
+        serializer = CategorySerializer(
+            categories, many=True)  # Serialize category data
 
         return self.success_response(data=serializer.data, message="Categories fetched successfully")
 
@@ -322,7 +687,6 @@ class CategoryView(BaseAPIView):
         '''
         serializer = CategorySerializer(
             data=request.data)  # Create a serializer instance with incoming category data
-        cache.delete("categories")  # Invalidate the category cache
 
         if not request.user.is_staff:  # Check if the user is an admin
             return self.failure_response(message="You are not authorized to create a category", status_code=status.HTTP_401_UNAUTHORIZED)
@@ -345,11 +709,42 @@ class StatsView(BaseAPIView):
     # Restricts access to authenticated users
     permission_classes = [IsAuthenticated]
     # Utilizes JWT tokens for user authentication
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+    # Answer unchanged polls with 304 Not Modified, validated by the blog and category versions
+    conditional_namespaces = (BLOG_NAMESPACE, CATEGORY_NAMESPACE)
 
     @swagger_auto_schema(
         operation_summary="Retrieve application statistics",
-        operation_description="Retrieves statistical data related to the application.",
+        operation_description="Retrieves statistical data related to the application: totals, the categories and authors with the most blogs, and the number of blogs created per hour or day over a date range. Everything is read from incrementally maintained rollups, so the latency does not depend on the number of blogs.",
+        manual_parameters=[
+            openapi.Parameter(
+                'start',
+                openapi.IN_QUERY,
+                description="Start of the activity range (ISO 8601 date or datetime), rounded down to the granularity. Defaults to 30 days (day granularity) or 24 hours (hour granularity) before `end`",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME
+            ),
+            openapi.Parameter(
+                'end',
+                openapi.IN_QUERY,
+                description="Exclusive end of the activity range (ISO 8601 date or datetime), rounded up to the granularity. Defaults to now",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME
+            ),
+            openapi.Parameter(
+                'granularity',
+                openapi.IN_QUERY,
+                description="Length of the activity periods, `day` (default, at most 366 days) or `hour` (at most 31 days)",
+                type=openapi.TYPE_STRING,
+                enum=['hour', 'day']
+            ),
+            openapi.Parameter(
+                'top',
+                openapi.IN_QUERY,
+                description="Number of top categories and authors returned, 1 to 100 (default 10)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
         responses={
             200: openapi.Response(
                 description="A JSON response containing statistical data.",
@@ -364,11 +759,70 @@ class StatsView(BaseAPIView):
                             properties={
                                 'total_blogs': openapi.Schema(type=openapi.TYPE_INTEGER, description='Total number of blogs'),
                                 'total_categories': openapi.Schema(type=openapi.TYPE_INTEGER, description='Total number of categories'),
+                                'top_categories': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    description='Categories with the most blogs',
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'uid': openapi.Schema(type=openapi.TYPE_STRING, description='Category identifier'),
+                                            'name': openapi.Schema(type=openapi.TYPE_STRING, description='Category name'),
+                                            'blogs': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of blogs in the category'),
+                                        }
+                                    )
+                                ),
+                                'top_authors': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    description='Authors with the most blogs',
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Author identifier'),
+                                            'username': openapi.Schema(type=openapi.TYPE_STRING, description='Author username'),
+                                            'blogs': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of blogs of the author'),
+                                        }
+                                    )
+                                ),
+                                'activity': openapi.Schema(
+                                    type=openapi.TYPE_OBJECT,
+                                    description='Blogs created per period over the requested range',
+                                    properties={
+                                        'granularity': openapi.Schema(type=openapi.TYPE_STRING, description='Length of the periods'),
+                                        'start': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Start of the range'),
+                                        'end': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Exclusive end of the range'),
+                                        'series': openapi.Schema(
+                                            type=openapi.TYPE_ARRAY,
+                                            description='One entry per period, including empty ones',
+                                            items=openapi.Schema(
+                                                type=openapi.TYPE_OBJECT,
+                                                properties={
+                                                    'period': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Start of the period'),
+                                                    'blogs': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of blogs created in the period'),
+                                                }
+                                            )
+                                        ),
+                                    }
+                                ),
                             }
                         ),
                     }
                 )
             ),
+            304: openapi.Response(
+                description="Not Modified - the ETag in If-None-Match (or the date in If-Modified-Since) is still current; the response has no body.",
+            ),
+            400: openapi.Response(
+                description="Bad Request - invalid range, granularity or top parameter.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "failure")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT, description='Errors per query parameter'),
+                    }
+                )
+            ),
             401: openapi.Response(
                 description="Unauthorized - authentication credentials were not provided or are invalid.",
                 schema=openapi.Schema(
@@ -392,5 +846,135 @@ class StatsView(BaseAPIView):
         Returns:
             Response: A JSON response containing statistical data.
         '''
-        stats = StatsService.get_stats()  # Retrieve statistics using the StatsService
+        query = self.get_stats_query(request)
+        if not query.is_valid():
+            return self.failure_response(message="Invalid stats parameters", data=query.errors, status_code=status.HTTP_400_BAD_REQUEST)
+        stats = StatsService.get_stats(query.validated_data)  # Retrieve statistics using the StatsService
+        return self.success_response(data=stats, message="Stats fetched successfully")
+
+    def get_stats_query(self, request):
+        if getattr(self, 'stats_query', None) is None:
+            self.stats_query = StatsQuerySerializer(data=request.query_params)
+        return self.stats_query
+
+    def get_conditional_fingerprint(self, request):
+        # The default range ends now, so the response also changes with the current period
+        query = self.get_stats_query(request)
+        if not query.is_valid():
+            return ()
+        return (query.validated_data['start'].isoformat(), query.validated_data['end'].isoformat())
+
+
+'''
+Native async versions of BlogView, CategoryView and StatsView for the ASGI application.
+Reads go through the async cache and ORM APIs instead of a thread per request; writes
+keep their synchronous path in a thread. api/blog/urls.py routes to them with ASYNC_API_VIEWS.
+'''
+
+
+class AsyncBlogView(AsyncBaseAPIView, BlogView):
+
+    @same_schema_as(BlogView.get)
+    async def get(self, request):
+        '''
+        Retrieves a page of blog entries, optionally filtered by a search term.
+
+        Parameters:
+            request (Request): The HTTP request object containing optional query parameters.
+
+        Returns:
+            Response: A JSON response containing the page of blog entries and its cursors.
+        '''
+        return await self.acached_get(request, blog_list_cache, lambda: self.alist_blogs(request))
+
+    async def alist_blogs(self, request):
+        '''
+        Builds the response for a page of blog entries when it is not cached.
+
+        Parameters:
+            request (Request): The HTTP request object containing optional query parameters.
+
+        Returns:
+            Response: A JSON response containing the page of blog entries and its cursors.
+        '''
+        search = request.query_params.get('search', None)
+
+        try:
+            fieldset = BlogSerializer.get_fieldset(request.query_params.get('fields'), request.query_params.get('exclude'))
+        except ValidationError as e:
+            return self.failure_response(message="Invalid fields", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        if search:
+            # The in-memory search index is loaded from the database on first use
+            blogs, ordering = await sync_to_async(self.get_blogs)(fieldset, search)
+        else:
+            blogs, ordering = self.get_blogs(fieldset)
+        paginator = KeysetPagination(ordering=ordering)
+        try:
+            page = await paginator.apaginate_queryset(blogs, request)
+        except ValidationError as e:
+            return self.failure_response(message="Invalid pagination parameters", data=e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+
+        return self.blogs_response(page, fieldset, paginator)
+
+    @same_schema_as(BlogView.post)
+    async def post(self, request):
+        '''
+        Creates a new blog entry for the authenticated user, in a thread.
+        '''
+        return await sync_to_async(super().post)(request)
+
+
+class AsyncCategoryView(AsyncBaseAPIView, CategoryView):
+
+    @same_schema_as(CategoryView.get)
+    async def get(self, request):
+        '''
+        Retrieves a list of categories, with caching support to optimize performance.
+
+        Parameters:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A JSON response containing the list of categories.
+        '''
+        return await self.acached_get(request, category_list_cache, self.alist_categories)
+
+    async def alist_categories(self):
+        '''
+        Builds the response for the list of categories when it is not cached.
+
+        Returns:
+            Response: A JSON response containing the list of categories.
+        '''
+        categories = [category async for category in Category.objects.all()]
+        serializer = CategorySerializer(categories, many=True)
+
+        return self.success_response(data=serializer.data, message="Categories fetched successfully")
+
+    @same_schema_as(CategoryView.post)
+    async def post(self, request):
+        '''
+        Creates a new category entry, in a thread.
+        '''
+        return await sync_to_async(super().post)(request)
+
+
+class AsyncStatsView(AsyncBaseAPIView, StatsView):
+
+    @same_schema_as(StatsView.get)
+    async def get(self, request):
+        '''
+        Retrieves statistical data related to the application.
+
+        Parameters:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A JSON response containing statistical data.
+        '''
+        query = self.get_stats_query(request)
+        if not query.is_valid():
+            return self.failure_response(message="Invalid stats parameters", data=query.errors, status_code=status.HTTP_400_BAD_REQUEST)
+        stats = await StatsService.aget_stats(query.validated_data)
         return self.success_response(data=stats, message="Stats fetched successfully")
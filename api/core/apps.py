@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.core"
+
+    def ready(self):
+        # Count the queries of every connection for the request metrics
+        from django.db.backends.signals import connection_created
+        from api.core.metrics import install_query_counter
+        connection_created.connect(install_query_counter, dispatch_uid="api.core.metrics")
+
+        # Profiling settings are read on every request, from copies kept in sync
+        from django.core.signals import setting_changed
+        from api.core import profiling
+        profiling.load_settings()
+        setting_changed.connect(profiling.load_settings, dispatch_uid="api.core.profiling")
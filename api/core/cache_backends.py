@@ -0,0 +1,699 @@
+import json
+import logging
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """
+    Thread-safe, bounded in-process store of pickled values.
+
+    Entries expire after their own TTL and the least recently used ones are
+    evicted once ``max_entries`` or ``max_bytes`` (the total size of the
+    pickled values) would be exceeded. Values are kept pickled, like the
+    locmem backend does, so callers never share mutable objects.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, blob = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def set(self, key, blob, ttl):
+        with self._lock:
+            self._remove(key)
+            if ttl <= 0 or len(blob) > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, blob)
+            self.size += len(blob)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+
+class TierStats:
+    """
+    Per-process hit/miss counters of the local and remote tiers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def record(self, tier, hits=0, misses=0):
+        with self._lock:
+            self._counts[f"{tier}_hits"] += hits
+            self._counts[f"{tier}_misses"] += misses
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        stats = {}
+        for tier in ("local", "remote"):
+            hits = counts.get(f"{tier}_hits", 0)
+            misses = counts.get(f"{tier}_misses", 0)
+            stats[tier] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class LocalBroadcaster:
+    """
+    In-process invalidation bus, for tests and single-process deployments.
+
+    Every TwoTierCache subscribed to the same channel receives the messages
+    published on it synchronously.
+    """
+
+    _subscribers = defaultdict(list)
+    _lock = threading.Lock()
+
+    def __init__(self, channel, **options):
+        self.channel = channel
+        self._on_message = None
+
+    def subscribe(self, on_message, on_reset):
+        with self._lock:
+            self._on_message = on_message
+            self._subscribers[self.channel].append(on_message)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers[self.channel])
+        for on_message in subscribers:
+            on_message(message)
+
+    def close(self):
+        with self._lock:
+            if self._on_message in self._subscribers[self.channel]:
+                self._subscribers[self.channel].remove(self._on_message)
+
+
+class RedisBroadcaster:
+    """
+    Invalidation bus over Redis pub/sub on the connection of a django_redis
+    cache alias.
+
+    Messages are received by a daemon thread. Whenever the subscription is
+    (re-)established, messages may have been missed in between, so the local
+    tier is reset through ``on_reset``. With ``breaker`` set to the name of
+    the CircuitBreaker guarding the same server, nothing is published while
+    it is not closed.
+    """
+
+    def __init__(self, channel, alias="remote", breaker=None, reconnect_delay=1.0, max_reconnect_delay=30.0, **options):
+        self.channel = channel
+        self.alias = alias
+        self.breaker = breaker
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._closed = threading.Event()
+
+    def _connection(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def subscribe(self, on_message, on_reset):
+        thread = threading.Thread(
+            target=self._listen, args=(on_message, on_reset), name=f"cache-invalidation-{self.channel}", daemon=True
+        )
+        thread.start()
+
+    def _listen(self, on_message, on_reset):
+        delay = self.reconnect_delay
+        while not self._closed.is_set():
+            try:
+                pubsub = self._connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                on_reset()
+                delay = self.reconnect_delay
+                while not self._closed.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        on_message(message["data"])
+            except Exception as exc:
+                logger.warning("Cache invalidation subscription to %s failed, retrying in %ss: %r", self.channel, delay, exc)
+                on_reset()
+                self._closed.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _available(self):
+        if self.breaker is None:
+            return True
+        breaker = CircuitBreaker.snapshots().get(self.breaker)
+        return breaker is None or breaker["state"] == CircuitBreaker.CLOSED
+
+    def publish(self, message):
+        if not self._available():
+            return
+        try:
+            self._connection().publish(self.channel, message)
+        except Exception as exc:
+            # The short local TTL bounds how long the other workers stay stale
+            logger.warning("Could not publish a cache invalidation on %s: %r", self.channel, exc)
+
+    def close(self):
+        self._closed.set()
+
+
+class LocalTier:
+    """
+    The process-wide local tier of a TwoTierCache: the LRU, its statistics
+    and its invalidation subscription.
+
+    Django creates cache backends per thread, so the tier is shared by all
+    the backends of a process configured with the same LOCATION, remote
+    alias and channel (see ``LocalTier.shared``).
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, lru, broadcaster):
+        self.lru = lru
+        self.stats = TierStats()
+        self.node_id = uuid.uuid4().hex
+        # Bumped by every invalidation, so a value read from the remote tier
+        # while it was being invalidated is not cached locally
+        self.generation = 0
+        self.broadcaster = broadcaster
+        broadcaster.subscribe(self.on_message, self.reset)
+
+    @classmethod
+    def shared(cls, key, factory):
+        with cls._instances_lock:
+            tier = cls._instances.get(key)
+            if tier is None:
+                tier = cls._instances[key] = factory()
+            return tier
+
+    @classmethod
+    def discard(cls, key):
+        with cls._instances_lock:
+            tier = cls._instances.pop(key, None)
+        if tier is not None:
+            tier.broadcaster.close()
+
+    def on_message(self, message):
+        try:
+            payload = json.loads(message)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed cache invalidation %r", message)
+            return
+        if payload.get("sender") == self.node_id:
+            return
+        if payload.get("clear"):
+            self.reset()
+            return
+        self.generation += 1
+        for key in payload.get("keys", ()):
+            self.lru.delete(key)
+
+    def reset(self):
+        self.generation += 1
+        self.lru.clear()
+
+    def invalidate(self, keys):
+        keys = list(keys)
+        self.generation += 1
+        for key in keys:
+            self.lru.delete(key)
+        self.broadcaster.publish(json.dumps({"sender": self.node_id, "keys": keys}))
+
+    def clear(self):
+        self.reset()
+        self.broadcaster.publish(json.dumps({"sender": self.node_id, "clear": True}))
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend keeping a bounded per-process LRU in front of a remote
+    cache alias (typically django_redis).
+
+    Reads are served from the local tier when possible and fill it from the
+    remote tier otherwise. Writes go to the remote tier and are broadcast, so
+    a ``delete`` in one worker evicts the local copies of every other worker;
+    ``LOCAL_TTL`` bounds how stale a copy can get if a broadcast is lost.
+    Atomic operations (``add``, ``incr``) are always decided by the remote
+    tier. Options:
+
+        REMOTE               cache alias of the remote tier ("remote")
+        LOCAL_MAX_ENTRIES    entries kept per process (1000)
+        LOCAL_MAX_BYTES      pickled bytes kept per process (16 MiB)
+        LOCAL_TTL            seconds an entry is served locally (5)
+        BROADCASTER          dotted path of the invalidation bus (RedisBroadcaster)
+        BROADCASTER_OPTIONS  keyword arguments of the bus
+        CHANNEL              pub/sub channel ("cache-invalidation")
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.remote_alias = options.get("REMOTE", "remote")
+        self.local_ttl = options.get("LOCAL_TTL", 5)
+        channel = options.get("CHANNEL", "cache-invalidation")
+
+        def create_tier():
+            broadcaster_class = import_string(options.get("BROADCASTER", "api.core.cache_backends.RedisBroadcaster"))
+            return LocalTier(
+                LocalLRU(
+                    max_entries=options.get("LOCAL_MAX_ENTRIES", 1000),
+                    max_bytes=options.get("LOCAL_MAX_BYTES", 16 * 1024 * 1024),
+                ),
+                broadcaster_class(channel, **options.get("BROADCASTER_OPTIONS", {})),
+            )
+
+        self.tier_key = (location, self.remote_alias, channel)
+        self.tier = LocalTier.shared(self.tier_key, create_tier)
+        self.local = self.tier.lru
+        self.stats = self.tier.stats
+
+    @property
+    def remote(self):
+        return caches[self.remote_alias]
+
+    def hit_ratios(self):
+        """
+        Returns the hits, misses and hit ratio of each tier in this process.
+        """
+        return self.stats.snapshot()
+
+    def _local_key(self, key, version):
+        # The remote key, so every worker agrees on the keys it invalidates
+        return self.remote.make_and_validate_key(key, version=version)
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_ttl
+        return min(self.local_ttl, timeout)
+
+    def _fill_local(self, local_key, value, timeout, generation):
+        if generation == self.tier.generation:
+            self.local.set(local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._local_ttl(timeout))
+
+    def _get_local(self, key, version):
+        local_key = self._local_key(key, version)
+        blob = self.local.get(local_key)
+        if blob is not None:
+            self.stats.record("local", hits=1)
+            return local_key, pickle.loads(blob)
+        self.stats.record("local", misses=1)
+        return local_key, _MISSING
+
+    def _got_remote(self, local_key, value, generation, default):
+        if value is _MISSING:
+            self.stats.record("remote", misses=1)
+            return default
+        self.stats.record("remote", hits=1)
+        self._fill_local(local_key, value, DEFAULT_TIMEOUT, generation)
+        return value
+
+    def get(self, key, default=None, version=None):
+        local_key, value = self._get_local(key, version)
+        if value is not _MISSING:
+            return value
+        generation = self.tier.generation
+        return self._got_remote(local_key, self.remote.get(key, _MISSING, version=version), generation, default)
+
+    async def aget(self, key, default=None, version=None):
+        # Local hits are served on the event loop, only the remote tier runs in a thread
+        local_key, value = self._get_local(key, version)
+        if value is not _MISSING:
+            return value
+        generation = self.tier.generation
+        return self._got_remote(local_key, await self.remote.aget(key, _MISSING, version=version), generation, default)
+
+    def _get_many_local(self, keys, version):
+        found = {}
+        missing = {}
+        for key in keys:
+            local_key = self._local_key(key, version)
+            blob = self.local.get(local_key)
+            if blob is None:
+                missing[key] = local_key
+            else:
+                found[key] = pickle.loads(blob)
+        self.stats.record("local", hits=len(found), misses=len(missing))
+        return found, missing
+
+    def _got_many_remote(self, found, missing, remote_values, generation):
+        self.stats.record("remote", hits=len(remote_values), misses=len(missing) - len(remote_values))
+        for key, value in remote_values.items():
+            self._fill_local(missing[key], value, DEFAULT_TIMEOUT, generation)
+        found.update(remote_values)
+        return found
+
+    def get_many(self, keys, version=None):
+        found, missing = self._get_many_local(keys, version)
+        if not missing:
+            return found
+        generation = self.tier.generation
+        return self._got_many_remote(found, missing, self.remote.get_many(list(missing), version=version), generation)
+
+    async def aget_many(self, keys, version=None):
+        found, missing = self._get_many_local(keys, version)
+        if not missing:
+            return found
+        generation = self.tier.generation
+        return self._got_many_remote(found, missing, await self.remote.aget_many(list(missing), version=version), generation)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self._local_key(key, version)) is not None:
+            return True
+        return self.remote.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.remote.set(key, value, timeout=timeout, version=version)
+        local_key = self._local_key(key, version)
+        self.tier.invalidate([local_key])
+        self._fill_local(local_key, value, timeout, self.tier.generation)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.remote.set_many(data, timeout=timeout, version=version)
+        local_keys = {key: self._local_key(key, version) for key in data}
+        self.tier.invalidate(local_keys.values())
+        generation = self.tier.generation
+        for key, value in data.items():
+            if key not in failed:
+                self._fill_local(local_keys[key], value, timeout, generation)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.remote.add(key, value, timeout=timeout, version=version)
+        if added:
+            self.tier.invalidate([self._local_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.remote.incr(key, delta, version=version)
+        self.tier.invalidate([self._local_key(key, version)])
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        value = self.remote.decr(key, delta, version=version)
+        self.tier.invalidate([self._local_key(key, version)])
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.remote.delete(key, version=version)
+        self.tier.invalidate([self._local_key(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.remote.delete_many(keys, version=version)
+        self.tier.invalidate([self._local_key(key, version) for key in keys])
+
+    def clear(self):
+        self.remote.clear()
+        self.tier.clear()
+
+    def close(self, **kwargs):
+        self.remote.close(**kwargs)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    CLOSED lets every call through and counts consecutive failures; after
+    ``failure_threshold`` of them the breaker OPENs and rejects calls for
+    ``recovery_timeout`` seconds. It then goes HALF_OPEN and lets a single
+    probe through: a success closes it again, a failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30, clock=time.monotonic, on_close=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.on_close = on_close
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.transitions = 0
+        # Totals since the process started, exported by api/core/metrics.py
+        self.failures_total = 0
+        self.opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, name, factory):
+        with cls._instances_lock:
+            breaker = cls._instances.get(name)
+            if breaker is None:
+                breaker = cls._instances[name] = factory()
+            return breaker
+
+    @classmethod
+    def discard(cls, name):
+        with cls._instances_lock:
+            cls._instances.pop(name, None)
+
+    @classmethod
+    def snapshots(cls):
+        """
+        Returns the state of every breaker of the process, by name.
+        """
+        with cls._instances_lock:
+            breakers = list(cls._instances.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.recovery_timeout:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            closed = self.state != self.CLOSED
+            if closed:
+                self._transition(self.CLOSED)
+        if closed and self.on_close is not None:
+            self.on_close()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.failures_total += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self._transition(self.OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state, "failures": self.failures, "transitions": self.transitions,
+                "failures_total": self.failures_total, "opened": self.opened,
+            }
+
+    def _transition(self, state):
+        log = logger.warning if state == self.OPEN else logger.info
+        log("Cache circuit breaker %s: %s -> %s after %d failure(s)", self.name, self.state, state, self.failures)
+        self.state = state
+        self.transitions += 1
+        if state == self.OPEN:
+            self.opened += 1
+
+
+class CircuitBreakerCache(BaseCache):
+    """
+    Cache backend guarding another cache alias (typically django_redis) with
+    a CircuitBreaker, so a slow or unavailable server degrades the cache
+    instead of the requests.
+
+    Errors of the primary cache, including the socket timeouts that turn a
+    stalled server into errors, are counted by the breaker. While it is open
+    calls are served by the FALLBACK alias, e.g. a locmem cache, or by no
+    cache at all. Keys written to the fallback are deleted from the primary
+    once it recovers, so nothing it still holds, such as a data version that
+    was bumped during the outage, is served again. Options:
+
+        PRIMARY            guarded cache alias ("redis")
+        FALLBACK           cache alias used while open (None: no cache)
+        FAILURE_THRESHOLD  consecutive failures opening the breaker (5)
+        RECOVERY_TIMEOUT   seconds before probing the primary again (30)
+        MAX_DIRTY_KEYS     fallback writes remembered for the recovery (10000)
+    """
+
+    # Fallback writes awaiting the recovery, per breaker, shared by all threads
+    _dirty_keys = defaultdict(set)
+    _dirty_lock = threading.Lock()
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.primary_alias = options.get("PRIMARY", "redis")
+        self.fallback_alias = options.get("FALLBACK")
+        self.max_dirty_keys = options.get("MAX_DIRTY_KEYS", 10000)
+        self.breaker = CircuitBreaker.shared(
+            location or self.primary_alias,
+            lambda: CircuitBreaker(
+                location or self.primary_alias,
+                failure_threshold=options.get("FAILURE_THRESHOLD", 5),
+                recovery_timeout=options.get("RECOVERY_TIMEOUT", 30),
+            ),
+        )
+        self.breaker.on_close = self._recover
+
+    @property
+    def primary(self):
+        return caches[self.primary_alias]
+
+    @property
+    def fallback(self):
+        if self.fallback_alias is None:
+            return _no_cache
+        return caches[self.fallback_alias]
+
+    @property
+    def state(self):
+        return self.breaker.state
+
+    def _call(self, method, *args, written=(), **kwargs):
+        if self.breaker.allow_request():
+            try:
+                result = getattr(self.primary, method)(*args, **kwargs)
+            except Exception as exc:
+                logger.warning("Cache %s on %s failed: %r", method, self.primary_alias, exc)
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                return result
+        self._remember(written)
+        return getattr(self.fallback, method)(*args, **kwargs)
+
+    def _remember(self, keys):
+        if not keys:
+            return
+        with self._dirty_lock:
+            dirty_keys = self._dirty_keys[self.breaker.name]
+            if len(dirty_keys) < self.max_dirty_keys:
+                dirty_keys.update(keys)
+            else:
+                logger.warning("Too many cache writes during the %s outage to invalidate them all", self.primary_alias)
+
+    def _recover(self):
+        with self._dirty_lock:
+            keys = list(self._dirty_keys.pop(self.breaker.name, ()))
+        try:
+            if keys:
+                self.primary.delete_many(keys)
+            self.fallback.clear()
+        except Exception:
+            logger.exception("Could not invalidate the cache writes made during the %s outage", self.primary_alias)
+
+    def get(self, key, default=None, version=None):
+        return self._call("get", key, default, version=version)
+
+    def get_many(self, keys, version=None):
+        return self._call("get_many", keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._call("has_key", key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set", key, value, timeout=timeout, version=version, written=[key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set_many", data, timeout=timeout, version=version, written=list(data))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("add", key, value, timeout=timeout, version=version, written=[key])
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("touch", key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call("incr", key, delta, version=version, written=[key])
+
+    def decr(self, key, delta=1, version=None):
+        return self._call("decr", key, delta, version=version, written=[key])
+
+    def delete(self, key, version=None):
+        return self._call("delete", key, version=version, written=[key])
+
+    def delete_many(self, keys, version=None):
+        return self._call("delete_many", keys, version=version, written=list(keys))
+
+    def clear(self):
+        return self._call("clear")
+
+    def close(self, **kwargs):
+        for cache in (self.primary, self.fallback):
+            try:
+                cache.close(**kwargs)
+            except Exception:
+                logger.warning("Could not close the %s cache connection", self.primary_alias)
+
+
+_no_cache = DummyCache("", {})
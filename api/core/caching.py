@@ -0,0 +1,279 @@
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from api.core.versioning import aget_versions, get_versions
+
+
+def normalized_query_string(query_params):
+    """
+    Returns the query parameters as a canonical string: sorted, and without
+    empty values, so equivalent requests share validators and cache entries.
+    """
+    return urlencode(sorted(
+        (key, value) for key, values in query_params.lists() for value in values if value != ""
+    ))
+
+
+class CacheStats:
+    """
+    Thread-safe, per-process hit/miss counters of the cached endpoints.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def record(self, endpoint, hit):
+        with self._lock:
+            self._counts[endpoint]["hits" if hit else "misses"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+cache_stats = CacheStats()
+
+
+def _stale_ttl():
+    return getattr(settings, "CACHE_STALE_TTL", 300)
+
+
+def make_envelope(value, timeout, delta):
+    """
+    Wraps a cached value with its recompute time ``delta`` and its logical
+    ``expiry``. Envelopes are stored for ``timeout + CACHE_STALE_TTL`` seconds
+    so an expired value can still be served while it is being recomputed.
+    """
+    return {"value": value, "delta": delta, "expiry": time.time() + timeout}
+
+
+def store_envelope(keys, value, timeout, delta):
+    envelope = make_envelope(value, timeout, delta)
+    cache.set_many({key: envelope for key in keys}, timeout=timeout + _stale_ttl())
+    return envelope
+
+
+def should_refresh(envelope, beta=None, now=None):
+    """
+    Probabilistic early expiration ("XFetch", Vattani et al.).
+
+    Returns True once ``now - delta * beta * log(rand) >= expiry``: the closer
+    the entry is to expiring and the longer it took to compute, the likelier
+    a single reader refreshes it ahead of time, so hot keys are recomputed
+    before they expire instead of by every reader at once after. Expired
+    entries always need a refresh.
+    """
+    if beta is None:
+        beta = getattr(settings, "CACHE_REFRESH_BETA", 1.0)
+    if now is None:
+        now = time.time()
+    # 1 - random() lies in (0, 1], so the logarithm is defined and <= 0
+    return now - envelope["delta"] * beta * math.log(1.0 - random.random()) >= envelope["expiry"]
+
+
+class RefreshLock:
+    """
+    Cache-wide lock ensuring a single worker recomputes a key at a time.
+
+    Acquired with ``cache.add``, which is atomic on every Django backend; the
+    timeout releases the lock of a worker that died while holding it.
+    """
+
+    def __init__(self, key, timeout=None):
+        self.key = f"lock:{key}"
+        self.timeout = timeout if timeout is not None else getattr(settings, "CACHE_LOCK_TIMEOUT", 10)
+        self.token = uuid.uuid4().hex
+
+    def acquire(self):
+        return cache.add(self.key, self.token, timeout=self.timeout)
+
+    def release(self):
+        # Only the owner releases, a lock that timed out may belong to another worker
+        if cache.get(self.key) == self.token:
+            cache.delete(self.key)
+
+    async def aacquire(self):
+        return await cache.aadd(self.key, self.token, timeout=self.timeout)
+
+    async def arelease(self):
+        if await cache.aget(self.key) == self.token:
+            await cache.adelete(self.key)
+
+
+def wait_for_envelope(key, timeout=None, interval=0.05):
+    """
+    Polls the cache for ``key`` while another worker computes it. Returns the
+    envelope, or None when it did not show up within ``timeout`` seconds.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "CACHE_LOCK_TIMEOUT", 10)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        envelope = cache.get(key)
+        if envelope is not None:
+            return envelope
+    return None
+
+
+async def await_for_envelope(key, timeout=None, interval=0.05):
+    """
+    wait_for_envelope for async code, which sleeps without holding a thread.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "CACHE_LOCK_TIMEOUT", 10)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        envelope = await cache.aget(key)
+        if envelope is not None:
+            return envelope
+    return None
+
+
+def get_or_compute(key, build, timeout, stale_key=None, beta=None, lock_timeout=None):
+    """
+    Returns the value cached under ``key``, computing it with ``build()``
+    when it is missing or due for a refresh, with stampede protection:
+
+    * hot entries are refreshed early and probabilistically (see
+      ``should_refresh``), before they expire;
+    * only the worker holding the RefreshLock runs ``build()``, the others
+      keep being served the current, possibly expired, value;
+    * ``stale_key`` names a second copy that outlives ``key``, e.g. across
+      version bumps of a versioned key, which is served when ``key`` has no
+      value yet;
+    * without any value to serve, workers wait for the lock holder rather
+      than computing it all together.
+    """
+    envelope = cache.get(key)
+    if envelope is not None and not should_refresh(envelope, beta):
+        return envelope["value"]
+
+    keys = [key] if stale_key is None else [key, stale_key]
+    lock = RefreshLock(key, lock_timeout)
+    if lock.acquire():
+        try:
+            started = time.monotonic()
+            value = build()
+            store_envelope(keys, value, timeout, time.monotonic() - started)
+            return value
+        finally:
+            lock.release()
+
+    if envelope is None and stale_key is not None:
+        envelope = cache.get(stale_key)
+    if envelope is None:
+        envelope = wait_for_envelope(key, lock.timeout)
+    if envelope is not None:
+        return envelope["value"]
+    # The lock holder did not deliver in time, compute without sharing
+    return build()
+
+
+class VersionedResponseCache:
+    """
+    Response cache for a GET endpoint, keyed on the normalized query
+    parameters and the versions of the namespaces the response derives from.
+
+    Writes never delete entries: bumping a namespace version (see
+    api/core/versioning.py) moves every reader to new keys and the old
+    entries simply expire. The TTL comes from RESPONSE_CACHE_TTLS[endpoint]
+    (RESPONSE_CACHE_DEFAULT_TTL otherwise); a TTL of 0 disables the cache.
+
+    Values are stored in envelopes (see ``make_envelope``), together with a
+    copy under the version independent ``make_stale_key`` that is served
+    while the first reader of a new version recomputes it.
+    """
+
+    def __init__(self, endpoint, namespaces):
+        self.endpoint = endpoint
+        self.namespaces = tuple(namespaces)
+
+    @property
+    def ttl(self):
+        ttls = getattr(settings, "RESPONSE_CACHE_TTLS", {})
+        return ttls.get(self.endpoint, getattr(settings, "RESPONSE_CACHE_DEFAULT_TTL", 60))
+
+    def make_key(self, request, versions=None):
+        if versions is None:
+            versions = get_versions(self.namespaces)
+        fingerprint = "|".join(
+            [normalized_query_string(request.query_params)]
+            + [f"{namespace}:{versions[namespace]}" for namespace in self.namespaces]
+        )
+        digest = hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+        return f"response:{self.endpoint}:{digest}"
+
+    async def amake_key(self, request, versions=None):
+        if versions is None:
+            versions = await aget_versions(self.namespaces)
+        return self.make_key(request, versions=versions)
+
+    def make_stale_key(self, request):
+        fingerprint = normalized_query_string(request.query_params)
+        digest = hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+        return f"response:{self.endpoint}:stale:{digest}"
+
+    def get(self, key):
+        """
+        Returns the envelope stored under ``key``, or None.
+        """
+        if not self.ttl:
+            return None
+        envelope = cache.get(key)
+        cache_stats.record(self.endpoint, hit=envelope is not None)
+        return envelope
+
+    async def aget(self, key):
+        if not self.ttl:
+            return None
+        envelope = await cache.aget(key)
+        cache_stats.record(self.endpoint, hit=envelope is not None)
+        return envelope
+
+    def get_stale(self, stale_key):
+        if not self.ttl:
+            return None
+        return cache.get(stale_key)
+
+    async def aget_stale(self, stale_key):
+        if not self.ttl:
+            return None
+        return await cache.aget(stale_key)
+
+    def set(self, key, value, delta=0.0, stale_key=None):
+        if self.ttl:
+            keys = [key] if stale_key is None else [key, stale_key]
+            store_envelope(keys, value, self.ttl, delta)
+
+    def lock(self, key):
+        return RefreshLock(key)
+
+
+class RenderedResponseCache(VersionedResponseCache):
+    """
+    Versioned cache of fully rendered GET responses.
+
+    Entries hold the encoded body with its content type and ETag, so a hit
+    is served as is, without running the serializer or the renderer again.
+    See ``BaseAPIView.cached_get``.
+    """
+
+    def make_entry(self, content, content_type, etag=None):
+        if etag is None:
+            etag = '"%s"' % hashlib.md5(content, usedforsecurity=False).hexdigest()
+        return {"content": content, "content_type": content_type, "etag": etag}
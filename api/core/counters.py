@@ -0,0 +1,161 @@
+import random
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Sum
+from api.core.models import Counter
+
+# Counter name -> model whose rows it counts, see register()
+_registry = {}
+
+
+def register(model, name=None):
+    """
+    Declares a counter of the rows of ``model`` and returns its name. The
+    counter itself is kept current by the model's signal receivers.
+    """
+    name = name or model._meta.label_lower
+    _registry[name] = model
+    return name
+
+
+def registered():
+    return dict(_registry)
+
+
+def _shard_count():
+    return max(1, getattr(settings, "COUNTER_SHARDS", 8))
+
+
+def random_shard():
+    """
+    Picks the shard a writer updates, spreading concurrent writers over
+    COUNTER_SHARDS rows.
+    """
+    return random.randrange(_shard_count())
+
+
+def add_to(model, lookup, delta, field="value", create=True, using=None, update=None, defaults=None):
+    """
+    Adds ``delta`` to ``field`` of the ``model`` row matching ``lookup`` with
+    a single ``UPDATE ... SET field = field + delta``, creating the row when
+    it does not exist yet (unless ``create`` is False, e.g. for decrements of
+    rows that may be deleted along with the counted ones).
+
+    ``update`` holds other fields set by the same statement, ``defaults``
+    fields only set on a created row.
+    """
+    using = using or router.db_for_write(model)
+    manager = model._base_manager.using(using)
+    values = {**(update or {}), field: F(field) + delta}
+    with transaction.atomic(using=using, savepoint=False):
+        if manager.filter(**lookup).update(**values) or not create:
+            return
+        try:
+            # Savepoint, so losing the race for a new row keeps the transaction usable
+            with transaction.atomic(using=using):
+                manager.create(**lookup, **(defaults or {}), **(update or {}), **{field: delta})
+        except IntegrityError:
+            manager.filter(**lookup).update(**values)
+
+
+def increment(name, delta=1, shard=None):
+    """
+    Adds ``delta`` to a random shard of the counter. Run inside the
+    transaction writing the counted rows, the change commits or rolls back
+    with them.
+    """
+    if not delta:
+        return
+    if shard is None:
+        shard = random_shard()
+    # Shards are seeded by the migration, rows are only created after COUNTER_SHARDS grew
+    add_to(Counter, {"name": name, "shard": shard}, delta)
+
+
+def get_counts(names, approximate=None):
+    """
+    Returns the value of every counter in ``names`` with a single query over
+    at most COUNTER_SHARDS rows per counter.
+
+    With ``approximate`` (STATS_APPROXIMATE_COUNTS by default) on PostgreSQL,
+    the planner's row estimates are returned instead where available; they
+    are as fresh as the last ANALYZE but need no counter at all.
+    """
+    names = list(names)
+    if approximate is None:
+        approximate = getattr(settings, "STATS_APPROXIMATE_COUNTS", False)
+    counts = estimated_counts(names) if approximate else {}
+
+    exact = [name for name in names if name not in counts]
+    if exact:
+        totals = {row["name"]: row["total"] for row in _totals(exact)}
+        counts.update({name: totals.get(name) or 0 for name in exact})
+    return counts
+
+
+async def aget_counts(names, approximate=None):
+    """
+    get_counts for async code.
+    """
+    names = list(names)
+    if approximate is None:
+        approximate = getattr(settings, "STATS_APPROXIMATE_COUNTS", False)
+    counts = await sync_to_async(estimated_counts)(names) if approximate else {}
+
+    exact = [name for name in names if name not in counts]
+    if exact:
+        totals = {row["name"]: row["total"] async for row in _totals(exact)}
+        counts.update({name: totals.get(name) or 0 for name in exact})
+    return counts
+
+
+def _totals(names):
+    return Counter.objects.filter(name__in=names).values("name").annotate(total=Sum("value")).order_by()
+
+
+def estimated_counts(names):
+    """
+    Returns the planner row estimates (``pg_class.reltuples``) of the tables
+    of the registered counters in ``names``, omitting tables never analyzed
+    and every table on databases other than PostgreSQL.
+    """
+    tables = {name: _registry[name]._meta.db_table for name in names if name in _registry}
+    connection = connections[router.db_for_read(Counter)]
+    if not tables or connection.vendor != "postgresql":
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relkind = 'r' AND relname = ANY(%s) AND relnamespace = current_schema()::regnamespace",
+            [list(tables.values())],
+        )
+        estimates = dict(cursor.fetchall())
+    # reltuples is -1 until the table is first vacuumed or analyzed
+    return {
+        name: estimates[table] for name, table in tables.items() if estimates.get(table, -1) >= 0
+    }
+
+
+def reconcile(names=None, dry_run=False):
+    """
+    Recounts the rows of the registered counters and corrects the drift of
+    those that disagree. Returns ``[(name, counted, actual)]``.
+
+    The counter's shards are locked while counting, so writers of the
+    counted rows wait for the correction instead of racing it. Run it off
+    peak, or after writes that bypass the signals (raw SQL, fixtures).
+    """
+    results = []
+    for name, model in registered().items():
+        if names and name not in names:
+            continue
+        using = router.db_for_write(Counter)
+        with transaction.atomic(using=using):
+            shards = list(Counter.objects.using(using).select_for_update().filter(name=name).values_list("value", flat=True))
+            counted = sum(shards)
+            actual = model._base_manager.using(using).count()
+            if actual != counted and not dry_run:
+                increment(name, actual - counted, shard=0)
+        results.append((name, counted, actual))
+    return results
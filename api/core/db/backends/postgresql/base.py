@@ -0,0 +1,67 @@
+"""
+Django's PostgreSQL backend, with pooled connections when the database has
+a ``POOL`` entry in DATABASES (see api/core/db/pool.py)::
+
+    "POOL": {"min_size": 2, "max_size": 20, "max_lifetime": 1800, "timeout": 5, "check_idle": 1}
+
+Connections are checked out when Django connects and handed back when it
+closes them, at the end of every request with CONN_MAX_AGE = 0, which is
+the setting to use with a pool: a persistent connection would keep its pool
+slot for the lifetime of its thread.
+"""
+from psycopg2 import extensions
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from api.core.db.pool import ConnectionPool, get_pool
+from .creation import DatabaseCreation
+
+
+def check_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        # Without autocommit the check opened a transaction
+        connection.rollback()
+
+
+def reset_connection(connection):
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        # The session is gone
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL")
+        # The maintenance connections of test database creation are not pooled
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        # The test runner renames the database, which then gets a pool of its own
+        return get_pool(self.alias, self.settings_dict["NAME"], lambda: ConnectionPool(check_connection, reset_connection, **options))
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        # Set by the parent on the connections it opens, and needed for the reused ones too
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = IsolationLevel.READ_COMMITTED if isolation_level is None else IsolationLevel(isolation_level)
+        return pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        pool = self.pool
+        if pool is None:
+            return super()._close()
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                pool.putconn(self.connection)
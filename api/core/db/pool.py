@@ -0,0 +1,264 @@
+"""
+Process-wide pools of database connections.
+
+Django opens one connection per thread and, with CONN_MAX_AGE = 0, closes
+it at the end of every request: every request pays for the TCP handshake
+and the authentication of a new PostgreSQL session, and the number of
+sessions grows with the threads of every worker until the server runs out
+of ``max_connections``. With DB_POOL_ENABLED, the PostgreSQL backend of
+api/core/db/backends/postgresql checks its connections out of a
+ConnectionPool instead, and hands them back when Django closes them:
+
+* at most ``max_size`` connections are open per process and database; a
+  checkout waits up to ``timeout`` seconds for one to be handed back, then
+  fails with PoolTimeout;
+* ``min_size`` connections are opened on the first checkout;
+* connections older than ``max_lifetime`` seconds are closed instead of
+  being reused, so sessions do not live (and grow) forever;
+* connections idle for ``check_idle`` seconds or more are health checked
+  before being handed out, and replaced when the check fails;
+* connections handed back within a transaction are rolled back, broken
+  ones are closed.
+
+Idle connections are reused most recently returned first, so the others
+reach their lifetime when the load drops.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(OperationalError):
+    """
+    Raised when no connection could be checked out within the pool timeout.
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections, see the module docstring.
+
+    ``check(connection)`` raises when the connection is not usable anymore.
+    ``reset(connection)`` prepares a returned connection for its next user
+    and tells whether it can be reused.
+    """
+
+    def __init__(self, check, reset, min_size=0, max_size=10, max_lifetime=1800.0, timeout=5.0, check_idle=1.0, clock=time.monotonic):
+        self.check = check
+        self.reset = reset
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.clock = clock
+        self._condition = threading.Condition()
+        # (connection, returned at), the most recently returned last
+        self._idle = deque()
+        # Creation time of every open connection, by id
+        self._created = {}
+        # Open connections, and connections being opened
+        self._size = 0
+        self._filled = False
+        self._closed = False
+        self._counts = {"checkouts": 0, "waits": 0, "timeouts": 0, "opened": 0, "closed": 0, "failed_checks": 0}
+        self._wait_seconds = 0.0
+
+    def getconn(self, connect):
+        """
+        Returns a connection, opened with ``connect()`` when none is idle.
+        """
+        if not self._filled:
+            self._fill(connect)
+        with self._condition:
+            self._counts["checkouts"] += 1
+        started = self.clock()
+        deadline = started + self.timeout
+        while True:
+            connection, returned = self._acquire(started, deadline)
+            if connection is None:
+                return self._open(connect)
+            if self.clock() - returned < self.check_idle:
+                return connection
+            try:
+                self.check(connection)
+                return connection
+            except Exception as e:
+                logger.info("Replacing a pooled connection which failed its health check: %s", e)
+                with self._condition:
+                    self._counts["failed_checks"] += 1
+                self._discard(connection)
+
+    def putconn(self, connection):
+        """
+        Hands a connection back to the pool, or closes it when it cannot be
+        reused.
+        """
+        reusable = not self._closed and not self._expired(connection)
+        if reusable:
+            try:
+                reusable = self.reset(connection)
+            except Exception:
+                reusable = False
+        if not reusable:
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, self.clock()))
+            self._condition.notify()
+
+    def close(self):
+        """
+        Closes the idle connections; the others are closed when handed back.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                **self._counts,
+                "wait_seconds": self._wait_seconds,
+            }
+
+    def _acquire(self, started, deadline):
+        # Returns an idle connection with its return time, or (None, None)
+        # once a slot for a new connection is reserved
+        expired = []
+        waited = False
+        try:
+            with self._condition:
+                while True:
+                    while self._idle:
+                        connection, returned = self._idle.pop()
+                        if self._expired(connection):
+                            expired.append(connection)
+                            continue
+                        return connection, returned
+                    if self._size - len(expired) < self.max_size:
+                        self._size += 1
+                        return None, None
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self._counts["timeouts"] += 1
+                        raise PoolTimeout(f"No database connection available within {self.timeout} seconds ({self.max_size} in use)")
+                    if not waited:
+                        waited = True
+                        self._counts["waits"] += 1
+                    self._condition.wait(remaining)
+        finally:
+            if waited:
+                with self._condition:
+                    self._wait_seconds += self.clock() - started
+            for connection in expired:
+                self._discard(connection)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created[id(connection)] = self.clock()
+            self._counts["opened"] += 1
+        return connection
+
+    def _fill(self, connect):
+        with self._condition:
+            if self._filled:
+                return
+            self._filled = True
+        # Opened by the first caller, one at a time and outside of the lock
+        for _ in range(self.min_size):
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            self.putconn(self._open(connect))
+
+    def _expired(self, connection):
+        created = self._created.get(id(connection))
+        return created is None or self.clock() - created >= self.max_lifetime
+
+    def _discard(self, connection):
+        with self._condition:
+            if self._created.pop(id(connection), None) is not None:
+                self._size -= 1
+                self._counts["closed"] += 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, database, factory):
+    """
+    Returns the pool of the connections to ``database`` through the alias
+    ``alias``, created with ``factory()`` by the first caller.
+    """
+    key = (alias, database)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = factory()
+    return pool
+
+
+def pool_stats():
+    """
+    Returns the stats of the pools of this process, with their database
+    alias and name.
+    """
+    return [
+        {"alias": alias, "database": database, **pool.stats()}
+        for (alias, database), pool in list(_pools.items())
+    ]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Connections are never shared with a forked child, which starts without pools.
+# The parent's connections are only dropped from the registry: closing them
+# would terminate the sessions the parent is still using.
+_inherited = []
+
+
+def _forget_after_fork():
+    global _pools_lock
+    _inherited.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_after_fork)
@@ -0,0 +1,201 @@
+"""
+Buffered, deduplicated error logging behind LogErrorsMiddleware.
+
+Errors are fingerprinted by type, message template and view, and counted in
+a bounded in-memory buffer; a background thread flushes the buffer every
+ERROR_LOG_FLUSH_INTERVAL seconds with one upsert per fingerprint and window
+(see ErrorLog). An error storm therefore costs the request threads a dict
+update, and the database a handful of UPDATEs per flush, however many
+requests fail.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from api.core.counters import add_to
+from api.core.models import ErrorLog
+
+logger = logging.getLogger(__name__)
+
+# Variable parts of error messages, so "Blog 42 not found" and "Blog 43 not
+# found" are the same error
+MESSAGE_VARIABLES = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+]
+# Characters of the message taken into account by the fingerprint
+MESSAGE_TEMPLATE_LENGTH = 500
+
+
+def message_template(message):
+    template = message[:MESSAGE_TEMPLATE_LENGTH]
+    for pattern, placeholder in MESSAGE_VARIABLES:
+        template = pattern.sub(placeholder, template)
+    return template
+
+
+def fingerprint(error_type, message, view_name):
+    key = "\0".join((error_type, message_template(message), view_name))
+    return hashlib.sha1(key.encode("utf-8", "replace")).hexdigest()
+
+
+def window_start(when, window):
+    timestamp = when.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % window, tz=dt_timezone.utc)
+
+
+class ErrorLogBuffer:
+    """
+    Bounded buffer of error occurrences, aggregated per fingerprint and
+    window, and flushed to ErrorLog by a daemon thread.
+
+    At most ERROR_LOG_BUFFER_SIZE distinct errors are kept between two
+    flushes; occurrences of further errors are dropped (and the drop is
+    logged), while those of buffered errors are still counted. With an
+    ERROR_LOG_FLUSH_INTERVAL of 0 every error is written right away.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dropped = 0
+        self._thread = None
+        self._stopped = threading.Event()
+        if hasattr(os, "register_at_fork"):
+            # Neither the lock state nor the flushing thread survive a fork
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dropped = 0
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def record(self, error_type, message, status_code, view_name="", when=None):
+        """
+        Counts an occurrence of an error. Returns whether it is the first
+        one since the last flush, i.e. whether it is worth logging in full.
+        """
+        when = when or timezone.now()
+        key = (fingerprint(error_type, message, view_name), window_start(when, settings.ERROR_LOG_WINDOW))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["occurrences"] += 1
+                entry["last_seen"] = max(entry["last_seen"], when)
+                return False
+            if len(self._entries) >= settings.ERROR_LOG_BUFFER_SIZE:
+                self._dropped += 1
+                return False
+            self._entries[key] = {
+                "error_type": error_type,
+                "error_message": message,
+                "status_code": status_code,
+                "view_name": view_name,
+                "occurrences": 1,
+                "first_seen": when,
+                "last_seen": when,
+            }
+
+        if settings.ERROR_LOG_FLUSH_INTERVAL > 0:
+            self._ensure_thread()
+        else:
+            self.flush()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return sum(entry["occurrences"] for entry in self._entries.values())
+
+    def flush(self):
+        """
+        Writes the buffered errors, in one transaction. On failure they are
+        kept, within the bounds of the buffer, for the next flush. Returns
+        the number of ErrorLog rows written.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            logger.warning("Error log buffer full, dropped %d occurrences", dropped)
+        if not entries:
+            return 0
+
+        try:
+            with transaction.atomic():
+                for (error_fingerprint, error_window), entry in entries.items():
+                    add_to(
+                        ErrorLog,
+                        {"fingerprint": error_fingerprint, "window_start": error_window},
+                        entry["occurrences"],
+                        field="occurrences",
+                        update={"last_seen": entry["last_seen"]},
+                        defaults={
+                            "error_type": entry["error_type"][:255],
+                            "error_message": entry["error_message"],
+                            "status_code": entry["status_code"],
+                            "view_name": entry["view_name"][:255],
+                            "timestamp": entry["first_seen"],
+                        },
+                    )
+        except Exception as e:
+            # Not logged with the traceback: the database is likely what is failing
+            logger.warning("Could not write %d error logs, retrying on the next flush: %s", len(entries), e)
+            self._requeue(entries)
+            return 0
+        return len(entries)
+
+    def _requeue(self, entries):
+        with self._lock:
+            for key, entry in entries.items():
+                current = self._entries.get(key)
+                if current is not None:
+                    current["occurrences"] += entry["occurrences"]
+                    current["first_seen"] = min(current["first_seen"], entry["first_seen"])
+                    current["last_seen"] = max(current["last_seen"], entry["last_seen"])
+                elif len(self._entries) < settings.ERROR_LOG_BUFFER_SIZE:
+                    self._entries[key] = entry
+                else:
+                    self._dropped += entry["occurrences"]
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="error-log-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(settings.ERROR_LOG_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error log flush failed")
+            finally:
+                # The thread has database connections of its own
+                close_old_connections()
+
+    def close(self):
+        """
+        Stops the flushing thread and writes what is left.
+        """
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+
+error_log_buffer = ErrorLogBuffer()
+atexit.register(error_log_buffer.close)
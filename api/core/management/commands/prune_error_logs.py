@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.core.services import ErrorLogService
+
+
+class Command(BaseCommand):
+    help = "Deletes the error logs older than the retention period, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ERROR_LOG_RETENTION_DAYS,
+            help="Keep the errors of the last DAYS days (ERROR_LOG_RETENTION_DAYS by default).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.ERROR_LOG_PRUNE_CHUNK_SIZE,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--days and --chunk-size must be positive.")
+
+        started = time.perf_counter()
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = ErrorLogService.prune(before, chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+        elapsed = time.perf_counter() - started
+        if options["dry_run"]:
+            self.stdout.write(f"{deleted} error logs older than {before:%Y-%m-%d %H:%M} would be deleted")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} error logs older than {before:%Y-%m-%d %H:%M} in {elapsed:.2f}s"))
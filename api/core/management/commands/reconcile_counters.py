@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.core import counters
+
+
+class Command(BaseCommand):
+    help = "Recounts the rows behind the maintained counters and corrects any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Counters to reconcile (all registered counters by default).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drift, without correcting it.",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["names"]) - counters.registered().keys()
+        if unknown:
+            raise CommandError(f"Unknown counter(s): {', '.join(sorted(unknown))}")
+
+        for name, counted, actual in counters.reconcile(options["names"], dry_run=options["dry_run"]):
+            if counted == actual:
+                self.stdout.write(f"{name}: {actual} (in sync)")
+            elif options["dry_run"]:
+                self.stdout.write(self.style.WARNING(f"{name}: counted {counted}, actual {actual} (drift {actual - counted:+d})"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: corrected {counted} -> {actual}"))
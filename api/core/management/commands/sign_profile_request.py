@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.core.profiling import HEADER, sign_request
+
+
+class Command(BaseCommand):
+    help = "Prints the X-Profile-Request header which makes the API profile the requests to a path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the requests to profile, e.g. /blog/.")
+
+    def handle(self, *args, **options):
+        if not options["path"].startswith("/"):
+            raise CommandError("The path must start with a slash.")
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write("PROFILING_ENABLED is off, the header is ignored until it is turned on.")
+        header = HEADER[len("HTTP_"):].replace("_", "-").title()
+        self.stdout.write(f"{header}: {sign_request(options['path'])}")
+        self.stdout.write(self.style.SUCCESS(f"Valid for {settings.PROFILING_SIGNATURE_MAX_AGE}s"))
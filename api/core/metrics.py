@@ -0,0 +1,564 @@
+"""
+Per-view request metrics, exposed in the Prometheus text format.
+
+BaseAPIView.dispatch records, per view and method, a latency histogram, the
+number and duration of the SQL queries, the response cache results of
+cached_get and a response size histogram. Every request costs one lock
+acquisition and a few additions; the text format is only built when
+/metrics is scraped.
+
+Queries are counted by an execute wrapper installed once per database
+connection (see install_query_counter), which adds them to the counters of
+the current request, if any: entering ``connection.execute_wrapper()`` on
+every request would cost more than everything else together. The counters
+live in a context variable, so the queries async views run through
+sync_to_async are counted as well.
+
+Each process aggregates its own requests. With METRICS_DIR set, every
+process also writes a snapshot of its metrics to that directory every
+METRICS_SNAPSHOT_INTERVAL seconds, and /metrics serves the sum of all
+snapshots, so any worker answers for all of them. The snapshots of
+exited processes, e.g. recycled workers, are folded into a single rollup
+of their counters (metrics-exited.json) and deleted by the next scrape, so
+counters never go backwards and the directory does not grow with every
+worker ever started. Processes are told apart by pid, METRICS_DIR must not
+be shared between hosts; clear it when the application is (re)deployed.
+"""
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from api.core.cache_backends import CircuitBreaker
+from api.core.db.pool import pool_stats
+from api.core.query_budget import QueryCounter
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Counters of ConnectionPool.stats(), with their help text
+DB_POOL_COUNTERS = (
+    ("checkouts", "Connections checked out of the database pools."),
+    ("waits", "Checkouts which waited for a connection to be handed back."),
+    ("timeouts", "Checkouts which failed after waiting for the pool timeout."),
+    ("opened", "Connections opened by the database pools."),
+    ("closed", "Connections closed by the database pools (expired, broken or failing their check)."),
+    ("failed_checks", "Idle connections which failed their health check."),
+    ("wait_seconds", "Time spent waiting for a connection to be handed back."),
+)
+DB_POOL_GAUGES = ("idle", "in_use", "max_size")
+DB_POOL_STATS = DB_POOL_GAUGES + tuple(name for name, _ in DB_POOL_COUNTERS)
+
+# States of the cache circuit breakers, see CircuitBreaker
+BREAKER_STATES = (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN)
+# Counters of CircuitBreaker.snapshot(), with their help text
+BREAKER_COUNTERS = (
+    ("opened", "cache_circuit_opened_total", "Times the cache circuit breakers opened."),
+    ("failures_total", "cache_circuit_failures_total", "Failed calls to the caches guarded by the circuit breakers."),
+)
+
+# Snapshot holding the counters of the exited processes
+EXITED_SNAPSHOT = "metrics-exited.json"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# QueryCounters of the request being measured in the current context, outermost first
+_request_queries = ContextVar("request_queries", default=())
+
+
+def count_queries(execute, sql, params, many, context):
+    counters = _request_queries.get()
+    if not counters:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for counter in counters:
+            counter.record(sql, duration)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding count_queries to the execute
+    wrappers of every new connection.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+def start_request(record_sql=False):
+    """
+    Starts counting the queries of a request in the current context, along
+    with the counters already started, e.g. by QueryBudgetMiddleware.
+    Returns the counter and the token to pass to finish_request().
+    """
+    counter = QueryCounter(record_sql=record_sql)
+    return counter, _request_queries.set(_request_queries.get() + (counter,))
+
+
+def finish_request(token):
+    _request_queries.reset(token)
+
+
+class ViewMetrics:
+    """
+    Metrics of one view and method. Histogram buckets are kept per bucket
+    (not cumulated) and cumulated when rendered.
+    """
+
+    __slots__ = ("statuses", "latency", "latency_sum", "queries", "query_seconds", "sizes", "size_sum", "cache")
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.sizes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.cache = {}
+
+    def to_dict(self):
+        return {
+            "statuses": dict(self.statuses),
+            "latency": list(self.latency),
+            "latency_sum": self.latency_sum,
+            "queries": self.queries,
+            "query_seconds": self.query_seconds,
+            "sizes": list(self.sizes),
+            "size_sum": self.size_sum,
+            "cache": dict(self.cache),
+        }
+
+    def merge(self, data):
+        for status, count in data["statuses"].items():
+            # Status codes are strings once they went through a JSON snapshot
+            status = str(status)
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.latency = [a + b for a, b in zip(self.latency, data["latency"])]
+        self.latency_sum += data["latency_sum"]
+        self.queries += data["queries"]
+        self.query_seconds += data["query_seconds"]
+        self.sizes = [a + b for a, b in zip(self.sizes, data["sizes"])]
+        self.size_sum += data["size_sum"]
+        for result, count in data["cache"].items():
+            self.cache[result] = self.cache.get(result, 0) + count
+
+
+class MetricsRegistry:
+    """
+    Process-wide store of the ViewMetrics, keyed by (view, method).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._writer = None
+        # Whether snapshots are written, resolved on the first request
+        self._snapshots = None
+        if hasattr(os, "register_at_fork"):
+            # A forked worker starts from zero, and with a snapshot file of its own
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._writer = None
+        self._snapshots = None
+
+    def observe(self, view, method, status, duration, queries=0, query_seconds=0.0, size=None, cache=None):
+        latency_bucket = bisect_left(LATENCY_BUCKETS, duration)
+        size_bucket = bisect_left(SIZE_BUCKETS, size) if size is not None else None
+        with self._lock:
+            metrics = self._views.get((view, method))
+            if metrics is None:
+                metrics = self._views[(view, method)] = ViewMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency[latency_bucket] += 1
+            metrics.latency_sum += duration
+            metrics.queries += queries
+            metrics.query_seconds += query_seconds
+            if size_bucket is not None:
+                metrics.sizes[size_bucket] += 1
+                metrics.size_sum += size
+            if cache is not None:
+                metrics.cache[cache] = metrics.cache.get(cache, 0) + 1
+        if self._snapshots is None:
+            self._snapshots = bool(settings.METRICS_DIR)
+            if self._snapshots:
+                self._start_writer()
+
+    def snapshot(self):
+        """
+        Returns the metrics of this process as JSON-serializable data.
+        """
+        with self._lock:
+            views = [
+                {"view": view, "method": method, **metrics.to_dict()}
+                for (view, method), metrics in self._views.items()
+            ]
+        return {
+            "pid": os.getpid(), "written_at": time.time(),
+            "views": views, "cache_tiers": cache_tier_counts(), "db_pools": pool_stats(),
+            "cache_breakers": CircuitBreaker.snapshots(),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    # Multiprocess snapshots
+
+    def snapshot_path(self):
+        return os.path.join(settings.METRICS_DIR, f"metrics-{os.getpid()}.json")
+
+    def write_snapshot(self):
+        """
+        Atomically replaces the snapshot file of this process.
+        """
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=settings.METRICS_DIR, prefix=".metrics-", suffix=".tmp")
+        with os.fdopen(descriptor, "w") as snapshot:
+            json.dump(self.snapshot(), snapshot)
+        os.replace(temporary, self.snapshot_path())
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_periodically, name="metrics-snapshot", daemon=True)
+        self._writer.start()
+
+    def _write_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_SNAPSHOT_INTERVAL)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning("Could not write the metrics snapshot: %s", e)
+
+    def collect(self):
+        """
+        Returns the merged metrics of every process writing to METRICS_DIR,
+        or of this process alone without it.
+        """
+        if not settings.METRICS_DIR:
+            return [self.snapshot()]
+        self.write_snapshot()
+        self.fold_exited()
+        snapshots = []
+        for name in os.listdir(settings.METRICS_DIR):
+            if not (name.startswith("metrics-") and name.endswith(".json")):
+                continue
+            snapshot = _read_snapshot(os.path.join(settings.METRICS_DIR, name))
+            if snapshot is not None:
+                snapshot["live"] = _is_live(snapshot)
+                snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        return render(self.collect())
+
+    def fold_exited(self):
+        """
+        Adds the counters of the snapshots of exited processes to the
+        EXITED_SNAPSHOT rollup and deletes them. Their gauges, such as the
+        open database connections, are dropped.
+        """
+        directory = settings.METRICS_DIR
+        exited = [name for name, pid in _snapshot_pids(directory) if not _is_running(pid)]
+        if not exited:
+            return
+        # Scrapes served by several workers at once must not fold a snapshot twice
+        with open(os.path.join(directory, ".metrics.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            rollup_path = os.path.join(directory, EXITED_SNAPSHOT)
+            rollup = _read_snapshot(rollup_path) or {"pid": None, "views": [], "cache_tiers": {}, "db_pools": []}
+            folded = []
+            for name in exited:
+                snapshot = _read_snapshot(os.path.join(directory, name))
+                if snapshot is not None:
+                    rollup = fold_snapshot(rollup, snapshot)
+                    folded.append(name)
+            if not folded:
+                return
+            descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+            with os.fdopen(descriptor, "w") as snapshot:
+                json.dump(rollup, snapshot)
+            os.replace(temporary, rollup_path)
+            for name in folded:
+                try:
+                    os.unlink(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+
+def _snapshot_pids(directory):
+    # (file name, pid) of the per-process snapshots, the rollup excluded
+    for name in os.listdir(directory):
+        pid = name[len("metrics-"):-len(".json")] if name.startswith("metrics-") and name.endswith(".json") else ""
+        if pid.isdigit():
+            yield name, int(pid)
+
+
+def _is_running(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running as another user
+        return True
+    return True
+
+
+def _is_live(snapshot):
+    """
+    Whether the gauges of a snapshot describe a running process: the rollup
+    of the exited ones has none, and a snapshot that stopped being refreshed
+    belongs to a stuck process or to a reused pid.
+    """
+    if snapshot.get("pid") is None:
+        return False
+    max_age = 3 * settings.METRICS_SNAPSHOT_INTERVAL
+    return snapshot["pid"] == os.getpid() or time.time() - snapshot.get("written_at", 0) <= max_age
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as snapshot:
+            return json.load(snapshot)
+    except (OSError, ValueError):
+        # Missing, or replaced while being read
+        return None
+
+
+def fold_snapshot(rollup, snapshot):
+    """
+    Returns ``rollup`` with the counters of ``snapshot`` added to it.
+    """
+    views = {}
+    for data in rollup["views"] + snapshot["views"]:
+        views.setdefault((data["view"], data["method"]), ViewMetrics()).merge(data)
+
+    tiers = {tier: dict(counts) for tier, counts in rollup["cache_tiers"].items()}
+    for tier, counts in snapshot.get("cache_tiers", {}).items():
+        totals = tiers.setdefault(tier, {"hits": 0, "misses": 0})
+        totals["hits"] += counts["hits"]
+        totals["misses"] += counts["misses"]
+
+    pools = {(stats["alias"], stats["database"]): dict(stats) for stats in rollup["db_pools"]}
+    for stats in snapshot.get("db_pools", []):
+        totals = pools.setdefault(
+            (stats["alias"], stats["database"]),
+            {"alias": stats["alias"], "database": stats["database"], **dict.fromkeys(DB_POOL_STATS, 0)},
+        )
+        for name, _ in DB_POOL_COUNTERS:
+            totals[name] += stats[name]
+
+    breakers = {name: dict(counts) for name, counts in rollup.get("cache_breakers", {}).items()}
+    for name, counts in snapshot.get("cache_breakers", {}).items():
+        totals = breakers.setdefault(name, dict.fromkeys((counter for counter, _, _ in BREAKER_COUNTERS), 0))
+        for counter, _, _ in BREAKER_COUNTERS:
+            totals[counter] += counts.get(counter, 0)
+
+    return {
+        "pid": None,
+        "views": [{"view": view, "method": method, **metrics.to_dict()} for (view, method), metrics in views.items()],
+        "cache_tiers": tiers,
+        "db_pools": list(pools.values()),
+        "cache_breakers": breakers,
+    }
+
+
+def cache_tier_counts():
+    """
+    Hits and misses of the tiers of the default cache, when it is a
+    TwoTierCache.
+    """
+    backend = caches["default"]
+    if not hasattr(backend, "hit_ratios"):
+        return {}
+    return {
+        tier: {"hits": counts["hits"], "misses": counts["misses"]}
+        for tier, counts in backend.hit_ratios().items()
+    }
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+def _format_bound(bound):
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def _histogram(lines, name, labels, bounds, counts, total):
+    cumulated = 0
+    for bound, count in zip(bounds, counts):
+        cumulated += count
+        lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulated}')
+    cumulated += counts[-1]
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulated}')
+    lines.append(f"{name}_sum{{{labels}}} {total}")
+    lines.append(f"{name}_count{{{labels}}} {cumulated}")
+
+
+def render(snapshots):
+    """
+    Renders snapshots, summed up, in the Prometheus text exposition format.
+    """
+    views = {}
+    tiers = {}
+    pools = {}
+    breakers = {}
+    for snapshot in snapshots:
+        for data in snapshot["views"]:
+            key = (data["view"], data["method"])
+            views.setdefault(key, ViewMetrics()).merge(data)
+        for tier, counts in snapshot.get("cache_tiers", {}).items():
+            totals = tiers.setdefault(tier, {"hits": 0, "misses": 0})
+            totals["hits"] += counts["hits"]
+            totals["misses"] += counts["misses"]
+        for name, counts in snapshot.get("cache_breakers", {}).items():
+            totals = breakers.setdefault(name, dict.fromkeys((counter for counter, _, _ in BREAKER_COUNTERS), 0))
+            totals.setdefault("states", dict.fromkeys(BREAKER_STATES, 0))
+            if snapshot.get("live", True) and counts.get("state") in totals["states"]:
+                totals["states"][counts["state"]] += 1
+            for counter, _, _ in BREAKER_COUNTERS:
+                totals[counter] += counts.get(counter, 0)
+        # Gauges are only summed over live processes, counters over all of them
+        stats_names = DB_POOL_STATS if snapshot.get("live", True) else DB_POOL_STATS[len(DB_POOL_GAUGES):]
+        for stats in snapshot.get("db_pools", []):
+            totals = pools.setdefault((stats["alias"], stats["database"]), dict.fromkeys(DB_POOL_STATS, 0))
+            for name in stats_names:
+                totals[name] += stats[name]
+    views = sorted(views.items())
+
+    lines = [
+        "# HELP api_requests_total API requests per view, method and status code.",
+        "# TYPE api_requests_total counter",
+    ]
+    for (view, method), metrics in views:
+        for status, count in sorted(metrics.statuses.items(), key=lambda item: int(item[0])):
+            lines.append(f"api_requests_total{{{_labels(view=view, method=method, status=status)}}} {count}")
+
+    lines += [
+        "# HELP api_request_duration_seconds Time spent in the view, rendering included.",
+        "# TYPE api_request_duration_seconds histogram",
+    ]
+    for (view, method), metrics in views:
+        _histogram(lines, "api_request_duration_seconds", _labels(view=view, method=method), LATENCY_BUCKETS, metrics.latency, metrics.latency_sum)
+
+    lines += [
+        "# HELP api_db_queries_total SQL queries run by the view.",
+        "# TYPE api_db_queries_total counter",
+    ]
+    for (view, method), metrics in views:
+        lines.append(f"api_db_queries_total{{{_labels(view=view, method=method)}}} {metrics.queries}")
+
+    lines += [
+        "# HELP api_db_query_seconds_total Time spent in the SQL queries run by the view.",
+        "# TYPE api_db_query_seconds_total counter",
+    ]
+    for (view, method), metrics in views:
+        lines.append(f"api_db_query_seconds_total{{{_labels(view=view, method=method)}}} {metrics.query_seconds}")
+
+    lines += [
+        "# HELP api_response_cache_total Responses served by the response cache, per result (HIT, STALE or MISS).",
+        "# TYPE api_response_cache_total counter",
+    ]
+    for (view, method), metrics in views:
+        for result, count in sorted(metrics.cache.items()):
+            lines.append(f"api_response_cache_total{{{_labels(view=view, method=method, result=result.lower())}}} {count}")
+
+    lines += [
+        "# HELP api_response_size_bytes Size of the response bodies (streamed ones excluded).",
+        "# TYPE api_response_size_bytes histogram",
+    ]
+    for (view, method), metrics in views:
+        _histogram(lines, "api_response_size_bytes", _labels(view=view, method=method), SIZE_BUCKETS, metrics.sizes, metrics.size_sum)
+
+    if tiers:
+        lines += [
+            "# HELP cache_tier_requests_total Lookups of the default cache per tier and result.",
+            "# TYPE cache_tier_requests_total counter",
+        ]
+        for tier, counts in sorted(tiers.items()):
+            lines.append(f"cache_tier_requests_total{{{_labels(tier=tier, result='hit')}}} {counts['hits']}")
+            lines.append(f"cache_tier_requests_total{{{_labels(tier=tier, result='miss')}}} {counts['misses']}")
+
+    if breakers:
+        breakers = sorted(breakers.items())
+        lines += [
+            "# HELP cache_circuit_state Processes whose cache circuit breaker is in the state.",
+            "# TYPE cache_circuit_state gauge",
+        ]
+        for name, totals in breakers:
+            for state in BREAKER_STATES:
+                lines.append(f"cache_circuit_state{{{_labels(breaker=name, state=state)}}} {totals['states'][state]}")
+        for counter, metric, description in BREAKER_COUNTERS:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            for name, totals in breakers:
+                lines.append(f"{metric}{{{_labels(breaker=name)}}} {totals[counter]}")
+
+    if pools:
+        pools = sorted(pools.items(), key=lambda item: (item[0][0], str(item[0][1])))
+        lines += [
+            "# HELP db_pool_connections Open connections of the database pools, idle or checked out.",
+            "# TYPE db_pool_connections gauge",
+        ]
+        for (alias, database), stats in pools:
+            lines.append(f"db_pool_connections{{{_labels(alias=alias, database=database, state='idle')}}} {stats['idle']}")
+            lines.append(f"db_pool_connections{{{_labels(alias=alias, database=database, state='in_use')}}} {stats['in_use']}")
+        lines += [
+            "# HELP db_pool_max_connections Maximum size of the database pools.",
+            "# TYPE db_pool_max_connections gauge",
+        ]
+        for (alias, database), stats in pools:
+            lines.append(f"db_pool_max_connections{{{_labels(alias=alias, database=database)}}} {stats['max_size']}")
+        for name, description in DB_POOL_COUNTERS:
+            metric = f"db_pool_{name}_total"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+            for (alias, database), stats in pools:
+                lines.append(f"{metric}{{{_labels(alias=alias, database=database)}}} {stats[name]}")
+
+    return "\n".join(lines) + "\n"
+
+
+def track_response(view, method, response, started, queries, cache=None):
+    """
+    Records a response once it is rendered, so the latency and the size
+    include the rendering of DRF responses.
+    """
+    def record(rendered=None):
+        size = None if response.streaming else len(response.content)
+        registry.observe(
+            view, method, response.status_code, time.perf_counter() - started,
+            queries=queries.count, query_seconds=queries.duration, size=size, cache=cache,
+        )
+
+    if getattr(response, "is_rendered", True):
+        record()
+    else:
+        response.add_post_render_callback(record)
+
+
+registry = MetricsRegistry()
@@ -1,15 +1,20 @@
 import traceback
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils.deprecation import MiddlewareMixin
-from .models import ErrorLog
+from .errorlog import error_log_buffer
 from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 from rest_framework import status
 from django.http import JsonResponse
 from django.conf import settings
+from . import metrics
+from .query_budget import QueryBudgetExceeded, format_budget_error, get_view_query_budget
+import logging
+
+logger = logging.getLogger(__name__)
 
 class LogErrorsMiddleware(MiddlewareMixin):
     def process_exception(self, request, exception):
-        print('exception', exception)
         error_message = exception.__str__()
         error_type = type(exception).__name__
         status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -17,11 +22,12 @@ class LogErrorsMiddleware(MiddlewareMixin):
         if isinstance(exception, APIException):
             status_code = exception.status_code
 
-        ErrorLog.objects.create(
-            error_message=error_message,
-            error_type=error_type,
-            status_code=status_code,
-        )
+        # Buffered and written to ErrorLog in the background, see api/core/errorlog.py
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match is not None else ""
+        if error_log_buffer.record(error_type, error_message, status_code, view_name):
+            # The traceback is logged once per error and flush, not once per request
+            logger.error("%s in %s: %s", error_type, view_name or request.path, error_message, exc_info=exception)
         # If it is DEBUG mode, return the exception. If not return a generic error message
         if settings.DEBUG:
             response_data = {
@@ -37,4 +43,57 @@ class LogErrorsMiddleware(MiddlewareMixin):
             "message": "An unexpected error occurred. Please try again later.",
              }
             return JsonResponse(response_data, status=status_code)
-      
\ No newline at end of file
+
+
+class QueryBudgetMiddleware:
+    """
+    Debug middleware enforcing the ``query_budget`` declared by API views.
+
+    Counts every SQL query of the request and, when the view declares a budget
+    for the request method, logs the offending queries once it is exceeded
+    (or raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is enabled).
+    The query count is always reported in the ``X-Query-Count`` header.
+
+    Queries are counted like the request metrics (see api/core/metrics.py),
+    so the ones async views run in sync_to_async threads are counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter, token = metrics.start_request(record_sql=True)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.check_budget(request, response, counter)
+
+    async def __acall__(self, request):
+        counter, token = metrics.start_request(record_sql=True)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.check_budget(request, response, counter)
+
+    def check_budget(self, request, response, counter):
+        response["X-Query-Count"] = str(counter.count)
+        budget = getattr(request, "_query_budget", None)
+        if budget is not None and counter.count > budget:
+            message = format_budget_error(f"{request.method} {request.path}", budget, counter)
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        request._query_budget = get_view_query_budget(view_class, request.method)
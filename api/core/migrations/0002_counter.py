@@ -0,0 +1,56 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Counted models, keyed by the counter names registered in api/blog/signals.py
+COUNTED_MODELS = {
+    "blog.blog": ("blog", "Blog"),
+    "blog.category": ("blog", "Category"),
+}
+
+
+def seed_counters(apps, schema_editor):
+    Counter = apps.get_model("core", "Counter")
+    for name, (app_label, model_name) in COUNTED_MODELS.items():
+        model = apps.get_model(app_label, model_name)
+        # Every shard exists up front, so an increment is always a single UPDATE
+        Counter.objects.bulk_create(
+            Counter(name=name, shard=shard, value=model._base_manager.count() if shard == 0 else 0)
+            for shard in range(settings.COUNTER_SHARDS)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        ("blog", "0005_blog_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Counter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("shard", models.PositiveSmallIntegerField(default=0)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="counter",
+            constraint=models.UniqueConstraint(
+                fields=("name", "shard"), name="core_counter_name_shard_uniq"
+            ),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:40
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_last_seen(apps, schema_editor):
+    # Rows logged before were single occurrences
+    ErrorLog = apps.get_model("core", "ErrorLog")
+    ErrorLog.objects.update(last_seen=F("timestamp"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_counter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="errorlog",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=40),
+        ),
+        migrations.AddField(
+            model_name="errorlog",
+            name="last_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="errorlog",
+            name="occurrences",
+            field=models.PositiveBigIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="errorlog",
+            name="view_name",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="errorlog",
+            name="window_start",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="errorlog",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_seen, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="errorlog",
+            constraint=models.UniqueConstraint(
+                fields=("fingerprint", "window_start"),
+                name="core_errorlog_fingerprint_window_uniq",
+            ),
+        ),
+    ]
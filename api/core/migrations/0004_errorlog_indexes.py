@@ -0,0 +1,51 @@
+# Generated by Django 5.0.7 on 2026-10-18 19:42
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    Builds the index without blocking writes to the (large) error log on
+    PostgreSQL, with a plain CREATE INDEX on the other databases.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0003_errorlog_fingerprint"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="errorlog",
+            index=models.Index(
+                fields=["timestamp"],
+                include=("error_type", "status_code", "occurrences"),
+                name="core_errorlog_timestamp_idx",
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="errorlog",
+            index=models.Index(
+                fields=["error_type", "status_code"],
+                name="core_errorlog_type_status_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,13 @@
+import hashlib
+from django.core.exceptions import FieldDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
+from api.core.streaming import JSON_CONTENT_TYPE, NDJSON_CONTENT_TYPE, stream_json, stream_ndjson
+from api.core.caching import normalized_query_string
+from api.core.versioning import aget_versions, get_versions
 
 class APIViewResponseMixin:
     """
@@ -9,8 +17,63 @@ class APIViewResponseMixin:
     SUCCESS = "success"
     FAILURE = "failure"
 
+    # Version namespaces (see api/core/versioning.py) the GET responses are
+    # derived from. Declaring them enables ETag/Last-Modified validation.
+    conditional_namespaces = ()
+
+    def get_conditional_validators(self, request):
+        """
+        Returns the (etag, last_modified) validators of a GET request, or None
+        when the view does not opt in to conditional requests
+        """
+        if not self.conditional_namespaces:
+            return None
+        return self.make_conditional_validators(request, get_versions(self.conditional_namespaces))
+
+    async def aget_conditional_validators(self, request):
+        """
+        get_conditional_validators for async views
+        """
+        if not self.conditional_namespaces:
+            return None
+        return self.make_conditional_validators(request, await aget_versions(self.conditional_namespaces))
+
+    def make_conditional_validators(self, request, versions):
+        # Kept on the view so response caches can key on the same versions
+        self.namespace_versions = versions
+        params = normalized_query_string(request.query_params)
+        fingerprint = "|".join(
+            [type(self).__name__, params]
+            + [f"{namespace}:{versions[namespace]}" for namespace in sorted(versions)]
+            + [str(part) for part in self.get_conditional_fingerprint(request)]
+        )
+        etag = 'W/"%s"' % hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+        # Versions are whole seconds in microseconds (see api/core/versioning.py)
+        last_modified = -(-max(versions.values()) // 1_000_000)
+        return etag, last_modified
+
+    def get_conditional_fingerprint(self, request):
+        """
+        Returns what the response depends on besides the query parameters
+        and the namespace versions, e.g. the current time window
+        """
+        return ()
+
+    @classmethod
+    def set_conditional_headers(cls, response, etag, last_modified):
+        """
+        Sets the validators clients send back in If-None-Match/If-Modified-Since
+        """
+        if etag and not response.has_header("ETag"):
+            response["ETag"] = etag
+        if last_modified is not None and not response.has_header("Last-Modified"):
+            response["Last-Modified"] = http_date(last_modified)
+        # Clients may keep the response but have to revalidate it before use
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     @classmethod
-    def success_response(cls, data=None, message=None, status_code=status.HTTP_200_OK):
+    def success_response(cls, data=None, message=None, status_code=status.HTTP_200_OK, pagination=None):
         """
         Returns Success Response
         """
@@ -22,6 +85,8 @@ class APIViewResponseMixin:
             response_data["message"] = message
         if data is not None:
             response_data["data"] = data
+        if pagination is not None:
+            response_data["pagination"] = pagination
         return Response(response_data, status=status_code)
 
     @classmethod
@@ -37,4 +102,148 @@ class APIViewResponseMixin:
             response_data["message"] = message
         if data is not None:
             response_data["data"] = data
-        return Response(response_data, status=status_code)
\ No newline at end of file
+        return Response(response_data, status=status_code)
+
+    @classmethod
+    def streaming_success_response(cls, objects, serializer, message=None, output="json", status_code=status.HTTP_200_OK):
+        """
+        Returns Success Response streamed row by row, as JSON or NDJSON
+        """
+        envelope = {
+          "status_code": status_code,
+          "status": cls.SUCCESS
+        }
+        if message is not None:
+            envelope["message"] = message
+        if output == "ndjson":
+            content, content_type = stream_ndjson(objects, serializer, envelope), NDJSON_CONTENT_TYPE
+        else:
+            content, content_type = stream_json(objects, serializer, envelope), JSON_CONTENT_TYPE
+        return StreamingHttpResponse(content, content_type=content_type, status=status_code)
+
+
+class EagerLoadingMixin:
+    """
+    Mixin for model serializers to shape querysets from the declared relations
+    """
+
+    @classmethod
+    def get_eager_loading(cls, fields=None):
+        """
+        Returns the (select_related, prefetch_related) lookups needed to
+        represent instances without one query per row and relation,
+        optionally restricted to a subset of the serializer fields.
+        """
+        serializer = cls()
+        return _collect_relations(serializer, serializer.Meta.model, names=fields)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Applies select_related/prefetch_related to the queryset
+        """
+        select, prefetch = cls.get_eager_loading(fields)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for model serializers to render only a subset of their fields
+    (``?fields=`` / ``?exclude=``) and to read only the matching columns
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_fieldset(cls, fields=None, exclude=None):
+        """
+        Resolves comma separated ``fields``/``exclude`` parameters into the
+        list of serializer fields to render, or None for all of them.
+        Raises ValidationError on unknown field names.
+        """
+        if not fields and not exclude:
+            return None
+        available = [name for name, field in cls().fields.items() if not field.write_only]
+        errors = {}
+        selected = available
+        for param, value in (("fields", fields), ("exclude", exclude)):
+            names = [name.strip() for name in (value or "").split(",") if name.strip()]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(available)}."
+            elif names and param == "fields":
+                selected = [name for name in selected if name in names]
+            elif names:
+                selected = [name for name in selected if name not in names]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return selected
+
+    @classmethod
+    def defer_unused_columns(cls, queryset, fields, required=()):
+        """
+        Restricts the columns read by the queryset to the ones backing the
+        selected fields, plus the ``required`` ones (e.g. the ordering).
+        """
+        if fields is None:
+            return queryset
+        model = queryset.model
+        serializer_fields = cls().fields
+        columns = {model._meta.pk.name}
+        for name in list(fields) + [name.lstrip("-") for name in required]:
+            field = serializer_fields.get(name)
+            if field is not None:
+                if field.source == "*":
+                    # The whole instance is needed to render this field
+                    return queryset
+                name = field.source_attrs[0]
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations and properties are not columns
+                continue
+            if model_field.concrete:
+                columns.add(model_field.name)
+        return queryset.only(*columns)
+
+
+def _collect_relations(serializer, model, prefix="", names=None):
+    select, prefetch = [], []
+    for field_name, field in serializer.fields.items():
+        if names is not None and field_name not in names:
+            continue
+        if field.write_only or field.source == "*":
+            continue
+        # Only the first attribute of a dotted source can be a relation of this model
+        name = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        path = prefix + name
+        is_single = (model_field.many_to_one or model_field.one_to_one) and not model_field.auto_created
+        if isinstance(field, serializers.ManyRelatedField) or isinstance(field, serializers.ListSerializer):
+            prefetch.append(path)
+        elif isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization() and len(field.source_attrs) == 1:
+            # Represented by the local foreign key column alone
+            continue
+        elif is_single:
+            select.append(path)
+            if isinstance(field, serializers.Serializer):
+                nested_select, nested_prefetch = _collect_relations(field, model_field.related_model, path + "__")
+                select.extend(nested_select)
+                prefetch.extend(nested_prefetch)
+        else:
+            prefetch.append(path)
+    return select, prefetch
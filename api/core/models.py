@@ -1,10 +1,53 @@
 from django.db import models
+from django.utils import timezone
 
 class ErrorLog(models.Model):
+    """
+    Occurrences of one error, identified by its fingerprint (type, message
+    template and view), within a window of ERROR_LOG_WINDOW seconds. Rows
+    are written in the background by api/core/errorlog.py.
+    """
     error_message = models.TextField()
     error_type = models.CharField(max_length=255)
     status_code = models.IntegerField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # First and last occurrence within the window
+    timestamp = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+    occurrences = models.PositiveBigIntegerField(default=1)
+    view_name = models.CharField(max_length=255, blank=True, default='')
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+    window_start = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'window_start'], name='core_errorlog_fingerprint_window_uniq'),
+        ]
+        indexes = [
+            # Retention and the aggregated error counts; on PostgreSQL the included
+            # columns let the counts, which only read them and COUNT(*), be read
+            # with an index-only scan
+            models.Index(fields=['timestamp'], include=['error_type', 'status_code', 'occurrences'], name='core_errorlog_timestamp_idx'),
+            models.Index(fields=['error_type', 'status_code'], name='core_errorlog_type_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.error_type} - {self.status_code}"
+
+
+class Counter(models.Model):
+    """
+    Shard of a row counter maintained in the same transaction as the rows it
+    counts, see api/core/counters.py. A counter is the sum of its shards, so
+    concurrent writers rarely wait on the same row lock.
+    """
+    name = models.CharField(max_length=100)
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'shard'], name='core_counter_name_shard_uniq'),
+        ]
 
     def __str__(self):
-        return f"{self.error_type} - {self.status_code}"
\ No newline at end of file
+        return f"{self.name}[{self.shard}] = {self.value}"
@@ -0,0 +1,152 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+
+class KeysetPagination:
+    """
+    Keyset (a.k.a. seek) pagination over a fixed, unique ordering.
+
+    Unlike offset pagination, every page is fetched with a
+    ``WHERE (ordering) > (cursor)`` predicate that can be served straight from
+    an index, so page N costs the same as page 1 and no ``COUNT(*)`` is ever
+    issued. Cursors are opaque, url-safe base64 tokens.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = api_settings.PAGE_SIZE or 10
+    max_page_size = 100
+
+    def __init__(self, ordering, page_size=None, max_page_size=None):
+        # The last ordering field must be unique (e.g. the primary key) so the
+        # ordering is total and no row is ever skipped or repeated.
+        self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Returns the list of objects for the page described by the request.
+        """
+        queryset, page_size, cursor = self._page_queryset(queryset, request)
+        return self._paginate(list(queryset), page_size, cursor)
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        paginate_queryset for async views.
+        """
+        queryset, page_size, cursor = self._page_queryset(queryset, request)
+        # Fetched and prefetched in one go, aiterator() would open a server-side cursor for a single page
+        return self._paginate([obj async for obj in queryset], page_size, cursor)
+
+    def _page_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        reverse = False
+        if cursor is not None:
+            reverse, values = cursor
+            queryset = queryset.filter(self._seek_filter(values, reverse))
+
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        # Fetch a single extra row to find out whether there is another page
+        return queryset.order_by(*ordering)[:page_size + 1], page_size, cursor
+
+    def _paginate(self, results, page_size, cursor):
+        reverse = cursor is not None and cursor[0]
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = has_more if not reverse else cursor is not None
+        has_previous = cursor is not None if not reverse else has_more
+
+        self.next_cursor = self.encode_cursor(results[-1], reverse=False) if results and has_next else None
+        self.previous_cursor = self.encode_cursor(results[0], reverse=True) if results and has_previous else None
+        return results
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is None:
+            return self.page_size
+        try:
+            page_size = int(page_size)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "A valid integer is required."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Ensure this value is greater than or equal to 1."})
+        return min(page_size, self.max_page_size)
+
+    def get_pagination_data(self):
+        return {
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
+        }
+
+    def encode_cursor(self, instance, reverse):
+        values = [self._field_value(instance, field) for field in self.ordering]
+        payload = json.dumps({"r": int(reverse), "v": values}, separators=(",", ":"), default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload["v"]
+            if len(values) != len(self.ordering):
+                raise ValueError("cursor does not match the ordering")
+            values = [self._to_python(model, field, value) for field, value in zip(self.ordering, values)]
+            return bool(payload["r"]), values
+        except Exception:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+
+    def _field_value(self, instance, field):
+        value = getattr(instance, field.lstrip("-"))
+        return value.isoformat() if hasattr(value, "isoformat") else value
+
+    def _to_python(self, model, field, value):
+        try:
+            return model._meta.get_field(field.lstrip("-")).to_python(value)
+        except FieldDoesNotExist:
+            # Annotations (e.g. a search rank) round-trip through JSON as is
+            return value
+
+    def _reversed_ordering(self):
+        return tuple(field[1:] if field.startswith("-") else "-" + field for field in self.ordering)
+
+    def _seek_filter(self, values, reverse):
+        """
+        Builds the row-value comparison ``(a, b, c) > (x, y, z)`` as
+        ``a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)``
+        honouring the direction of every ordering field.
+
+        The OR gives the planner no bound on the leading column, so a
+        redundant ``a <= x`` (``a >= x`` ascending) is ANDed to it: the index
+        scan then starts at the cursor instead of filtering out every row
+        before it.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        leading = self.ordering[0]
+        descending = leading.startswith("-") != reverse
+        bound = Q(**{f"{leading.lstrip('-')}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & condition
@@ -0,0 +1,226 @@
+"""
+On-demand profiling of single API requests.
+
+With PROFILING_ENABLED, BaseAPIView.dispatch profiles a request when it
+carries a valid signed ``X-Profile-Request`` header (see sign_request and
+the sign_profile_request command), or at random with probability
+PROFILING_SAMPLE_RATE. A profiled request is run, and rendered, under
+cProfile and tracemalloc; its report (the most expensive functions, the
+tracemalloc peak and the largest allocations still alive at the end of the
+request) is written as JSON to PROFILING_DIR, which keeps only the latest
+PROFILING_MAX_PROFILES of them. Administrators list and read them at
+/core/profiles/.
+
+Requests that are not profiled only pay for a header lookup and, when
+sampling, one random number. tracemalloc traces the whole process, so a
+process profiles one request at a time: requests triggered while another
+one is profiled run normally.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HEADER = "HTTP_X_PROFILE_REQUEST"
+SALT = "api.core.profiling"
+# Profile ids double as file names, anything else is rejected
+PROFILE_ID = re.compile(r"^[0-9]+-[0-9]+$")
+
+_capture_lock = threading.Lock()
+
+# Copies of PROFILING_ENABLED and PROFILING_SAMPLE_RATE, read on every request:
+# an attribute of django.conf.settings costs almost a microsecond
+enabled = False
+sample_rate = 0.0
+
+
+def load_settings(setting=None, **kwargs):
+    """
+    Refreshes the copies of the settings read on every request. Called when
+    the app is ready and connected to ``setting_changed``.
+    """
+    global enabled, sample_rate
+    if setting is None or setting.startswith("PROFILING_"):
+        enabled = settings.PROFILING_ENABLED
+        sample_rate = settings.PROFILING_SAMPLE_RATE
+
+
+def sign_request(path):
+    """
+    Returns the ``X-Profile-Request`` header value which triggers the
+    profiling of the requests to ``path``, valid for
+    PROFILING_SIGNATURE_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=SALT).sign(path)
+
+
+def is_requested(request):
+    """
+    Tells whether the request should be profiled: it carries a valid signed
+    header for its path, or it is sampled.
+    """
+    value = request.META.get(HEADER)
+    if value is not None:
+        try:
+            path = signing.TimestampSigner(salt=SALT).unsign(value, max_age=settings.PROFILING_SIGNATURE_MAX_AGE)
+        except signing.BadSignature:
+            return False
+        return path == request.path
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def profile_request(view, dispatch, request, *args, **kwargs):
+    """
+    Runs ``dispatch`` and renders its response under cProfile and tracemalloc,
+    then stores the profile. Falls back to a plain dispatch when the process
+    is already profiling another request or another profiler is active.
+    """
+    if not _capture_lock.acquire(blocking=False):
+        return dispatch(request, *args, **kwargs)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool is already active
+            return dispatch(request, *args, **kwargs)
+        profiler.disable()
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        status_code = 500
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = dispatch(request, *args, **kwargs)
+            # Rendering is usually where serialization happens
+            if not getattr(response, "is_rendered", True):
+                response.render()
+            status_code = response.status_code
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            allocations = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            if started_tracing:
+                tracemalloc.stop()
+            profile = build_profile(
+                view, request, status_code, duration, profiler,
+                peak=max(peak - baseline, 0), allocations=allocations,
+            )
+            try:
+                profile_store.save(profile)
+            except OSError as e:
+                logger.warning("Could not store the profile of %s %s: %s", request.method, request.path, e)
+        return response
+    finally:
+        _capture_lock.release()
+
+
+def build_profile(view, request, status_code, duration, profiler, peak, allocations):
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILING_TOP_FUNCTIONS)
+    top = allocations.statistics("lineno")[:settings.PROFILING_TOP_ALLOCATIONS]
+    return {
+        "view": type(view).__name__,
+        "method": request.method,
+        "path": request.path,
+        "status_code": status_code,
+        "created": timezone.now().isoformat(),
+        "duration": duration,
+        "pid": os.getpid(),
+        "calls": stats.total_calls,
+        "memory": {
+            "peak": peak,
+            "top_allocations": [
+                {"location": str(statistic.traceback[0]), "size": statistic.size, "count": statistic.count}
+                for statistic in top
+            ],
+        },
+        "report": report.getvalue(),
+    }
+
+
+class ProfileStore:
+    """
+    Bounded on-disk ring of request profiles, shared by the processes of a
+    host. Each profile is one JSON file named after its id, which sorts by
+    creation time; saving a profile deletes the oldest beyond
+    PROFILING_MAX_PROFILES.
+    """
+
+    def path(self, profile_id):
+        return os.path.join(settings.PROFILING_DIR, f"{profile_id}.json")
+
+    def ids(self):
+        try:
+            names = os.listdir(settings.PROFILING_DIR)
+        except FileNotFoundError:
+            return []
+        ids = [name[:-5] for name in names if name.endswith(".json") and PROFILE_ID.match(name[:-5])]
+        # Newest first
+        return sorted(ids, key=lambda profile_id: tuple(map(int, profile_id.split("-"))), reverse=True)
+
+    def save(self, profile):
+        profile_id = f"{time.time_ns()}-{os.getpid()}"
+        profile = {"id": profile_id, **profile}
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=settings.PROFILING_DIR, prefix=".profile-", suffix=".tmp")
+        with os.fdopen(descriptor, "w") as output:
+            json.dump(profile, output)
+        os.replace(temporary, self.path(profile_id))
+        for expired in self.ids()[settings.PROFILING_MAX_PROFILES:]:
+            try:
+                os.remove(self.path(expired))
+            except FileNotFoundError:
+                # Removed by another process meanwhile
+                pass
+        return profile_id
+
+    def get(self, profile_id):
+        """
+        Returns the profile, or None if it does not exist (anymore).
+        """
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self.path(profile_id)) as profile:
+                return json.load(profile)
+        except FileNotFoundError:
+            return None
+
+    def list(self):
+        """
+        Returns the profiles, newest first, without their reports.
+        """
+        profiles = []
+        for profile_id in self.ids():
+            profile = self.get(profile_id)
+            if profile is not None:
+                profile.pop("report", None)
+                profile["memory"].pop("top_allocations", None)
+                profiles.append(profile)
+        return profiles
+
+
+profile_store = ProfileStore()
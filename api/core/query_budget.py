@@ -0,0 +1,69 @@
+import logging
+import time
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a block of code runs more SQL queries than it declared.
+    """
+
+
+class QueryCounter:
+    """
+    ``connection.execute_wrapper`` callable that counts the executed queries.
+    """
+
+    def __init__(self, record_sql=True):
+        self.count = 0
+        self.duration = 0.0
+        self.record_sql = record_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+        if self.record_sql:
+            self.queries.append(sql)
+
+
+def format_budget_error(label, budget, counter):
+    queries = "\n".join(f"  {index}. {sql}" for index, sql in enumerate(counter.queries, start=1))
+    return f"{label} ran {counter.count} queries, over its budget of {budget}:\n{queries}"
+
+
+@contextmanager
+def query_budget(budget, label="Block", using=DEFAULT_DB_ALIAS):
+    """
+    Fails with QueryBudgetExceeded when the wrapped block runs more than
+    ``budget`` SQL queries.
+
+    Usage:
+        with query_budget(2, label="BlogView.get"):
+            client.get("/blog/")
+    """
+    counter = QueryCounter()
+    with connections[using].execute_wrapper(counter):
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(format_budget_error(label, budget, counter))
+
+
+def get_view_query_budget(view_class, method):
+    """
+    Returns the query budget a view declares for an HTTP method, if any.
+
+    Views declare their budgets as ``query_budget = {"GET": 2}``.
+    """
+    budgets = getattr(view_class, "query_budget", None) or {}
+    return budgets.get(method.upper())
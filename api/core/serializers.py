@@ -0,0 +1,47 @@
+from datetime import timedelta
+from rest_framework import serializers
+from django.utils import timezone
+from api.blog.rollups import GRANULARITIES, floor_period
+
+
+class TimeRangeQuerySerializer(serializers.Serializer):
+    """
+    Base of the query parameters selecting a time range split into periods,
+    the field named ``period_field`` holding one of GRANULARITIES. The range
+    is widened to whole periods; ``end`` is exclusive and defaults to now.
+    """
+    # Name of the field holding the period, declared by subclasses
+    period_field = 'granularity'
+    # Longest range per period, in days, which bounds the rows read
+    MAX_RANGE_DAYS = {'hour': 31, 'day': 366}
+    # Range covered when no start is given
+    DEFAULT_RANGE = {'hour': timedelta(days=1), 'day': timedelta(days=30)}
+
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        period = attrs[self.period_field]
+        end = attrs.get('end') or timezone.now()
+        start = attrs.get('start') or end - self.DEFAULT_RANGE[period]
+        start = floor_period(start, period)
+        end_period = floor_period(end, period)
+        end = end_period if end_period == end else end_period + GRANULARITIES[period]
+
+        if start >= end:
+            raise serializers.ValidationError({'start': "Must be before end."})
+        if end - start > timedelta(days=self.MAX_RANGE_DAYS[period]):
+            raise serializers.ValidationError({'start': f"The range can span at most {self.MAX_RANGE_DAYS[period]} days with the {period} {self.period_field}."})
+        attrs.update(start=start, end=end)
+        return attrs
+
+
+class ErrorLogQuerySerializer(TimeRangeQuerySerializer):
+    """
+    Query parameters of the error counts endpoint, over a range of buckets.
+    """
+    period_field = 'bucket'
+
+    bucket = serializers.ChoiceField(choices=list(GRANULARITIES), default='hour')
+    error_type = serializers.CharField(required=False, max_length=255)
+    status_code = serializers.IntegerField(required=False, min_value=100, max_value=599)
@@ -1,17 +1,326 @@
+import logging
+import os
+import threading
+from datetime import timezone as dt_timezone
+from django.conf import settings
 from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+from api.blog import rollups
+from api.blog.imaging import render_variants
 from api.blog.models import Blog, Category
 from api.blog.serializers import BlogSerializer, CategorySerializer
-from rest_framework import status
+from api.blog.signals import BLOG_COUNTER, BLOG_NAMESPACE, CATEGORY_COUNTER, blogs_bulk_created, bump_namespace
+from api.core.counters import aget_counts, get_counts
+from api.core.models import ErrorLog
+from api.core.workers import BoundedProcessPool
+from rest_framework import serializers, status
+
+logger = logging.getLogger(__name__)
 
 
 class StatsService:
     @staticmethod
-    def get_stats():
-        # Service example
-        total_blogs = Blog.objects.count()
-        total_categories = Category.objects.count()
-        
+    def get_stats(query=None):
+        """
+        Returns the totals and, given the validated parameters of a
+        StatsQuerySerializer, the top categories and authors and the blogs
+        created per period. Everything is read from maintained counters and
+        rollups (api/blog/rollups.py), so the cost does not grow with the
+        number of blogs.
+        """
+        # Maintained row counters (one query) instead of a COUNT(*) per table
+        counts = get_counts([BLOG_COUNTER, CATEGORY_COUNTER])
+        if query is None:
+            return StatsService.build_stats(counts)
+        return StatsService.build_stats(counts, query, {
+            "top_categories": rollups.top_categories(query["top"]),
+            "top_authors": rollups.top_authors(query["top"]),
+            "series": rollups.activity(query["start"], query["end"], query["granularity"]),
+        })
+
+    @staticmethod
+    async def aget_stats(query=None):
+        """
+        get_stats for async views, with the same queries.
+        """
+        counts = await aget_counts([BLOG_COUNTER, CATEGORY_COUNTER])
+        if query is None:
+            return StatsService.build_stats(counts)
+        return StatsService.build_stats(counts, query, {
+            "top_categories": await rollups.atop_categories(query["top"]),
+            "top_authors": await rollups.atop_authors(query["top"]),
+            "series": await rollups.aactivity(query["start"], query["end"], query["granularity"]),
+        })
+
+    @staticmethod
+    def build_stats(counts, query=None, rollup=None):
+        stats = {
+            "total_blogs": counts[BLOG_COUNTER],
+            "total_categories": counts[CATEGORY_COUNTER],
+        }
+        if query is None:
+            return stats
+        stats.update({
+            "top_categories": rollup["top_categories"],
+            "top_authors": rollup["top_authors"],
+            "activity": {
+                "granularity": query["granularity"],
+                "start": query["start"],
+                "end": query["end"],
+                "series": rollup["series"],
+            },
+        })
+        return stats
+
+
+class BlogBulkCreateService:
+    """
+    Validates and inserts many blogs at once for a single author.
+
+    Every category name is resolved with one query, items are validated one
+    by one so each gets its own errors, and the valid ones are written with
+    ``bulk_create`` in batches of BLOG_BULK_BATCH_SIZE inside a transaction.
+    """
+
+    @staticmethod
+    def create(items, user, batch_size=None):
+        """
+        Returns the created blogs and the errors of the rejected items as
+        ``[{"index": ..., "errors": {...}}]``.
+        """
+        batch_size = batch_size or settings.BLOG_BULK_BATCH_SIZE
+        names = {item.get('category') for item in items if isinstance(item, dict) and isinstance(item.get('category'), str)}
+        categories = {}
+        # Oldest first so duplicated names resolve like Category.objects.get would pick the first one
+        for category in Category.objects.filter(name__in=names).order_by('created_at'):
+            categories.setdefault(category.name, category)
+
+        serializer = BlogSerializer(many=True, context={'categories': categories, 'authors': {user.id: user}})
+        blogs, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({"index": index, "errors": {"non_field_errors": ["Expected an object."]}})
+                continue
+            if str(item.get('author')) != str(user.id):
+                errors.append({"index": index, "errors": {"author": ["You are not authorized to create a blog for another author."]}})
+                continue
+            try:
+                attrs = serializer.child.run_validation(item)
+            except serializers.ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+                continue
+            blogs.append(Blog(**attrs))
+
+        if blogs:
+            with transaction.atomic():
+                Blog.objects.bulk_create(blogs, batch_size=batch_size)
+                # bulk_create does not send post_save, notify the listeners once for the whole batch
+                blogs_bulk_created.send(sender=Blog, instances=blogs)
+        return blogs, errors
+
+
+class BlogImageService:
+    """
+    Renders the resized, metadata-free variants of blog images (see
+    api/blog/imaging.py) and records them with the dimensions and size of
+    the upload on the blog.
+
+    Rendering runs in a bounded pool of IMAGE_PROCESSING_WORKERS processes
+    once the blog is committed, so requests never wait for Pillow. Uploads
+    arriving while the pool is saturated keep their original only, until the
+    process_blog_images command renders them.
+    """
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = BoundedProcessPool(settings.IMAGE_PROCESSING_WORKERS, settings.IMAGE_PROCESSING_MAX_PENDING)
+            return cls._pool
+
+    @staticmethod
+    def image_storage():
+        return Blog._meta.get_field('image').storage
+
+    @staticmethod
+    def needs_processing(blog):
+        return bool(blog.image) and blog.image_variants.get('source') != blog.image.name
+
+    @classmethod
+    def schedule(cls, blog):
+        """
+        Renders the variants of the blog's image after the current
+        transaction commits, unless they are already up to date.
+        """
+        if cls.needs_processing(blog):
+            pk, name = blog.pk, blog.image.name
+            transaction.on_commit(lambda: cls.submit(pk, name))
+
+    @classmethod
+    def submit(cls, pk, name):
+        """
+        Hands the image to the worker pool, or renders it right away when
+        IMAGE_PROCESSING_WORKERS is 0. Returns the Future of the rendering,
+        or None when it was not queued.
+        """
+        if cls.reuse(pk, name):
+            return None
+        if not settings.IMAGE_PROCESSING_WORKERS:
+            cls.process(pk, name)
+            return None
+        with cls.image_storage().open(name, 'rb') as image:
+            data = image.read()
+        future = cls.get_pool().submit(render_variants, data, settings.BLOG_IMAGE_VARIANTS, settings.BLOG_IMAGE_QUALITY)
+        if future is None:
+            logger.warning("Image pool saturated, %s left for process_blog_images", name)
+            return None
+        future.add_done_callback(lambda rendered: cls._store_rendered(pk, name, len(data), rendered))
+        return future
+
+    @classmethod
+    def _store_rendered(cls, pk, name, size, future):
+        # Runs in the result thread of the pool, which has database connections of its own
+        try:
+            cls.store(pk, name, size, future.result())
+        except Exception:
+            logger.exception("Could not process the image %s of blog %s", name, pk)
+        finally:
+            close_old_connections()
+
+    @classmethod
+    def process(cls, pk, name):
+        """
+        Renders and stores the variants of an image in the calling process.
+        """
+        with cls.image_storage().open(name, 'rb') as image:
+            data = image.read()
+        result = render_variants(data, settings.BLOG_IMAGE_VARIANTS, settings.BLOG_IMAGE_QUALITY)
+        return cls.store(pk, name, len(data), result)
+
+    @classmethod
+    def reuse(cls, pk, name):
+        """
+        Copies the variants of another blog with the same image, which
+        content-addressed storage makes a common case for reposted images.
+        Returns whether there were any.
+        """
+        processed = (
+            Blog.objects.filter(image=name, image_variants__source=name)
+            .exclude(pk=pk)
+            .values('image_width', 'image_height', 'image_size', 'image_variants')
+            .first()
+        )
+        if processed is None:
+            return False
+        with transaction.atomic():
+            updated = Blog.objects.filter(pk=pk, image=name).update(**processed)
+            if updated:
+                bump_namespace(BLOG_NAMESPACE)
+        return True
+
+    @classmethod
+    def store(cls, pk, name, size, result):
+        """
+        Saves the rendered variants next to the image and records them on the
+        blog, provided it still has this image. Returns whether it did.
+        """
+        stem = os.path.splitext(os.path.basename(name))[0]
+        directory = os.path.join(os.path.dirname(name), 'variants')
+        saved = []
+        variants = {}
+        for variant_name, variant in result['variants'].items():
+            path = os.path.join(directory, f"{stem}_{variant_name}")
+            content_name = default_storage.save(f"{path}.{variant['extension']}", ContentFile(variant['content']))
+            saved.append(content_name)
+            webp_name = default_storage.save(f"{path}.webp", ContentFile(variant['webp']))
+            saved.append(webp_name)
+            variants[variant_name] = {
+                'width': variant['width'],
+                'height': variant['height'],
+                'name': content_name,
+                'webp_name': webp_name,
+            }
+
+        with transaction.atomic():
+            updated = Blog.objects.filter(pk=pk, image=name).update(
+                image_width=result['width'],
+                image_height=result['height'],
+                image_size=size,
+                image_variants={'source': name, 'variants': variants},
+            )
+            if updated:
+                # update() sends no post_save, move cached readers to the new variants
+                bump_namespace(BLOG_NAMESPACE)
+        if not updated:
+            # The blog was deleted, or got another image, in the meantime
+            for saved_name in saved:
+                default_storage.delete(saved_name)
+        return bool(updated)
+
+
+class ErrorLogService:
+    """
+    Reads and prunes ErrorLog. Both only ever scan a range of the timestamp
+    index, so their cost follows the size of the range, not of the table.
+    """
+
+    @staticmethod
+    def get_counts(start, end, bucket='hour', error_type=None, status_code=None):
+        """
+        Returns the error occurrences within [start, end) per bucket, error
+        type and status code, along with their totals per error type and
+        status code.
+        """
+        errors = ErrorLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        if error_type:
+            errors = errors.filter(error_type=error_type)
+        if status_code:
+            errors = errors.filter(status_code=status_code)
+        rows = (
+            errors.annotate(bucket=Trunc('timestamp', bucket, tzinfo=dt_timezone.utc))
+            .values('bucket', 'error_type', 'status_code')
+            .annotate(occurrences=Sum('occurrences'), errors=Count('*'))
+            .order_by('bucket', 'error_type', 'status_code')
+        )
+
+        series = []
+        totals = {}
+        for row in rows:
+            series.append(row)
+            key = (row['error_type'], row['status_code'])
+            total = totals.setdefault(key, {'error_type': key[0], 'status_code': key[1], 'occurrences': 0, 'errors': 0})
+            total['occurrences'] += row['occurrences']
+            total['errors'] += row['errors']
         return {
-            "total_blogs": total_blogs,
-            "total_categories": total_categories,
+            'start': start,
+            'end': end,
+            'bucket': bucket,
+            'totals': sorted(totals.values(), key=lambda total: -total['occurrences']),
+            'series': series,
         }
+
+    @staticmethod
+    def prune(before, chunk_size=5000, dry_run=False):
+        """
+        Deletes the errors first seen before ``before``, oldest first, in
+        chunks of ``chunk_size`` rows each committed on its own, so neither
+        locks nor WAL pile up however much there is to delete. Returns the
+        number of rows deleted (or that would be, with ``dry_run``).
+        """
+        expired = ErrorLog.objects.filter(timestamp__lt=before)
+        if dry_run:
+            return expired.count()
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(expired.order_by('timestamp').values_list('pk', flat=True)[:chunk_size])
+                if not chunk:
+                    return deleted
+                deleted += ErrorLog.objects.filter(pk__in=chunk).delete()[0]
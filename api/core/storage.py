@@ -0,0 +1,55 @@
+import hashlib
+import os
+import posixpath
+import uuid
+from django.core.files.storage import FileSystemStorage
+
+
+def file_digest(content):
+    """
+    Returns the SHA-256 of a File, reusing the one computed while it was
+    uploaded by HashingFileUploadHandler.
+    """
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming files after the SHA-256 of their content:
+    ``blogs/photo.jpg`` is stored as ``blogs/3f/3fa9...c2.jpg``.
+
+    Saving content that is already stored writes nothing and returns the
+    existing name, so identical uploads share a single file. As a
+    consequence a file may be referenced by several rows and must not be
+    deleted along with one of them.
+    """
+
+    # Leading hex digits of the hash used as a sub directory, which keeps
+    # directories small
+    prefix_length = 2
+
+    def hashed_name(self, name, digest):
+        directory, basename = posixpath.split(name.replace("\\", "/"))
+        extension = os.path.splitext(basename)[1].lower()
+        return posixpath.join(directory, digest[:self.prefix_length], digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from the content in _save, sharing them is the point
+        return name
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, file_digest(content))
+        if self.exists(name):
+            return name
+        # Written under a temporary name first (moved, not copied, for
+        # uploads already on disk), then renamed atomically: concurrent
+        # uploads of the same content all end up with one complete file.
+        temporary_name = super()._save(posixpath.join(posixpath.dirname(name), f".{uuid.uuid4().hex}.tmp"), content)
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
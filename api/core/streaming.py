@@ -0,0 +1,53 @@
+import json
+from rest_framework.utils.encoders import JSONEncoder
+
+JSON_CONTENT_TYPE = "application/json"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def _represent(objects, serializer):
+    # A single serializer instance is reused for every row instead of
+    # building a ListSerializer over the whole result set
+    for instance in objects:
+        yield serializer.to_representation(instance)
+
+
+def stream_json(objects, serializer, envelope, rows_per_chunk=500):
+    """
+    Streams ``{**envelope, "data": [...]}`` as JSON, yielding one chunk of
+    encoded bytes per ``rows_per_chunk`` objects so that memory stays flat.
+    """
+    head = _dumps(envelope)
+    # Open the data array right where the envelope object would be closed
+    yield (head[:-1] + (',"data":[' if envelope else '"data":[')).encode()
+    buffer = []
+    first = True
+    for item in _represent(objects, serializer):
+        buffer.append(_dumps(item))
+        if len(buffer) >= rows_per_chunk:
+            yield (("" if first else ",") + ",".join(buffer)).encode()
+            buffer = []
+            first = False
+    if buffer:
+        yield (("" if first else ",") + ",".join(buffer)).encode()
+    yield b"]}"
+
+
+def stream_ndjson(objects, serializer, envelope, rows_per_chunk=500):
+    """
+    Streams newline-delimited JSON: the envelope on the first line, then one
+    serialized object per line.
+    """
+    yield (_dumps(envelope) + "\n").encode()
+    buffer = []
+    for item in _represent(objects, serializer):
+        buffer.append(_dumps(item))
+        if len(buffer) >= rows_per_chunk:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer = []
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
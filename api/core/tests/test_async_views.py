@@ -0,0 +1,92 @@
+import json
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from api.blog.views import AsyncBlogView, AsyncCategoryView, AsyncStatsView, BlogView, CategoryView, StatsView
+from api.core.tests.text_client import BaseTestClient
+
+factory = APIRequestFactory()
+
+
+def call(view_class, request):
+    view = view_class.as_view()
+    if iscoroutinefunction(view):
+        response = async_to_sync(view)(request)
+    else:
+        response = view(request)
+    if hasattr(response, 'render'):
+        response.render()
+    return response
+
+
+@pytest.mark.django_db
+class TestAsyncViews(BaseTestClient):
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def get(self, view_class, path, data=None, token=None, **extra):
+        if token is not None:
+            extra['HTTP_AUTHORIZATION'] = 'Bearer ' + token
+        return call(view_class, factory.get(path, data, **extra))
+
+    def test_views_are_served_natively(self):
+        for view_class in (AsyncBlogView, AsyncCategoryView, AsyncStatsView):
+            assert iscoroutinefunction(view_class.as_view())
+
+    @pytest.mark.parametrize('views, path, data', [
+        ((BlogView, AsyncBlogView), '/blog/', {'page_size': 1}),
+        ((BlogView, AsyncBlogView), '/blog/', {'search': 'zzzunmatched'}),
+        ((BlogView, AsyncBlogView), '/blog/', {'fields': 'nope'}),
+        ((CategoryView, AsyncCategoryView), '/blog/category/', None),
+        ((StatsView, AsyncStatsView), '/blog/stats/', {'granularity': 'day'}),
+        ((StatsView, AsyncStatsView), '/blog/stats/', {'granularity': 'year'}),
+    ])
+    def test_same_responses_as_the_sync_views(self, views, path, data):
+        responses = []
+        for view_class in views:
+            cache.clear()
+            response = self.get(view_class, path, data, token=self.get_access_token)
+            responses.append((response.status_code, json.loads(response.content)))
+        assert responses[0] == responses[1]
+
+    def test_unauthenticated_requests_are_rejected(self):
+        sync = self.get(BlogView, '/blog/')
+        response = self.get(AsyncBlogView, '/blog/')
+        assert response.status_code == 401
+        assert response['WWW-Authenticate'] == sync['WWW-Authenticate']
+        assert json.loads(response.content) == json.loads(sync.content)
+
+        response = self.get(AsyncBlogView, '/blog/', token='not-a-token')
+        assert response.status_code == 401
+
+    def test_cached_user_and_response(self):
+        self.get(AsyncBlogView, '/blog/', token=self.get_access_token)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(AsyncBlogView, '/blog/', token=self.get_access_token)
+        assert response.status_code == 200
+        assert response['X-Cache'] == 'HIT'
+        assert len(queries) == 0
+
+    def test_conditional_requests(self):
+        response = self.get(AsyncStatsView, '/blog/stats/', token=self.get_access_token)
+        assert response.status_code == 200
+        response = self.get(AsyncStatsView, '/blog/stats/', token=self.get_access_token, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 304
+
+    def test_writes(self):
+        request = factory.post('/blog/category/', {'name': 'Async'}, format='json', HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+        response = call(AsyncCategoryView, request)
+        assert response.status_code == 200
+        assert json.loads(response.content)['data']['name'] == 'Async'
+
+        request = factory.post('/blog/category/', {'name': 'Denied'}, format='json', HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        assert call(AsyncCategoryView, request).status_code == 401
+
+    def test_schema_is_shared(self):
+        assert AsyncBlogView.get._swagger_auto_schema is BlogView.get._swagger_auto_schema
+        assert AsyncCategoryView.post._swagger_auto_schema is CategoryView.post._swagger_auto_schema
@@ -0,0 +1,254 @@
+import logging
+import time
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+from api.core.cache_backends import CircuitBreaker, CircuitBreakerCache, LocalLRU, LocalTier, TwoTierCache
+
+
+@pytest.fixture
+def remote_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "remote": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "two-tier-remote",
+        },
+    }
+
+
+@pytest.fixture
+def make_worker(remote_cache, request):
+    workers = []
+
+    def make_worker(name, **options):
+        worker = TwoTierCache(name, {
+            "OPTIONS": {
+                "REMOTE": "remote",
+                "BROADCASTER": "api.core.cache_backends.LocalBroadcaster",
+                "CHANNEL": request.node.name,
+                **options,
+            },
+        })
+        workers.append(worker)
+        return worker
+
+    yield make_worker
+    for worker in workers:
+        worker.remote.clear()
+        LocalTier.discard(worker.tier_key)
+
+
+def test_reads_fill_the_local_tier(make_worker):
+    worker_a = make_worker("worker-a")
+    worker_b = make_worker("worker-b")
+
+    worker_a.set("categories", ["News"])
+
+    assert worker_b.get("categories") == ["News"]
+    assert worker_b.get("categories") == ["News"]
+    assert worker_b.get("missing") is None
+    assert worker_b.hit_ratios() == {
+        "local": {"hits": 1, "misses": 2, "hit_ratio": 1 / 3},
+        "remote": {"hits": 1, "misses": 1, "hit_ratio": 0.5},
+    }
+
+
+def test_delete_evicts_local_copies_of_other_workers(make_worker):
+    worker_a = make_worker("worker-a")
+    worker_b = make_worker("worker-b")
+    worker_a.set("categories", ["News"])
+    assert worker_b.get("categories") == ["News"]
+
+    worker_a.delete("categories")
+
+    assert worker_b.get("categories") is None
+    assert worker_b.hit_ratios()["local"]["hits"] == 0
+
+
+def test_set_replaces_local_copies_of_other_workers(make_worker):
+    worker_a = make_worker("worker-a")
+    worker_b = make_worker("worker-b")
+    worker_b.set_many({"version:blog": 1, "version:category": 1})
+    assert worker_a.get_many(["version:blog", "version:category"]) == {"version:blog": 1, "version:category": 1}
+
+    worker_b.set("version:blog", 2)
+
+    assert worker_a.get_many(["version:blog", "version:category"]) == {"version:blog": 2, "version:category": 1}
+
+
+def test_add_is_decided_by_the_remote_tier(make_worker):
+    worker_a = make_worker("worker-a")
+    worker_b = make_worker("worker-b")
+
+    assert worker_a.add("lock:categories", "a")
+    assert not worker_b.add("lock:categories", "b")
+    assert worker_b.get("lock:categories") == "a"
+
+
+def test_threads_share_the_local_tier_of_a_process(make_worker):
+    first = make_worker("worker-a")
+    second = make_worker("worker-a")
+
+    assert first.local is second.local
+
+
+def test_local_tier_is_bounded(make_worker):
+    worker = make_worker("worker-a", LOCAL_MAX_ENTRIES=10, LOCAL_MAX_BYTES=2000)
+
+    for index in range(50):
+        worker.set(f"blob:{index}", "x" * 300)
+
+    assert worker.local.size <= 2000
+    assert len(worker.local) <= 10
+    # Evicted entries are still served by the remote tier
+    assert worker.get("blob:0") == "x" * 300
+
+
+def test_lru_expires_and_evicts_least_recently_used():
+    lru = LocalLRU(max_entries=2, max_bytes=1024)
+    lru.set("a", b"1", ttl=60)
+    lru.set("b", b"2", ttl=60)
+    lru.get("a")
+    lru.set("c", b"3", ttl=60)
+
+    assert lru.get("a") == b"1"
+    assert lru.get("b") is None
+
+    lru.set("d", b"4", ttl=0.01)
+    time.sleep(0.02)
+    assert lru.get("d") is None
+
+
+class FlakyBackend:
+    """
+    Stand-in for Redis that can fail fast, or hang until a socket timeout.
+    """
+
+    def __init__(self):
+        self.cache = LocMemCache("flaky-primary", {})
+        self.failing = False
+        self.hang = 0
+        self.calls = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args, **kwargs):
+            self.calls += 1
+            if self.hang:
+                time.sleep(self.hang)
+                raise TimeoutError("Timeout reading from socket")
+            if self.failing:
+                raise ConnectionError("Connection refused")
+            return method(*args, **kwargs)
+
+        return call
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def breaker_cache(settings, request):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "fallback": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "breaker-fallback",
+        },
+    }
+    backend = FlakyBackend()
+    clock = Clock()
+
+    class GuardedCache(CircuitBreakerCache):
+        primary = backend
+
+    def make_cache(**options):
+        cache = GuardedCache(request.node.name, {
+            "OPTIONS": {"FAILURE_THRESHOLD": 3, "RECOVERY_TIMEOUT": 30, **options},
+        })
+        cache.breaker.clock = clock
+        return cache
+
+    yield make_cache, backend, clock
+    CircuitBreaker.discard(request.node.name)
+    backend.cache.clear()
+    LocMemCache("breaker-fallback", {}).clear()
+
+
+def test_breaker_opens_after_consecutive_failures(breaker_cache, caplog):
+    make_cache, backend, clock = breaker_cache
+    cache = make_cache()
+    cache.set("categories", ["News"])
+    backend.failing = True
+
+    with caplog.at_level(logging.INFO, logger="api.core.cache_backends"):
+        for _ in range(3):
+            assert cache.get("categories") is None
+    assert cache.state == CircuitBreaker.OPEN
+    assert "closed -> open" in caplog.text
+
+    # Open: the primary is not called any more
+    calls = backend.calls
+    assert cache.get("categories") is None
+    assert backend.calls == calls
+    assert CircuitBreaker.snapshots()[cache.breaker.name]["state"] == "open"
+
+
+def test_hung_backend_degrades_to_the_fallback(breaker_cache):
+    make_cache, backend, clock = breaker_cache
+    cache = make_cache(FALLBACK="fallback", FAILURE_THRESHOLD=2)
+    backend.hang = 0.05
+
+    started = time.monotonic()
+    for _ in range(20):
+        cache.set("categories", ["News"])
+        assert cache.get("categories") == ["News"]
+    # Only the calls until the breaker opened waited for the timeout
+    assert time.monotonic() - started < 0.5
+    assert backend.calls == 2
+    assert cache.add("lock:categories", "token")
+
+
+def test_half_open_probe_recovers(breaker_cache, caplog):
+    make_cache, backend, clock = breaker_cache
+    cache = make_cache(FALLBACK="fallback")
+    cache.set("version:category", 1)
+    backend.failing = True
+    for _ in range(3):
+        cache.get("version:category")
+    # Bumped while Redis was unavailable
+    cache.set("version:category", 2)
+    assert cache.get("version:category") == 2
+
+    clock.now += 10
+    assert not cache.breaker.allow_request()
+
+    backend.failing = False
+    clock.now += 30
+    with caplog.at_level(logging.INFO, logger="api.core.cache_backends"):
+        assert cache.get("categories") is None
+    assert cache.state == CircuitBreaker.CLOSED
+    assert "open -> half-open" in caplog.text
+    assert "half-open -> closed" in caplog.text
+    # The version written during the outage is no longer served from either side
+    assert cache.get("version:category") is None
+
+
+def test_failed_probe_reopens_the_breaker(breaker_cache):
+    make_cache, backend, clock = breaker_cache
+    cache = make_cache()
+    backend.failing = True
+    for _ in range(3):
+        cache.get("categories")
+
+    clock.now += 30
+    assert cache.get("categories") is None
+    assert cache.state == CircuitBreaker.OPEN
+    assert cache.breaker.snapshot()["transitions"] == 3
@@ -0,0 +1,117 @@
+import threading
+import time
+import pytest
+from django.core.cache import cache
+from api.core import caching
+from api.core.caching import RefreshLock, get_or_compute, make_envelope, should_refresh, store_envelope
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "stampede-tests",
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def run_concurrently(target, workers=8):
+    barrier = threading.Barrier(workers)
+    results = []
+    errors = []
+
+    def run():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not errors
+    return results
+
+
+def test_concurrent_misses_build_once():
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["category"]
+
+    results = run_concurrently(lambda: get_or_compute("categories", build, timeout=60))
+
+    assert len(calls) == 1
+    assert results == [["category"]] * 8
+
+
+def test_expired_entry_is_served_stale_while_one_worker_refreshes():
+    store_envelope(["categories"], "old", timeout=60, delta=0.1)
+    cache.set("categories", dict(cache.get("categories"), expiry=time.time() - 1))
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "new"
+
+    refresher = threading.Thread(target=lambda: get_or_compute("categories", build, timeout=60))
+    refresher.start()
+    assert started.wait(5)
+
+    # Everybody else is answered from the expired entry without waiting
+    results = run_concurrently(lambda: get_or_compute("categories", build, timeout=60))
+    release.set()
+    refresher.join(5)
+
+    assert results == ["old"] * 8
+    assert len(calls) == 1
+    assert get_or_compute("categories", build, timeout=60) == "new"
+
+
+def test_stale_key_is_served_for_a_new_version():
+    store_envelope(["categories:v1", "categories:stale"], "v1", timeout=60, delta=0.1)
+    lock = RefreshLock("categories:v2")
+    assert lock.acquire()
+
+    value = get_or_compute("categories:v2", lambda: "v2", timeout=60, stale_key="categories:stale")
+
+    assert value == "v1"
+    lock.release()
+    assert get_or_compute("categories:v2", lambda: "v2", timeout=60, stale_key="categories:stale") == "v2"
+    assert cache.get("categories:stale")["value"] == "v2"
+
+
+def test_refresh_lock_is_released_on_build_errors():
+    def build():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        get_or_compute("categories", build, timeout=60)
+
+    assert RefreshLock("categories").acquire()
+
+
+def test_should_refresh_early_as_expiry_approaches(monkeypatch):
+    # 1 - 0.99 makes -log() large: an expensive entry close to expiry is refreshed early
+    monkeypatch.setattr(caching.random, "random", lambda: 0.99)
+    now = time.time()
+
+    assert should_refresh(make_envelope("value", timeout=1, delta=10), now=now)
+    assert not should_refresh(make_envelope("value", timeout=3600, delta=10), now=now)
+    # Cheap entries are only refreshed once they expire
+    assert not should_refresh(make_envelope("value", timeout=1, delta=0), now=now)
+    assert should_refresh(make_envelope("value", timeout=1, delta=0), now=now + 2)
+    assert not should_refresh(make_envelope("value", timeout=1, delta=10), beta=0, now=now)
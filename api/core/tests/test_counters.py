@@ -0,0 +1,82 @@
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from api.blog.models import Blog, Category
+from api.blog.signals import BLOG_COUNTER, CATEGORY_COUNTER
+from api.core.counters import get_counts
+from api.core.models import Counter
+from api.core.query_budget import query_budget
+from api.core.services import BlogBulkCreateService, StatsService
+from api.core.tests.factories import BlogFactory, CategoryFactory, UserFactory
+
+
+def counts():
+    return get_counts([BLOG_COUNTER, CATEGORY_COUNTER])
+
+
+@pytest.mark.django_db
+def test_counters_follow_creates_and_deletes():
+    category = CategoryFactory()
+    blogs = BlogFactory.create_batch(3, category=category)
+    blogs[0].save()
+    assert counts() == {BLOG_COUNTER: 3, CATEGORY_COUNTER: 1}
+
+    blogs[1].delete()
+    assert counts() == {BLOG_COUNTER: 2, CATEGORY_COUNTER: 1}
+
+    # Cascades are counted too
+    category.delete()
+    assert counts() == {BLOG_COUNTER: 0, CATEGORY_COUNTER: 0}
+
+
+@pytest.mark.django_db
+def test_counters_follow_bulk_creates():
+    user = UserFactory()
+    category = CategoryFactory()
+    items = [{'title': f'Bulk {i}', 'content': 'Content', 'author': user.id, 'category': category.name} for i in range(5)]
+
+    BlogBulkCreateService.create(items, user)
+
+    assert counts()[BLOG_COUNTER] == 5 == Blog.objects.count()
+
+
+@pytest.mark.django_db
+def test_counters_roll_back_with_the_rows():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            Category.objects.create(name="Rolled back")
+            raise RuntimeError
+
+    assert counts()[CATEGORY_COUNTER] == 0
+
+
+@pytest.mark.django_db
+def test_stats_need_a_single_query():
+    BlogFactory.create_batch(2)
+
+    with query_budget(1, label="StatsService.get_stats"):
+        stats = StatsService.get_stats()
+
+    assert stats == {"total_blogs": 2, "total_categories": 2}
+
+
+@pytest.mark.django_db
+def test_approximate_counts_fall_back_to_counters_without_postgresql():
+    BlogFactory()
+
+    assert get_counts([BLOG_COUNTER], approximate=True) == {BLOG_COUNTER: 1}
+
+
+@pytest.mark.django_db
+def test_reconcile_counters_corrects_drift(capsys):
+    BlogFactory.create_batch(3)
+    # Rows written behind the signals' back
+    Counter.objects.filter(name=BLOG_COUNTER).update(value=0)
+
+    call_command("reconcile_counters", "--dry-run")
+    assert "blog.blog: counted 0, actual 3 (drift +3)" in capsys.readouterr().out
+    assert counts()[BLOG_COUNTER] == 0
+
+    call_command("reconcile_counters")
+    assert "blog.blog: corrected 0 -> 3" in capsys.readouterr().out
+    assert counts() == {BLOG_COUNTER: 3, CATEGORY_COUNTER: 3}
@@ -0,0 +1,178 @@
+import threading
+import pytest
+from api.core import metrics
+from api.core.db import pool as pools
+from api.core.db.pool import ConnectionPool, PoolTimeout
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Connection:
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+
+def check(connection):
+    if connection.broken:
+        raise ConnectionError("server closed the connection unexpectedly")
+
+
+def reset(connection):
+    return not connection.broken
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def connect(opened):
+    def connect():
+        connection = Connection(len(opened))
+        opened.append(connection)
+        return connection
+    return connect
+
+
+def make_pool(clock, **options):
+    return ConnectionPool(check, reset, clock=clock, **options)
+
+
+def test_connections_are_reused(clock, connect, opened):
+    pool = make_pool(clock)
+    connection = pool.getconn(connect)
+    pool.putconn(connection)
+    assert pool.getconn(connect) is connection
+    assert len(opened) == 1
+    assert pool.stats()["in_use"] == 1
+
+
+def test_min_size_is_opened_on_first_checkout(clock, connect, opened):
+    pool = make_pool(clock, min_size=3)
+    pool.getconn(connect)
+    assert len(opened) == 3
+    assert pool.stats()["idle"] == 2
+
+
+def test_exhausted_pool_times_out(connect, opened):
+    pool = ConnectionPool(check, reset, max_size=1, timeout=0.05)
+    pool.getconn(connect)
+    with pytest.raises(PoolTimeout):
+        pool.getconn(connect)
+    assert len(opened) == 1
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 1
+    assert stats["wait_seconds"] >= 0.05
+
+
+def test_waiters_get_the_returned_connection(connect):
+    pool = ConnectionPool(check, reset, max_size=1, timeout=5)
+    connection = pool.getconn(connect)
+    checked_out = []
+    waiter = threading.Thread(target=lambda: checked_out.append(pool.getconn(connect)))
+    waiter.start()
+    pool.putconn(connection)
+    waiter.join(5)
+    assert checked_out == [connection]
+
+
+def test_expired_connections_are_replaced(clock, connect, opened):
+    pool = make_pool(clock, max_lifetime=60)
+    connection = pool.getconn(connect)
+    clock.now = 30
+    pool.putconn(connection)
+    clock.now = 61
+    assert pool.getconn(connect) is opened[1]
+    assert connection.closed
+
+    # Expired while checked out: closed when handed back
+    clock.now = 200
+    pool.putconn(opened[1])
+    assert opened[1].closed
+    assert pool.stats()["size"] == 0
+
+
+def test_idle_connections_are_checked(clock, connect, opened):
+    pool = make_pool(clock, check_idle=1)
+    connection = pool.getconn(connect)
+    pool.putconn(connection)
+    connection.broken = True
+    # Returned too recently to be checked
+    assert pool.getconn(connect) is connection
+
+    connection.broken = False
+    pool.putconn(connection)
+    connection.broken = True
+    clock.now = 5
+    replacement = pool.getconn(connect)
+    assert replacement is not connection
+    assert connection.closed
+    assert pool.stats()["failed_checks"] == 1
+
+
+def test_connections_which_cannot_be_reset_are_closed(clock, connect):
+    pool = make_pool(clock)
+    connection = pool.getconn(connect)
+    connection.broken = True
+    pool.putconn(connection)
+    assert connection.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_failed_connects_free_their_slot(clock, connect):
+    pool = make_pool(clock, max_size=1, timeout=0)
+
+    def fail():
+        raise ConnectionError("could not connect to server")
+
+    with pytest.raises(ConnectionError):
+        pool.getconn(fail)
+    assert pool.getconn(connect)
+
+
+def test_closed_pool_closes_returned_connections(clock, connect):
+    pool = make_pool(clock)
+    idle, in_use = pool.getconn(connect), pool.getconn(connect)
+    pool.putconn(idle)
+    pool.close()
+    assert idle.closed
+    pool.putconn(in_use)
+    assert in_use.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_stats_are_exported(clock, connect, monkeypatch, settings):
+    settings.METRICS_DIR = ""
+    monkeypatch.setattr(pools, "_pools", {})
+    pool = pools.get_pool("default", "api", lambda: make_pool(clock, max_size=4))
+    assert pools.get_pool("default", "api", lambda: None) is pool
+    pool.putconn(pool.getconn(connect))
+    pool.getconn(connect)
+
+    text = metrics.registry.render()
+    labels = 'alias="default",database="api"'
+    assert f'db_pool_connections{{{labels},state="in_use"}} 1' in text
+    assert f'db_pool_connections{{{labels},state="idle"}} 0' in text
+    assert f'db_pool_max_connections{{{labels}}} 4' in text
+    assert f'db_pool_checkouts_total{{{labels}}} 2' in text
+    assert f'db_pool_opened_total{{{labels}}} 1' in text
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+import io
+import threading
+import pytest
+from django.core.management import call_command
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone as django_timezone
+from api.core import errorlog
+from api.core.errorlog import ErrorLogBuffer, fingerprint, message_template
+from api.core.middleware import LogErrorsMiddleware
+from api.core.models import ErrorLog
+from api.core.tests.text_client import BaseTestClient
+
+NOW = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def buffer(settings):
+    settings.ERROR_LOG_FLUSH_INTERVAL = 60
+    settings.ERROR_LOG_WINDOW = 3600
+    settings.ERROR_LOG_BUFFER_SIZE = 3
+    buffer = ErrorLogBuffer()
+    # Never started by record() within the flush interval of a test
+    buffer._ensure_thread = lambda: None
+    return buffer
+
+
+def test_fingerprint_ignores_variable_parts():
+    assert message_template("Blog 42 not found in 0.25s") == "Blog <n> not found in <n>s"
+    assert fingerprint("DoesNotExist", "Blog 42 not found", "blog") == fingerprint("DoesNotExist", "Blog 43 not found", "blog")
+    assert fingerprint("DoesNotExist", "Blog 42 not found", "blog") != fingerprint("DoesNotExist", "Blog 42 not found", "category")
+    assert fingerprint("DoesNotExist", "Blog 42 not found", "blog") != fingerprint("KeyError", "Blog 42 not found", "blog")
+
+
+@pytest.mark.django_db
+def test_identical_errors_are_counted_in_one_row_per_window(buffer):
+    assert buffer.record("ValueError", "bad value 1", 500, "blog", when=NOW)
+    for second in range(999):
+        assert not buffer.record("ValueError", f"bad value {second}", 500, "blog", when=NOW + timedelta(seconds=second % 60))
+    assert ErrorLog.objects.count() == 0
+    assert buffer.flush() == 1
+
+    # The next flush adds to the same row, another hour gets its own
+    buffer.record("ValueError", "bad value 2", 500, "blog", when=NOW + timedelta(minutes=5))
+    buffer.record("ValueError", "bad value 3", 500, "blog", when=NOW + timedelta(hours=1))
+    assert buffer.flush() == 2
+
+    first, second = ErrorLog.objects.order_by("window_start")
+    assert (first.occurrences, first.error_message, first.view_name) == (1001, "bad value 1", "blog")
+    assert (first.timestamp, first.last_seen) == (NOW, NOW + timedelta(minutes=5))
+    assert first.window_start == datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    assert second.occurrences == 1
+
+
+@pytest.mark.django_db
+def test_buffer_is_bounded(buffer):
+    for number in range(5):
+        buffer.record(f"Error{number}", "failed", 500, "blog", when=NOW)
+    # Known errors are still counted once the buffer is full
+    buffer.record("Error0", "failed", 500, "blog", when=NOW)
+
+    assert buffer.pending() == 4
+    assert buffer.flush() == 3
+    assert sorted(ErrorLog.objects.values_list("error_type", "occurrences")) == [("Error0", 2), ("Error1", 1), ("Error2", 1)]
+
+
+@pytest.mark.django_db
+def test_failed_flushes_keep_the_errors(buffer, monkeypatch):
+    buffer.record("ValueError", "bad value", 500, "blog", when=NOW)
+
+    def unavailable(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(errorlog, "add_to", unavailable)
+    assert buffer.flush() == 0
+    assert buffer.pending() == 1
+
+    monkeypatch.undo()
+    assert buffer.flush() == 1
+    assert ErrorLog.objects.get().occurrences == 1
+
+
+@pytest.mark.django_db
+def test_middleware_records_errors_without_writing(buffer, monkeypatch):
+    monkeypatch.setattr("api.core.middleware.error_log_buffer", buffer)
+    request = RequestFactory().get("/blog/")
+    request.resolver_match = resolve("/blog/")
+    middleware = LogErrorsMiddleware(lambda request: JsonResponse({}))
+
+    for _ in range(10):
+        response = middleware.process_exception(request, ZeroDivisionError("division by zero"))
+        assert response.status_code == 500
+    assert ErrorLog.objects.count() == 0
+
+    buffer.flush()
+    error = ErrorLog.objects.get()
+    assert (error.error_type, error.view_name, error.occurrences) == ("ZeroDivisionError", "blog", 10)
+
+
+def test_concurrent_errors_are_all_counted(buffer):
+    def storm():
+        for number in range(500):
+            buffer.record("ValueError", f"bad value {number}", 500, "blog", when=NOW)
+
+    threads = [threading.Thread(target=storm) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert buffer.pending() == 4000
+
+
+def log_error(error_type, status_code, timestamp, occurrences=1):
+    return ErrorLog.objects.create(
+        error_type=error_type, error_message="failed", status_code=status_code,
+        timestamp=timestamp, last_seen=timestamp, occurrences=occurrences,
+    )
+
+
+@pytest.mark.django_db
+def test_prune_error_logs_deletes_in_chunks():
+    now = django_timezone.now()
+    for days in (1, 100, 120, 200):
+        log_error("ValueError", 500, now - timedelta(days=days))
+
+    out = io.StringIO()
+    call_command("prune_error_logs", "--days", "90", "--dry-run", stdout=out)
+    assert "3 error logs" in out.getvalue()
+    assert ErrorLog.objects.count() == 4
+
+    call_command("prune_error_logs", "--days", "90", "--chunk-size", "2", stdout=out)
+    assert list(ErrorLog.objects.values_list("timestamp", flat=True)) == [now - timedelta(days=1)]
+
+
+@pytest.mark.django_db
+class TestErrorLogStats(BaseTestClient):
+
+    def test_counts_are_grouped_by_bucket_type_and_status(self):
+        log_error("ValueError", 500, NOW, occurrences=10)
+        log_error("ValueError", 500, NOW + timedelta(minutes=10), occurrences=5)
+        log_error("ValueError", 500, NOW + timedelta(hours=1))
+        log_error("Throttled", 429, NOW + timedelta(hours=1), occurrences=3)
+        log_error("ValueError", 500, NOW + timedelta(days=3))
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+        response = self.client.get(reverse('error-stats'), {'start': '2026-01-01T12:00:00Z', 'end': '2026-01-01T14:00:00Z'})
+        assert response.status_code == 200
+        data = response.data['data']
+        assert data['totals'] == [
+            {'error_type': 'ValueError', 'status_code': 500, 'occurrences': 16, 'errors': 3},
+            {'error_type': 'Throttled', 'status_code': 429, 'occurrences': 3, 'errors': 1},
+        ]
+        assert [(row['bucket'].hour, row['error_type'], row['occurrences']) for row in data['series']] == [
+            (12, 'ValueError', 15), (13, 'Throttled', 3), (13, 'ValueError', 1),
+        ]
+
+        response = self.client.get(reverse('error-stats'), {'start': '2026-01-01', 'bucket': 'day', 'status_code': 429})
+        assert [row['error_type'] for row in response.data['data']['series']] == ['Throttled']
+
+    def test_invalid_range(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+        response = self.client.get(reverse('error-stats'), {'start': '2025-01-01', 'end': '2026-01-01', 'bucket': 'hour'})
+        assert response.status_code == 400
+
+    def test_only_admins_can_read_error_counts(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        response = self.client.get(reverse('error-stats'))
+        assert response.status_code == 403
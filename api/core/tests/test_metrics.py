@@ -0,0 +1,147 @@
+import json
+import subprocess
+import sys
+import pytest
+from django.urls import reverse
+from api.core import metrics
+from api.core.cache_backends import CircuitBreaker
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.fixture(autouse=True)
+def registry(settings):
+    settings.METRICS_DIR = ""
+    settings.METRICS_TOKEN = ""
+    metrics.registry.reset()
+    yield metrics.registry
+    metrics.registry.reset()
+
+
+def sample(text, line_start):
+    return next(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(line_start))
+
+
+def test_histograms_are_cumulative(registry):
+    registry.observe("BlogView", "GET", 200, 0.003, queries=2, query_seconds=0.001, size=100, cache="HIT")
+    registry.observe("BlogView", "GET", 200, 0.2, queries=3, query_seconds=0.05, size=5000, cache="MISS")
+    registry.observe("BlogView", "GET", 400, 20.0)
+
+    text = registry.render()
+    labels = 'view="BlogView",method="GET"'
+    assert sample(text, f'api_requests_total{{{labels},status="200"}}') == 2
+    assert sample(text, f'api_requests_total{{{labels},status="400"}}') == 1
+    assert sample(text, f'api_request_duration_seconds_bucket{{{labels},le="0.005"}}') == 1
+    assert sample(text, f'api_request_duration_seconds_bucket{{{labels},le="0.25"}}') == 2
+    assert sample(text, f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 3
+    assert sample(text, f'api_request_duration_seconds_count{{{labels}}}') == 3
+    assert sample(text, f'api_db_queries_total{{{labels}}}') == 5
+    assert sample(text, f'api_response_cache_total{{{labels},result="hit"}}') == 1
+    # Responses without a size are left out of the size histogram
+    assert sample(text, f'api_response_size_bytes_count{{{labels}}}') == 2
+    assert sample(text, f'api_response_size_bytes_sum{{{labels}}}') == 5100
+
+
+def test_snapshots_of_all_processes_are_summed(registry, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    registry.observe("BlogView", "GET", 200, 0.01)
+    other = dict(registry.snapshot(), pid=1)
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other))
+
+    text = registry.render()
+    assert sample(text, 'api_requests_total{view="BlogView",method="GET",status="200"}') == 2
+    assert (tmp_path / registry.snapshot_path().rsplit("/", 1)[1]).exists()
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def pool_stats(**stats):
+    return {"alias": "default", "database": "api", **dict.fromkeys(metrics.DB_POOL_STATS, 0), **stats}
+
+
+def test_snapshots_of_exited_processes_are_folded(registry, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    registry.observe("BlogView", "GET", 200, 0.01)
+    pid = exited_pid()
+    exited = dict(registry.snapshot(), pid=pid, db_pools=[pool_stats(idle=3, in_use=2, max_size=20, checkouts=7)])
+    (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(exited))
+
+    for _ in range(2):
+        text = registry.render()
+        # Counted once, the counters of the exited process are kept
+        assert sample(text, 'api_requests_total{view="BlogView",method="GET",status="200"}') == 2
+        assert sample(text, 'db_pool_checkouts_total{alias="default",database="api"}') == 7
+        # Its connections are gone with it
+        assert sample(text, 'db_pool_connections{alias="default",database="api",state="idle"}') == 0
+        assert sample(text, 'db_pool_max_connections{alias="default",database="api"}') == 0
+    assert not (tmp_path / f"metrics-{pid}.json").exists()
+    assert (tmp_path / metrics.EXITED_SNAPSHOT).exists()
+
+
+def test_pool_gauges_of_stale_snapshots_are_ignored(registry, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.METRICS_SNAPSHOT_INTERVAL = 5
+    # pid 1 is running, but its snapshot has not been refreshed for a minute
+    stale = dict(registry.snapshot(), pid=1, written_at=registry.snapshot()["written_at"] - 60)
+    stale["db_pools"] = [pool_stats(idle=3, in_use=2, max_size=20, checkouts=7)]
+    (tmp_path / "metrics-1.json").write_text(json.dumps(stale))
+
+    text = registry.render()
+    assert sample(text, 'db_pool_connections{alias="default",database="api",state="in_use"}') == 0
+    assert sample(text, 'db_pool_max_connections{alias="default",database="api"}') == 0
+    assert sample(text, 'db_pool_checkouts_total{alias="default",database="api"}') == 7
+
+    stale["written_at"] += 60
+    (tmp_path / "metrics-1.json").write_text(json.dumps(stale))
+    text = registry.render()
+    assert sample(text, 'db_pool_max_connections{alias="default",database="api"}') == 20
+
+
+def test_cache_circuit_breakers_are_exported(registry, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    breaker = CircuitBreaker.shared("metrics-test", lambda: CircuitBreaker("metrics-test", failure_threshold=2))
+    try:
+        breaker.record_failure()
+        breaker.record_failure()
+        pid = exited_pid()
+        exited = dict(registry.snapshot(), pid=pid)
+        (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(exited))
+
+        text = registry.render()
+        labels = 'breaker="metrics-test"'
+        # The exited process no longer counts in the state, but its counters do
+        assert sample(text, f'cache_circuit_state{{{labels},state="open"}}') == 1
+        assert sample(text, f'cache_circuit_state{{{labels},state="closed"}}') == 0
+        assert sample(text, f'cache_circuit_opened_total{{{labels}}}') == 2
+        assert sample(text, f'cache_circuit_failures_total{{{labels}}}') == 4
+    finally:
+        CircuitBreaker.discard("metrics-test")
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint(BaseTestClient):
+
+    def test_api_requests_are_measured(self, settings):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        for _ in range(2):
+            assert self.client.get(reverse('blog')).status_code == 200
+
+        response = self.client.get(reverse('metrics'))
+        assert response.status_code == 200
+        assert response['Content-Type'] == metrics.CONTENT_TYPE
+        text = response.content.decode()
+        labels = 'view="BlogView",method="GET"'
+        assert sample(text, f'api_requests_total{{{labels},status="200"}}') == 2
+        assert sample(text, f'api_response_cache_total{{{labels},result="miss"}}') == 1
+        assert sample(text, f'api_response_cache_total{{{labels},result="hit"}}') == 1
+        assert sample(text, f'api_db_queries_total{{{labels}}}') >= 2
+        assert sample(text, f'api_response_size_bytes_sum{{{labels}}}') > 0
+
+    def test_metrics_token(self, settings):
+        settings.METRICS_TOKEN = 'scraper-secret'
+        assert self.client.get(reverse('metrics')).status_code == 401
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scraper-secret')
+        assert response.status_code == 200
@@ -0,0 +1,69 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from api.core import profiling
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.fixture(autouse=True)
+def profiles(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_MAX_PROFILES = 3
+    return tmp_path
+
+
+def test_profiles_are_kept_in_a_bounded_ring(profiles):
+    ids = [profiling.profile_store.save({"view": "BlogView", "memory": {"peak": 0}, "report": ""}) for _ in range(5)]
+    assert profiling.profile_store.ids() == ids[:1:-1]
+    assert sorted(path.name for path in profiles.iterdir()) == sorted(f"{profile_id}.json" for profile_id in ids[2:])
+    assert profiling.profile_store.get("../../etc/passwd") is None
+
+
+@pytest.mark.django_db
+class TestProfiling(BaseTestClient):
+
+    def test_signed_requests_are_profiled(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        assert self.client.get(reverse('blog')).status_code == 200
+        # Signed for another path, or tampered with
+        assert self.client.get(reverse('blog'), HTTP_X_PROFILE_REQUEST=profiling.sign_request('/category/')).status_code == 200
+        assert self.client.get(reverse('blog'), HTTP_X_PROFILE_REQUEST=profiling.sign_request(reverse('blog')) + 'x').status_code == 200
+        assert profiling.profile_store.ids() == []
+
+        response = self.client.get(reverse('blog'), HTTP_X_PROFILE_REQUEST=profiling.sign_request(reverse('blog')))
+        assert response.status_code == 200
+        [profile] = profiling.profile_store.list()
+        assert (profile['view'], profile['method'], profile['path'], profile['status_code']) == ('BlogView', 'GET', reverse('blog'), 200)
+        assert profile['calls'] > 0 and profile['memory']['peak'] > 0
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_admin_access_token)
+        response = self.client.get(reverse('profiles'))
+        assert [item['id'] for item in response.data['data']] == [profile['id']]
+        assert 'report' not in response.data['data'][0]
+        response = self.client.get(reverse('profile-detail', args=[profile['id']]))
+        assert 'cumulative' in response.data['data']['report']
+        assert response.data['data']['memory']['top_allocations']
+        assert self.client.get(reverse('profile-detail', args=['1-1'])).status_code == 404
+
+    def test_sampled_requests_are_profiled(self, settings):
+        settings.PROFILING_SAMPLE_RATE = 1
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        self.client.get(reverse('blog'))
+        settings.PROFILING_ENABLED = False
+        self.client.get(reverse('blog'))
+        assert len(profiling.profile_store.ids()) == 1
+
+    def test_only_admins_can_read_profiles(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        assert self.client.get(reverse('profiles')).status_code == 403
+
+
+def test_sign_profile_request_command():
+    out = io.StringIO()
+    call_command("sign_profile_request", "/blog/", stdout=out)
+    header, value = out.getvalue().splitlines()[0].split(": ")
+    assert header == "X-Profile-Request"
+    assert profiling.signing.TimestampSigner(salt=profiling.SALT).unsign(value) == "/blog/"
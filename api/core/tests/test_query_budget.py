@@ -0,0 +1,76 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from api.blog.models import Blog, Category
+from api.blog.serializers import BlogSerializer
+from api.blog.views import AsyncBlogView
+from api.core.middleware import QueryBudgetMiddleware
+from api.core.query_budget import QueryBudgetExceeded, query_budget
+from api.core.tests.text_client import BaseTestClient
+
+
+@pytest.mark.django_db
+def test_query_budget_passes_within_budget():
+    with query_budget(1) as counter:
+        Category.objects.count()
+
+    assert counter.count == 1
+
+
+@pytest.mark.django_db
+def test_query_budget_fails_over_budget():
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(1, label="Two counts"):
+            Category.objects.count()
+            Blog.objects.count()
+
+    assert "Two counts ran 2 queries, over its budget of 1" in str(excinfo.value)
+
+
+def test_eager_loading_follows_declared_relations():
+    # The category is rendered by name, the author by its local foreign key
+    assert BlogSerializer.get_eager_loading() == (["category"], [])
+
+
+@pytest.mark.django_db
+class TestQueryBudgetMiddleware(BaseTestClient):
+
+    @pytest.fixture(autouse=True)
+    def strict_query_budget(self, settings):
+        settings.MIDDLEWARE = ["api.core.middleware.QueryBudgetMiddleware"]
+        settings.QUERY_BUDGET_STRICT = True
+
+    def test_reports_query_count(self):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+
+        response = self.client.get(reverse('blog'))
+
+        assert response.status_code == 200
+        assert response['X-Query-Count'] == '2'
+
+    def test_reports_query_count_of_async_views(self):
+        view = AsyncBlogView.as_view()
+
+        async def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return await view(request)
+
+        # Awaited in the event loop, the queries run in sync_to_async threads
+        middleware = QueryBudgetMiddleware(get_response)
+        assert iscoroutinefunction(middleware)
+        request = APIRequestFactory().get(reverse('blog'), HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        response = async_to_sync(middleware)(request)
+
+        assert response.status_code == 200
+        assert response['X-Query-Count'] == '2'
+
+    def test_raises_over_budget(self, monkeypatch):
+        # Login for the test user
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.get_access_token)
+        # Pretend the serializer forgot its eager loading
+        monkeypatch.setattr(BlogSerializer, 'setup_eager_loading', classmethod(lambda cls, queryset, fields=None: queryset))
+
+        with pytest.raises(QueryBudgetExceeded):
+            self.client.get(reverse('blog'))
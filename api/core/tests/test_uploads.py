@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+import pytest
+from PIL import Image
+from django.core.files.base import ContentFile
+from api.core.storage import ContentAddressedStorage
+from api.core.uploads import HashingFileUploadHandler, UploadRejected
+
+
+def make_png(size):
+    buffer = io.BytesIO()
+    Image.new('1', size).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def stream(handler, data, chunk_size=64 * 1024):
+    handler.new_file('image', 'upload.png', 'image/png', None)
+    for start in range(0, len(data), chunk_size):
+        handler.receive_data_chunk(data[start:start + chunk_size], start)
+    return handler.file_complete(len(data))
+
+
+@pytest.fixture
+def limits(settings):
+    settings.UPLOAD_MAX_FILE_SIZE = 1024 * 1024
+    settings.UPLOAD_MAX_IMAGE_PIXELS = 1000 * 1000
+    return settings
+
+
+def test_handler_hashes_while_streaming(limits):
+    data = make_png((800, 600)) + os.urandom(200 * 1024)
+
+    uploaded = stream(HashingFileUploadHandler(), data)
+    try:
+        assert uploaded.sha256 == hashlib.sha256(data).hexdigest()
+        assert uploaded.read() == data
+    finally:
+        uploaded.close()
+
+
+def test_handler_rejects_oversized_files_mid_stream(limits):
+    handler = HashingFileUploadHandler()
+    handler.new_file('image', 'upload.bin', 'application/octet-stream', None)
+    handler.receive_data_chunk(os.urandom(1024 * 1024), 0)
+    path = handler.file.temporary_file_path()
+
+    with pytest.raises(UploadRejected):
+        handler.receive_data_chunk(b'x', 1024 * 1024)
+    # The partial file is removed right away
+    assert not os.path.exists(path)
+
+
+def test_handler_rejects_images_with_too_many_pixels_from_their_header(limits):
+    data = make_png((2000, 1000))
+    handler = HashingFileUploadHandler()
+    handler.new_file('image', 'upload.png', 'image/png', None)
+
+    # The first chunk holds the header, the rest is never looked at
+    with pytest.raises(UploadRejected, match='2000x1000'):
+        handler.receive_data_chunk(data[:1024], 0)
+
+
+def test_content_addressed_storage_shares_identical_files(tmp_path):
+    storage = ContentAddressedStorage(location=tmp_path)
+    digest = hashlib.sha256(b'same bytes').hexdigest()
+
+    first = storage.save('blogs/photo.JPG', ContentFile(b'same bytes'))
+    second = storage.save('blogs/other.jpg', ContentFile(b'same bytes'))
+    third = storage.save('blogs/photo.jpg', ContentFile(b'other bytes'))
+
+    assert first == second == f'blogs/{digest[:2]}/{digest}.jpg'
+    assert third != first
+    assert sorted(os.listdir(tmp_path / 'blogs' / digest[:2])) == [f'{digest}.jpg']
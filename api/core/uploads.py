@@ -0,0 +1,78 @@
+import hashlib
+import io
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+
+# Leading bytes of an upload searched for an image header; headers bigger
+# than this (e.g. huge embedded EXIF thumbnails) are left to the validation
+# of the image fields.
+IMAGE_HEADER_PROBE_SIZE = 256 * 1024
+
+
+class UploadRejected(MultiPartParserError):
+    """
+    Raised while an upload is streamed in, as soon as it exceeds the limits.
+    DRF answers it with a 400 "Multipart form parse error".
+    """
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams uploads to a temporary file, computing their SHA-256 on the way
+    (exposed as ``sha256`` on the uploaded file, see ContentAddressedStorage).
+
+    Uploads are rejected mid-stream once they exceed UPLOAD_MAX_FILE_SIZE
+    bytes, or once the header of an image declares more than
+    UPLOAD_MAX_IMAGE_PIXELS pixels, so neither an oversized file nor a
+    decompression bomb is ever fully received or decoded.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.UPLOAD_MAX_FILE_SIZE
+        self.max_pixels = settings.UPLOAD_MAX_IMAGE_PIXELS
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.max_size and self.content_length and self.content_length > self.max_size:
+            self.reject(f"{self.file_name} is larger than {self.max_size} bytes.")
+        self.hasher = hashlib.sha256()
+        self.header = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.max_size and start + len(raw_data) > self.max_size:
+            self.reject(f"{self.file_name} is larger than {self.max_size} bytes.")
+        self.hasher.update(raw_data)
+        if self.header is not None:
+            self.inspect_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def inspect_header(self, raw_data):
+        # Image.open only parses the header, unlike ImageFile.Parser which
+        # allocates the whole decoded image as soon as it recognises one
+        self.header += raw_data
+        try:
+            with Image.open(io.BytesIO(self.header)) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.reject(f"{self.file_name} has too many pixels.")
+        except Exception:
+            # Not an image, or not enough of its header yet
+            if len(self.header) >= IMAGE_HEADER_PROBE_SIZE:
+                self.header = None
+            return
+        self.header = None
+        if self.max_pixels and width * height > self.max_pixels:
+            self.reject(f"{self.file_name} has more than {self.max_pixels} pixels ({width}x{height}).")
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.hasher.hexdigest()
+        return uploaded
+
+    def reject(self, message):
+        # The file is not handed to the parser yet, remove it ourselves
+        self.upload_interrupted()
+        raise UploadRejected(message)
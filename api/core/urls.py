@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import ErrorLogStatsView, ProfileDetailView, ProfileListView
+
+urlpatterns = [
+    path('errors/', ErrorLogStatsView.as_view(), name='error-stats'),
+    path('profiles/', ProfileListView.as_view(), name='profiles'),
+    path('profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+]
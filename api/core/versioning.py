@@ -0,0 +1,73 @@
+import time
+from django.core.cache import cache
+
+VERSION_KEY = "version:{namespace}"
+# Versions are microsecond timestamps of whole seconds, see _timestamp_version
+SECOND = 1_000_000
+
+
+def _version_key(namespace):
+    return VERSION_KEY.format(namespace=namespace)
+
+
+def _ceil_to_second(version):
+    return -(-version // SECOND) * SECOND
+
+
+def _timestamp_version(timestamp=None):
+    # Versions are microsecond timestamps so they double as modification times,
+    # rounded up to the second as Last-Modified cannot tell apart two versions
+    # within the same second
+    if timestamp is None:
+        return _ceil_to_second(time.time_ns() // 1000)
+    return _ceil_to_second(int(timestamp.timestamp() * SECOND))
+
+
+def get_versions(namespaces):
+    """
+    Returns the current version of every namespace, as a dict.
+
+    A namespace without a version (never written, or evicted from the cache)
+    starts at the current time, which simply invalidates whatever was
+    validated against it before.
+    """
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        # add() lets the first worker win when several initialize at once
+        cache.add(key, _timestamp_version(), timeout=None)
+        versions[key] = cache.get(key) or _timestamp_version()
+    return {keys[key]: version for key, version in versions.items()}
+
+
+async def aget_versions(namespaces):
+    """
+    get_versions for async code, through the async cache API.
+    """
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = await cache.aget_many(keys)
+    for key in keys.keys() - versions.keys():
+        await cache.aadd(key, _timestamp_version(), timeout=None)
+        versions[key] = await cache.aget(key) or _timestamp_version()
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def get_version(namespace):
+    return get_versions([namespace])[namespace]
+
+
+def bump_version(namespace, timestamp=None):
+    """
+    Moves a namespace to a new version, invalidating everything derived from
+    the previous one. ``timestamp`` is the modification time to record,
+    typically the ``updated_at`` of the changed row.
+
+    Every version is at least one second past the previous one, so distinct
+    versions always have distinct Last-Modified dates; bursts of writes
+    move the versions ahead of the clock for as many seconds.
+    """
+    key = _version_key(namespace)
+    current = cache.get(key) or 0
+    version = max(_timestamp_version(timestamp), _ceil_to_second(current) + SECOND)
+    cache.set(key, version, timeout=None)
+    return version
@@ -1,16 +1,612 @@
+import hmac
+import inspect
+import time
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from api.core.mixins import APIViewResponseMixin
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import APIException, PermissionDenied
+from rest_framework import status
+from api.account.authentication import CachedJWTAuthentication
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from api.core import metrics, profiling
+from api.core.caching import await_for_envelope, should_refresh, wait_for_envelope
+from api.core.serializers import ErrorLogQuerySerializer
+from api.core.services import ErrorLogService
+
+
+class NotModified(Exception):
+    """
+    Short-circuits a conditional GET whose validators still match.
+    """
+
+    def __init__(self, response):
+        super().__init__("Not modified")
+        self.response = response
+
 
 class BaseAPIView(APIView, APIViewResponseMixin):
     """
     Custom base API view to handle common logic for all APIs.
     """
+    # Result of cached_get for the request (HIT, STALE or MISS), reported in the metrics
+    cache_status = None
+
     # Add custom middleware logic to here for all API views
     def dispatch(self, request, *args, **kwargs):
-        # Custom middleware logic can be added here
-        print("Custom middleware logic for all API views If you need it", "/api/core/views.py")
-        return super().dispatch(request, *args, **kwargs)
-    
-    pass
\ No newline at end of file
+        # Opt-in cProfile and tracemalloc capture of single requests, see api/core/profiling.py
+        if profiling.enabled and profiling.is_requested(request):
+            return profiling.profile_request(self, self.measured_dispatch, request, *args, **kwargs)
+        return self.measured_dispatch(request, *args, **kwargs)
+
+    def measured_dispatch(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            return super().dispatch(request, *args, **kwargs)
+        # Latency, SQL queries, cache results and size per view, see api/core/metrics.py
+        started = time.perf_counter()
+        queries, token = metrics.start_request()
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except Exception:
+            self.observe_failure(request, started, queries)
+            raise
+        finally:
+            metrics.finish_request(token)
+        metrics.track_response(type(self).__name__, request.method, response, started, queries, cache=self.cache_status)
+        return response
+
+    def observe_failure(self, request, started, queries):
+        # Left to LogErrorsMiddleware, which answers with a 500
+        metrics.registry.observe(
+            type(self).__name__, request.method, 500, time.perf_counter() - started,
+            queries=queries.count, query_seconds=queries.duration,
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Validators are computed after authentication and permission checks so
+        # a 304 is never served to a client that could not read the resource
+        self.conditional_validators = None
+        if request.method in ("GET", "HEAD"):
+            self.conditional_validators = self.get_conditional_validators(request)
+        self.check_not_modified(request)
+
+    def check_not_modified(self, request):
+        if self.conditional_validators is not None:
+            etag, last_modified = self.conditional_validators
+            response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                # The handler, and therefore the serializer, never runs
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "conditional_validators", None)
+        if validators is not None and response.status_code in (200, 304):
+            self.set_conditional_headers(response, *validators)
+        return response
+
+    def cached_get(self, request, response_cache, build_response):
+        """
+        Serves a GET from a RenderedResponseCache.
+
+        On a miss ``build_response()`` produces the usual Response, whose
+        bytes are stored once DRF has rendered them; hits are then served
+        straight from those bytes, without serializing or rendering again.
+        Only successful JSON responses are cached.
+
+        Recomputation is stampede protected: entries are refreshed early by a
+        single request (see ``should_refresh``), and while one request holds
+        the refresh lock the others are served the previous response, even
+        across a version bump, rather than all building it at once. Endpoints
+        whose TTL is 0 are not cached and always build the response.
+        """
+        # Nothing is stored without a TTL, waiting on another worker would not help
+        if request.accepted_renderer.format != "json" or not response_cache.ttl:
+            return build_response()
+
+        key = response_cache.make_key(request, versions=getattr(self, "namespace_versions", None))
+        envelope = response_cache.get(key)
+        if envelope is not None and not should_refresh(envelope):
+            return self.cached_response(request, envelope["value"], "HIT")
+
+        stale_key = response_cache.make_stale_key(request)
+        lock = response_cache.lock(key)
+        if not lock.acquire():
+            if envelope is None:
+                envelope = response_cache.get_stale(stale_key) or wait_for_envelope(key, lock.timeout)
+            if envelope is not None:
+                # The stale body keeps its own ETag, the current validators do not describe it
+                self.conditional_validators = None
+                return self.cached_response(request, envelope["value"], "STALE")
+            return build_response()
+
+        started = time.monotonic()
+        try:
+            response = build_response()
+        except Exception:
+            lock.release()
+            raise
+        if response.status_code != 200:
+            lock.release()
+            return response
+        return self.store_when_rendered(response, response_cache, key, stale_key, lock, started)
+
+    def store_when_rendered(self, response, response_cache, key, stale_key, lock, started):
+        validators = getattr(self, "conditional_validators", None)
+        etag = validators[0] if validators else None
+
+        def store_rendered(rendered):
+            try:
+                entry = response_cache.make_entry(rendered.content, rendered["Content-Type"], etag=etag)
+                response_cache.set(key, entry, delta=time.monotonic() - started, stale_key=stale_key)
+            finally:
+                lock.release()
+
+        response.add_post_render_callback(store_rendered)
+        response["X-Cache"] = self.cache_status = "MISS"
+        return response
+
+    def cached_response(self, request, entry, status):
+        self.cache_status = status
+        # If-None-Match can be answered from the stored ETag alone
+        not_modified = get_conditional_response(request._request, etag=entry["etag"])
+        if not_modified is not None:
+            not_modified["ETag"] = entry["etag"]
+            return not_modified
+
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["Content-Length"] = str(len(entry["content"]))
+        response["ETag"] = entry["etag"]
+        response["X-Cache"] = status
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AsyncBaseAPIView(BaseAPIView):
+    """
+    BaseAPIView whose handlers are coroutines, served natively by the ASGI
+    application instead of in a thread per request.
+
+    DRF only dispatches synchronously, so its request cycle is mirrored here
+    with the async cache and ORM APIs: authenticators are awaited through
+    their ``aauthenticate`` when they have one (in a thread otherwise), and
+    the conditional validators come from ``aget_conditional_validators``.
+    Permission checks run on the event loop and must not query the
+    database; throttles, which use the cache, run in a thread. Handlers which
+    are not coroutines, such as OPTIONS, are called as they are.
+
+    Metrics are recorded like for BaseAPIView. Requests are not profiled:
+    cProfile only follows the thread it runs in.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            return await self.adispatch(request, *args, **kwargs)
+        started = time.perf_counter()
+        queries, token = metrics.start_request()
+        try:
+            response = await self.adispatch(request, *args, **kwargs)
+        except Exception:
+            self.observe_failure(request, started, queries)
+            raise
+        finally:
+            metrics.finish_request(token)
+        metrics.track_response(type(self).__name__, request.method, response, started, queries, cache=self.cache_status)
+        return response
+
+    async def adispatch(self, request, *args, **kwargs):
+        # APIView.dispatch, awaiting the authentication, the validators and the handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        # APIView.initial and BaseAPIView.initial
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        if self.throttle_classes:
+            await sync_to_async(self.check_throttles)(request)
+
+        self.conditional_validators = None
+        if request.method in ("GET", "HEAD"):
+            self.conditional_validators = await self.aget_conditional_validators(request)
+        self.check_not_modified(request)
+
+    async def aperform_authentication(self, request):
+        # Request._authenticate, which request.user would run synchronously
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, "aauthenticate"):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except APIException:
+                request._not_authenticated()
+                raise
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def acached_get(self, request, response_cache, build_response):
+        """
+        cached_get for async views, ``build_response`` being a coroutine
+        function. The rendered bytes are stored by the same post-render
+        callback, the ASGI handler renders responses in a thread.
+        """
+        if request.accepted_renderer.format != "json" or not response_cache.ttl:
+            return await build_response()
+
+        key = await response_cache.amake_key(request, versions=getattr(self, "namespace_versions", None))
+        envelope = await response_cache.aget(key)
+        if envelope is not None and not should_refresh(envelope):
+            return self.cached_response(request, envelope["value"], "HIT")
+
+        stale_key = response_cache.make_stale_key(request)
+        lock = response_cache.lock(key)
+        if not await lock.aacquire():
+            if envelope is None:
+                envelope = await response_cache.aget_stale(stale_key) or await await_for_envelope(key, lock.timeout)
+            if envelope is not None:
+                self.conditional_validators = None
+                return self.cached_response(request, envelope["value"], "STALE")
+            return await build_response()
+
+        started = time.monotonic()
+        try:
+            response = await build_response()
+        except Exception:
+            await lock.arelease()
+            raise
+        if response.status_code != 200:
+            await lock.arelease()
+            return response
+        return self.store_when_rendered(response, response_cache, key, stale_key, lock, started)
+
+
+def same_schema_as(view_method):
+    """
+    Gives the decorated handler the swagger_auto_schema of ``view_method``,
+    e.g. the async version of a documented handler.
+    """
+    def decorator(method):
+        schema = getattr(view_method, "_swagger_auto_schema", None)
+        if schema is not None:
+            method._swagger_auto_schema = schema
+        return method
+    return decorator
+
+
+'''
+API view for the error counts recorded by LogErrorsMiddleware.
+Only administrators may read them.
+'''
+
+
+class ErrorLogStatsView(BaseAPIView):
+    # Restricts access to administrators
+    permission_classes = [IsAdminUser]
+    # Utilizes JWT tokens for user authentication
+    authentication_classes = [CachedJWTAuthentication]
+    # Maximum number of SQL queries per request, including authentication
+    query_budget = {"GET": 2}
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve error counts",
+        operation_description="Retrieves the number of unhandled errors per hour or day, error type and status code over a date range, with their totals. Only the range is read from the timestamp index, so the latency does not depend on the size of the error history.",
+        manual_parameters=[
+            openapi.Parameter(
+                'start',
+                openapi.IN_QUERY,
+                description="Start of the range (ISO 8601 date or datetime), rounded down to the bucket. Defaults to 24 hours (hour bucket) or 30 days (day bucket) before `end`",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME
+            ),
+            openapi.Parameter(
+                'end',
+                openapi.IN_QUERY,
+                description="Exclusive end of the range (ISO 8601 date or datetime), rounded up to the bucket. Defaults to now",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME
+            ),
+            openapi.Parameter(
+                'bucket',
+                openapi.IN_QUERY,
+                description="Length of the time buckets, `hour` (default, at most 31 days) or `day` (at most 366 days)",
+                type=openapi.TYPE_STRING,
+                enum=['hour', 'day']
+            ),
+            openapi.Parameter(
+                'error_type',
+                openapi.IN_QUERY,
+                description="Only count errors of this type (e.g. `ValueError`)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'status_code',
+                openapi.IN_QUERY,
+                description="Only count errors answered with this status code",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="A JSON response containing the error counts.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "success")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Response message'),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'start': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Start of the range'),
+                                'end': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Exclusive end of the range'),
+                                'bucket': openapi.Schema(type=openapi.TYPE_STRING, description='Length of the buckets'),
+                                'totals': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    description='Occurrences over the whole range per error type and status code, most frequent first',
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'error_type': openapi.Schema(type=openapi.TYPE_STRING, description='Exception class name'),
+                                            'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='Status code of the responses'),
+                                            'occurrences': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of failed requests'),
+                                            'errors': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of distinct errors (fingerprints per window)'),
+                                        }
+                                    )
+                                ),
+                                'series': openapi.Schema(
+                                    type=openapi.TYPE_ARRAY,
+                                    description='Occurrences per bucket, error type and status code; empty buckets are omitted',
+                                    items=openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'bucket': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Start of the bucket'),
+                                            'error_type': openapi.Schema(type=openapi.TYPE_STRING, description='Exception class name'),
+                                            'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='Status code of the responses'),
+                                            'occurrences': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of failed requests'),
+                                            'errors': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of distinct errors (fingerprints per window)'),
+                                        }
+                                    )
+                                ),
+                            }
+                        ),
+                    }
+                )
+            ),
+            400: openapi.Response(
+                description="Bad Request - invalid range, bucket or filter.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "failure")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Error message'),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT, description='Errors per query parameter'),
+                    }
+                )
+            ),
+            401: openapi.Response(
+                description="Unauthorized - authentication credentials were not provided or are invalid.",
+            ),
+            403: openapi.Response(
+                description="Forbidden - only administrators may read the error counts.",
+            ),
+        }
+    )
+    def get(self, request):
+        '''
+        Retrieves the error counts over a date range.
+
+        Parameters:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A JSON response containing the error counts.
+        '''
+        query = ErrorLogQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return self.failure_response(message="Invalid error log parameters", data=query.errors, status_code=status.HTTP_400_BAD_REQUEST)
+        counts = ErrorLogService.get_counts(**query.validated_data)
+        return self.success_response(data=counts, message="Error counts fetched successfully")
+
+
+'''
+API views for the request profiles captured by BaseAPIView.dispatch.
+Only administrators may read them.
+'''
+
+
+class ProfileListView(BaseAPIView):
+    # Restricts access to administrators
+    permission_classes = [IsAdminUser]
+    # Utilizes JWT tokens for user authentication
+    authentication_classes = [CachedJWTAuthentication]
+    # Maximum number of SQL queries per request, including authentication
+    query_budget = {"GET": 1}
+
+    @swagger_auto_schema(
+        operation_summary="List request profiles",
+        operation_description="Lists the request profiles stored on this host, newest first, without their reports. Requests are profiled when PROFILING_ENABLED is set and they carry a signed `X-Profile-Request` header (see the `sign_profile_request` command) or are sampled at PROFILING_SAMPLE_RATE; only the latest PROFILING_MAX_PROFILES are kept.",
+        responses={
+            200: openapi.Response(
+                description="A JSON response containing the list of profiles.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "success")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Response message'),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'id': openapi.Schema(type=openapi.TYPE_STRING, description='Profile ID'),
+                                    'view': openapi.Schema(type=openapi.TYPE_STRING, description='Name of the profiled view'),
+                                    'method': openapi.Schema(type=openapi.TYPE_STRING, description='HTTP method of the request'),
+                                    'path': openapi.Schema(type=openapi.TYPE_STRING, description='Path of the request'),
+                                    'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='Status code of the response'),
+                                    'created': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='When the request was profiled'),
+                                    'duration': openapi.Schema(type=openapi.TYPE_NUMBER, description='Duration of the profiled request in seconds'),
+                                    'pid': openapi.Schema(type=openapi.TYPE_INTEGER, description='Process which served the request'),
+                                    'calls': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of function calls'),
+                                    'memory': openapi.Schema(
+                                        type=openapi.TYPE_OBJECT,
+                                        properties={
+                                            'peak': openapi.Schema(type=openapi.TYPE_INTEGER, description='Peak of the memory allocated during the request, in bytes'),
+                                        }
+                                    ),
+                                }
+                            )
+                        ),
+                    }
+                )
+            ),
+            401: openapi.Response(
+                description="Unauthorized - authentication credentials were not provided or are invalid.",
+            ),
+            403: openapi.Response(
+                description="Forbidden - only administrators may read the profiles.",
+            ),
+        }
+    )
+    def get(self, request):
+        '''
+        Retrieves the stored request profiles.
+
+        Parameters:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A JSON response containing the list of profiles.
+        '''
+        return self.success_response(data=profiling.profile_store.list(), message="Profiles fetched successfully")
+
+
+class ProfileDetailView(BaseAPIView):
+    # Restricts access to administrators
+    permission_classes = [IsAdminUser]
+    # Utilizes JWT tokens for user authentication
+    authentication_classes = [CachedJWTAuthentication]
+    # Maximum number of SQL queries per request, including authentication
+    query_budget = {"GET": 1}
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve a request profile",
+        operation_description="Retrieves a stored request profile with its cProfile report (functions sorted by cumulative time) and the largest allocations still alive at the end of the request.",
+        responses={
+            200: openapi.Response(
+                description="A JSON response containing the profile.",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='HTTP status code'),
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, description='Status of the response (e.g., "success")'),
+                        'message': openapi.Schema(type=openapi.TYPE_STRING, description='Response message'),
+                        'data': openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'id': openapi.Schema(type=openapi.TYPE_STRING, description='Profile ID'),
+                                'view': openapi.Schema(type=openapi.TYPE_STRING, description='Name of the profiled view'),
+                                'method': openapi.Schema(type=openapi.TYPE_STRING, description='HTTP method of the request'),
+                                'path': openapi.Schema(type=openapi.TYPE_STRING, description='Path of the request'),
+                                'status_code': openapi.Schema(type=openapi.TYPE_INTEGER, description='Status code of the response'),
+                                'created': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='When the request was profiled'),
+                                'duration': openapi.Schema(type=openapi.TYPE_NUMBER, description='Duration of the profiled request in seconds'),
+                                'pid': openapi.Schema(type=openapi.TYPE_INTEGER, description='Process which served the request'),
+                                'calls': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of function calls'),
+                                'memory': openapi.Schema(
+                                    type=openapi.TYPE_OBJECT,
+                                    properties={
+                                        'peak': openapi.Schema(type=openapi.TYPE_INTEGER, description='Peak of the memory allocated during the request, in bytes'),
+                                        'top_allocations': openapi.Schema(
+                                            type=openapi.TYPE_ARRAY,
+                                            description='Largest allocations still alive at the end of the request, per source line',
+                                            items=openapi.Schema(
+                                                type=openapi.TYPE_OBJECT,
+                                                properties={
+                                                    'location': openapi.Schema(type=openapi.TYPE_STRING, description='File and line of the allocation'),
+                                                    'size': openapi.Schema(type=openapi.TYPE_INTEGER, description='Allocated bytes'),
+                                                    'count': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of allocated blocks'),
+                                                }
+                                            )
+                                        ),
+                                    }
+                                ),
+                                'report': openapi.Schema(type=openapi.TYPE_STRING, description='cProfile report'),
+                            }
+                        ),
+                    }
+                )
+            ),
+            401: openapi.Response(
+                description="Unauthorized - authentication credentials were not provided or are invalid.",
+            ),
+            403: openapi.Response(
+                description="Forbidden - only administrators may read the profiles.",
+            ),
+            404: openapi.Response(
+                description="Not Found - the profile does not exist or was rotated out.",
+            ),
+        }
+    )
+    def get(self, request, profile_id):
+        '''
+        Retrieves a request profile.
+
+        Parameters:
+            request (Request): The HTTP request object.
+            profile_id (str): The ID of the profile.
+
+        Returns:
+            Response: A JSON response containing the profile.
+        '''
+        profile = profiling.profile_store.get(profile_id)
+        if profile is None:
+            return self.failure_response(message="Profile not found", status_code=status.HTTP_404_NOT_FOUND)
+        return self.success_response(data=profile, message="Profile fetched successfully")
+
+
+def metrics_view(request):
+    """
+    Serves the request metrics in the Prometheus text format. When
+    METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,106 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures.thread import BrokenThreadPool
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedPool:
+    """
+    Executor started on first use, with a bound on the tasks that are queued
+    or running.
+
+    ``submit`` never blocks: it returns None once ``max_pending`` tasks are
+    in flight, so request threads shed CPU-heavy work instead of piling it
+    up. Subclasses create the executor.
+    """
+
+    def __init__(self, max_workers, max_pending=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def create_executor(self):
+        raise NotImplementedError
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.create_executor()
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedules ``fn(*args, **kwargs)`` in a worker and returns its
+        Future, or None when the pool is saturated.
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args, **kwargs)
+            except (BrokenProcessPool, BrokenThreadPool):
+                # A worker died (e.g. killed for its memory use), start a new pool
+                logger.warning("Process pool broken, restarting it")
+                self._reset(executor)
+                future = self._get_executor().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+class BoundedProcessPool(BoundedPool):
+    """
+    BoundedPool of worker processes. Workers are started with the "spawn"
+    method by default, so they never inherit the threads, locks or database
+    connections of the server process; the submitted functions must
+    therefore live in modules that are importable on their own.
+    """
+
+    def __init__(self, max_workers, max_pending=None, initializer=None, initargs=(), start_method="spawn"):
+        super().__init__(max_workers, max_pending)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.start_method = start_method
+
+    def create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=self.initializer,
+            initargs=self.initargs,
+        )
+
+
+class BoundedThreadPool(BoundedPool):
+    """
+    BoundedPool of threads, for work which releases the GIL (hashlib, most
+    C extensions) and so runs in parallel with the request threads.
+    """
+
+    def __init__(self, max_workers, max_pending=None, thread_name_prefix=""):
+        super().__init__(max_workers, max_pending)
+        self.thread_name_prefix = thread_name_prefix
+
+    def create_executor(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix)
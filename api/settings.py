@@ -63,6 +63,50 @@ MIDDLEWARE = [
     "api.core.middleware.LogErrorsMiddleware",
 ]
 
+# Unhandled errors are counted in memory per fingerprint (type, message template and view)
+# and written to ErrorLog by a background thread every ERROR_LOG_FLUSH_INTERVAL seconds (0
+# writes them right away), one row per error and ERROR_LOG_WINDOW seconds. At most
+# ERROR_LOG_BUFFER_SIZE distinct errors are buffered between two flushes, others are dropped.
+ERROR_LOG_FLUSH_INTERVAL = float(os.getenv("ERROR_LOG_FLUSH_INTERVAL", "2.0"))
+ERROR_LOG_WINDOW = int(os.getenv("ERROR_LOG_WINDOW", "3600"))
+ERROR_LOG_BUFFER_SIZE = int(os.getenv("ERROR_LOG_BUFFER_SIZE", "1000"))
+# Days of errors kept by the prune_error_logs command (run it daily), and rows it deletes per
+# transaction
+ERROR_LOG_RETENTION_DAYS = int(os.getenv("ERROR_LOG_RETENTION_DAYS", "90"))
+ERROR_LOG_PRUNE_CHUNK_SIZE = int(os.getenv("ERROR_LOG_PRUNE_CHUNK_SIZE", "5000"))
+
+# Per-view request metrics served at /metrics in the Prometheus text format (see
+# api/core/metrics.py). With several worker processes, point METRICS_DIR to a directory
+# shared by them (emptied on deploys): each one writes its metrics there every
+# METRICS_SNAPSHOT_INTERVAL seconds and /metrics serves their sum. When METRICS_TOKEN is
+# set, scrapers must send it as a bearer token.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Opt-in profiling of single API requests (see api/core/profiling.py): with PROFILING_ENABLED,
+# requests carrying a signed X-Profile-Request header (`manage.py sign_profile_request <path>`,
+# valid PROFILING_SIGNATURE_MAX_AGE seconds) and a PROFILING_SAMPLE_RATE fraction of the others
+# are run under cProfile and tracemalloc. Their reports are written to PROFILING_DIR, which keeps
+# the latest PROFILING_MAX_PROFILES, and listed to administrators at /core/profiles/.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_SIGNATURE_MAX_AGE = int(os.getenv("PROFILING_SIGNATURE_MAX_AGE", "300"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "100"))
+# Lines of the cProfile report and allocation sites kept per profile
+PROFILING_TOP_FUNCTIONS = int(os.getenv("PROFILING_TOP_FUNCTIONS", "50"))
+PROFILING_TOP_ALLOCATIONS = int(os.getenv("PROFILING_TOP_ALLOCATIONS", "20"))
+
+# Enforce the per-view `query_budget` declarations (debug aid, on by default with DEBUG)
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", str(DEBUG)) == "True"
+# Raise instead of logging a warning when a view goes over its query budget
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "False") == "True"
+
+if QUERY_BUDGET_ENABLED:
+    MIDDLEWARE.insert(0, "api.core.middleware.QueryBudgetMiddleware")
+
 ROOT_URLCONF = "api.urls"
 
 TEMPLATES = [
@@ -83,13 +127,19 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "api.wsgi.application"
 
+# Serve the blog, category, stats and login endpoints with their native async views (see
+# AsyncBaseAPIView) under the ASGI application (api.asgi); under WSGI each of their requests
+# would run an event loop. Django's async ORM still queries in the thread of the request, one
+# hop per query, so the gain is on cache hits: see benchmarks/bench_async_concurrency.py.
+ASYNC_API_VIEWS = os.getenv("ASYNC_API_VIEWS", "False") == "True"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 DATABASES = {
     "default": {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'api.core.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME'),  
         'USER': os.getenv('DB_USER'),      
         'PASSWORD': os.getenv('DB_PASSWORD'),  
@@ -98,6 +148,24 @@ DATABASES = {
     }
 }
 
+# Check the database connections out of a per-process pool instead of opening one per request
+# (see api/core/db/pool.py): at most DB_POOL_MAX_SIZE connections per worker process, checkouts
+# wait up to DB_POOL_TIMEOUT seconds, connections are replaced after DB_POOL_MAX_LIFETIME seconds
+# and health checked when idle for DB_POOL_CHECK_IDLE seconds or more. Connections go back to the
+# pool at the end of every request, hence CONN_MAX_AGE = 0. Mind max_connections on the server:
+# workers x DB_POOL_MAX_SIZE connections can be open at once.
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "False") == "True"
+
+if DB_POOL_ENABLED:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["POOL"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+        "check_idle": float(os.getenv("DB_POOL_CHECK_IDLE", "1")),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -135,6 +203,27 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Blog images are stored under the SHA-256 of their content, so identical uploads share
+# one file (see api/core/storage.py and the dedupe_blog_images command)
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "blog_images": {
+        "BACKEND": "api.core.storage.ContentAddressedStorage",
+    },
+}
+
+# Uploads are streamed to disk and hashed on the way. Files larger than UPLOAD_MAX_FILE_SIZE
+# bytes, and images whose header declares more than UPLOAD_MAX_IMAGE_PIXELS pixels, are
+# rejected before they are received in full (0 disables a limit).
+FILE_UPLOAD_HANDLERS = ["api.core.uploads.HashingFileUploadHandler"]
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_MAX_IMAGE_PIXELS = int(os.getenv("UPLOAD_MAX_IMAGE_PIXELS", "50000000"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -142,19 +231,101 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
      'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.account.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
+# Logins verify passwords in a pool of PASSWORD_HASHING_WORKERS threads (0: one per core) and
+# answer 503 once PASSWORD_HASHING_MAX_PENDING verifications are in flight (see
+# api/account/hashing.py).
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", "0"))
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", "64"))
+# Seconds the users authenticated by CachedJWTAuthentication are cached (0 queries the user on
+# every request). Saving or deleting a user evicts it right away.
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "300"))
+# Lifetime in seconds of cached API responses, per endpoint (0 disables the cache).
+# Entries are invalidated on writes through version bumps, the TTL only bounds their size.
+RESPONSE_CACHE_DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_DEFAULT_TTL", "60"))
+RESPONSE_CACHE_TTLS = {
+    "blog-list": int(os.getenv("BLOG_LIST_CACHE_TTL", "300")),
+    "category-list": int(os.getenv("CATEGORY_LIST_CACHE_TTL", "3600")),
+}
+# Stampede protection: expired entries stay servable for CACHE_STALE_TTL seconds while a
+# single worker, holding a lock for at most CACHE_LOCK_TIMEOUT seconds, recomputes them.
+# CACHE_REFRESH_BETA > 1 favours earlier probabilistic refreshes of hot entries, 0 disables them.
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", "300"))
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", "10"))
+CACHE_REFRESH_BETA = float(os.getenv("CACHE_REFRESH_BETA", "1.0"))
+
+# Number of rows fetched per round trip by the streaming blog export
+BLOG_EXPORT_CHUNK_SIZE = int(os.getenv("BLOG_EXPORT_CHUNK_SIZE", "2000"))
+
+# Largest list accepted by the bulk blog endpoint, and rows per INSERT statement
+BLOG_BULK_MAX_ITEMS = int(os.getenv("BLOG_BULK_MAX_ITEMS", "10000"))
+BLOG_BULK_BATCH_SIZE = int(os.getenv("BLOG_BULK_BATCH_SIZE", "500"))
+
+# Blog image variants: name -> (width, height) bounding box, never upscaled. Every variant is
+# stored as JPEG (PNG with transparency) and as WebP, without the metadata of the upload.
+BLOG_IMAGE_VARIANTS = {
+    "thumbnail": (320, 320),
+    "medium": (800, 800),
+    "large": (1600, 1600),
+}
+BLOG_IMAGE_QUALITY = int(os.getenv("BLOG_IMAGE_QUALITY", "82"))
+# Worker processes rendering the variants outside of the request threads (0 renders them
+# inline once the blog is committed), and the uploads that may wait for one; beyond that
+# they are left to the process_blog_images command.
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+IMAGE_PROCESSING_MAX_PENDING = int(os.getenv("IMAGE_PROCESSING_MAX_PENDING", "32"))
+
+# Row counters behind the stats endpoint: shards per counter (more shards, less lock
+# contention between concurrent writers), and whether PostgreSQL planner estimates may be
+# served instead of the exact counters.
+COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", "8"))
+STATS_APPROXIMATE_COUNTS = os.getenv("STATS_APPROXIMATE_COUNTS", "False") == "True"
+
+# Every process keeps a bounded LRU of hot entries in front of Redis ("remote"). Writes are
+# broadcast over Redis pub/sub so the other workers evict their local copies; CACHE_LOCAL_TTL
+# bounds how long a copy can be served if a broadcast is lost.
+# Redis is reached through a circuit breaker: tight socket timeouts turn a stalled server into
+# errors, and after CACHE_BREAKER_FAILURE_THRESHOLD of them in a row the cache falls back to a
+# per-process locmem cache, probing Redis again every CACHE_BREAKER_RECOVERY_TIMEOUT seconds.
 CACHES = {
     "default": {
+        "BACKEND": "api.core.cache_backends.TwoTierCache",
+        "OPTIONS": {
+            "REMOTE": "remote",
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1000")),
+            "LOCAL_MAX_BYTES": int(os.getenv("CACHE_LOCAL_MAX_BYTES", str(16 * 1024 * 1024))),
+            "LOCAL_TTL": int(os.getenv("CACHE_LOCAL_TTL", "5")),
+            "BROADCASTER": "api.core.cache_backends.RedisBroadcaster",
+            "BROADCASTER_OPTIONS": {"alias": "redis", "breaker": "redis"},
+        },
+    },
+    "remote": {
+        "BACKEND": "api.core.cache_backends.CircuitBreakerCache",
+        "OPTIONS": {
+            "PRIMARY": "redis",
+            "FALLBACK": "fallback",
+            "FAILURE_THRESHOLD": int(os.getenv("CACHE_BREAKER_FAILURE_THRESHOLD", "5")),
+            "RECOVERY_TIMEOUT": int(os.getenv("CACHE_BREAKER_RECOVERY_TIMEOUT", "30")),
+        },
+    },
+    "redis": {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": "redis://127.0.0.1:6379/1",  
+        "LOCATION": os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1"),
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": float(os.getenv("CACHE_SOCKET_CONNECT_TIMEOUT", "0.25")),
+            "SOCKET_TIMEOUT": float(os.getenv("CACHE_SOCKET_TIMEOUT", "0.25")),
         }
-    }
+    },
+    "fallback": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cache-fallback",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
 }
 
 
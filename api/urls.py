@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from api.core.views import metrics_view
 
 
 schema_view = get_schema_view(
@@ -20,6 +21,8 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('account/', include('api.account.urls'), name='account'),
     path('blog/', include('api.blog.urls'), name='blog'),
+    path('core/', include('api.core.urls'), name='core'),
+    path('metrics', metrics_view, name='metrics'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
@@ -0,0 +1,64 @@
+"""
+Compares the throughput of the bulk blog endpoint with one POST per blog.
+
+    python -m benchmarks.bench_blog_bulk_create [--items 2000] [--batch-sizes 100 500 1000]
+
+Both paths go through the full API stack with an authenticated test client,
+so the numbers include request parsing, validation and rendering.
+"""
+import argparse
+import time
+
+from benchmarks.harness import print_table, setup_django, test_database
+
+
+def run(items, batch_sizes):
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+    from api.blog.models import Blog, Category
+
+    with test_database():
+        user = User.objects.create(username="bench")
+        category = Category.objects.create(name="bench")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def payload(prefix):
+            return [
+                {"title": f"{prefix} {i}", "content": "Benchmark content " * 20, "author": user.id, "category": category.name}
+                for i in range(items)
+            ]
+
+        rows = []
+        started = time.perf_counter()
+        for item in payload("single"):
+            response = client.post("/blog/", item, format="json")
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - started
+        rows.append(("single", "-", f"{elapsed:.2f}", f"{items / elapsed:,.0f}"))
+
+        for batch_size in batch_sizes:
+            Blog.objects.all().delete()
+            settings.BLOG_BULK_BATCH_SIZE = batch_size
+            started = time.perf_counter()
+            response = client.post("/blog/bulk/", payload("bulk"), format="json")
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 201, response.content
+            rows.append(("bulk", batch_size, f"{elapsed:.2f}", f"{items / elapsed:,.0f}"))
+
+    print_table(("path", "batch size", "seconds", "blogs/s"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 500, 1000])
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.items, args.batch_sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the blog search engine with the former ``title__icontains`` filter.
+
+    python -m benchmarks.bench_blog_search [--sizes 10000 100000 1000000]
+
+Each size is seeded into a fresh test database with ``bulk_create``; on
+PostgreSQL the search vectors are filled in by the trigger, elsewhere the
+in-process index is rebuilt before timing. Both paths fetch the first page of
+results exactly like ``BlogView.get`` does.
+"""
+import argparse
+import random
+
+from benchmarks.harness import measure, print_table, setup_django, summarize, test_database
+
+WORDS = (
+    "python django postgres index cache query latency cursor vector search "
+    "request worker thread process memory stream batch signal token ranking "
+    "throughput benchmark storage image upload replica partition schema"
+).split()
+
+
+def seed(size, batch_size=5000):
+    from django.contrib.auth.models import User
+    from api.blog.models import Blog, Category
+
+    rng = random.Random(size)
+    author = User.objects.create(username=f"bench-{size}")
+    category = Category.objects.create(name="bench")
+    batch = []
+    for _ in range(size):
+        batch.append(Blog(
+            title=" ".join(rng.choices(WORDS, k=6)),
+            content=" ".join(rng.choices(WORDS, k=80)),
+            author=author,
+            category=category,
+        ))
+        if len(batch) >= batch_size:
+            Blog.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Blog.objects.bulk_create(batch)
+
+
+def run(sizes, repeat, page_size):
+    from api.blog.models import Blog
+    from api.blog.search import get_search_backend
+
+    rows = []
+    for size in sizes:
+        with test_database():
+            seed(size)
+            backend = get_search_backend()
+            backend.rebuild()
+            for term in ("postgres", "latency ranking"):
+                icontains = summarize(measure(
+                    lambda: list(Blog.objects.filter(title__icontains=term)[:page_size]), repeat=repeat))
+                engine = summarize(measure(
+                    lambda: list(backend.search(Blog.objects.all(), term).order_by(*backend.ordering)[:page_size]),
+                    repeat=repeat))
+                rows.append((
+                    size, term,
+                    f"{icontains['median'] * 1000:.2f}",
+                    f"{engine['median'] * 1000:.2f}",
+                    f"{icontains['median'] / engine['median']:.1f}x",
+                ))
+    print_table(("blogs", "term", "icontains ms", "engine ms", "speedup"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.sizes, args.repeat, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Microbenchmark of the category list cache-hit path, before and after
+caching the rendered bytes.
+
+    python -m benchmarks.bench_category_cache [--categories 50 500] [--repeat 2000]
+
+"before" replays the former CategoryView.get hit path: cached serializer data
+passed back through CategorySerializer(many=True) and the JSON renderer.
+"after" is the RenderedResponseCache hit path: the stored bytes are wrapped
+in an HttpResponse. Both read from the configured default cache.
+"""
+import argparse
+
+from benchmarks.harness import measure, print_table, setup_django, summarize, test_database
+
+
+def run(sizes, repeat):
+    from django.core.cache import cache
+    from django.http import HttpResponse
+    from rest_framework.renderers import JSONRenderer
+    from api.blog.models import Category
+    from api.blog.serializers import CategorySerializer
+    from api.core.caching import RenderedResponseCache
+    from api.core.mixins import APIViewResponseMixin
+
+    renderer = JSONRenderer()
+    rendered_cache = RenderedResponseCache("bench-category-list", ("bench-category",))
+    rows = []
+    with test_database():
+        for size in sizes:
+            Category.objects.all().delete()
+            Category.objects.bulk_create(Category(name=f"category-{i}") for i in range(size))
+            data = CategorySerializer(Category.objects.all(), many=True).data
+            cache.set("bench:categories", data, timeout=None)
+
+            def before():
+                cached = cache.get("bench:categories")
+                serializer = CategorySerializer(cached, many=True)
+                response = APIViewResponseMixin.success_response(data=serializer.data, message="Categories fetched successfully")
+                return renderer.render(response.data)
+
+            content = before()
+            entry = rendered_cache.make_entry(content, "application/json")
+            cache.set("bench:categories:rendered", entry, timeout=None)
+
+            def after():
+                entry = cache.get("bench:categories:rendered")
+                response = HttpResponse(entry["content"], content_type=entry["content_type"])
+                response["ETag"] = entry["etag"]
+                return response.content
+
+            assert after() == before()
+            old = summarize(measure(before, repeat=repeat))
+            new = summarize(measure(after, repeat=repeat))
+            rows.append((
+                size,
+                f"{old['median'] * 1e6:.1f}",
+                f"{new['median'] * 1e6:.1f}",
+                f"{old['median'] / new['median']:.1f}x",
+            ))
+        cache.delete_many(["bench:categories", "bench:categories:rendered"])
+
+    print_table(("categories", "before us", "after us", "speedup"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--categories", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.categories, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
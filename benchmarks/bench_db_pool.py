@@ -0,0 +1,149 @@
+"""
+Latency of a request's database work with a connection per request and with
+the connection pool of api/core/db/pool.py.
+
+    python -m benchmarks.bench_db_pool [--threads 1 8 32] [--requests 200] [--max-size 10] [--connect-ms 5] [--query-ms 1]
+
+Every thread runs ``--requests`` requests in a row, all threads at once, each
+request connecting, running one query and closing its connection, as Django
+does with CONN_MAX_AGE = 0. "direct" opens and closes a connection every time,
+"pooled" checks it out of a pool of ``--max-size`` connections and hands it
+back.
+
+With PostgreSQL configured in DATABASES, the requests go through the stock
+PostgreSQL backend and the pooled one of api/core/db/backends/postgresql and
+run ``SELECT 1`` on the configured database. Otherwise the connections are
+simulated: opening one sleeps ``--connect-ms`` (a TCP handshake and the
+authentication of a new session, more with TLS or across hosts) and a query
+sleeps ``--query-ms``.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from benchmarks.harness import print_table, setup_django
+
+
+class SimulatedConnection:
+
+    def __init__(self, connect_seconds, query_seconds):
+        time.sleep(connect_seconds)
+        self.query_seconds = query_seconds
+
+    def execute(self):
+        time.sleep(self.query_seconds)
+
+    def close(self):
+        pass
+
+
+def simulated_modes(connect_seconds, query_seconds, max_size):
+    from api.core.db.pool import ConnectionPool
+
+    def connect():
+        return SimulatedConnection(connect_seconds, query_seconds)
+
+    def direct():
+        connection = connect()
+        connection.execute()
+        connection.close()
+
+    pool = ConnectionPool(lambda connection: connection.execute(), lambda connection: True, max_size=max_size, timeout=60)
+
+    def pooled():
+        connection = pool.getconn(connect)
+        connection.execute()
+        pool.putconn(connection)
+
+    return (("direct", direct, None), ("pooled", pooled, pool))
+
+
+def postgresql_modes(max_size):
+    from django.conf import settings
+    from django.db.utils import ConnectionHandler
+
+    def request(handler):
+        def run():
+            connection = handler["default"]
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.close()
+        return run
+
+    database = {**settings.DATABASES["default"], "CONN_MAX_AGE": 0}
+    direct = ConnectionHandler({"default": {**database, "ENGINE": "django.db.backends.postgresql", "POOL": None}})
+    pooled = ConnectionHandler({"default": {
+        **database, "ENGINE": "api.core.db.backends.postgresql",
+        "POOL": {"max_size": max_size, "timeout": 60},
+    }})
+    return (("direct", request(direct), None), ("pooled", request(pooled), lambda: pooled["default"].pool))
+
+
+def load(request, threads, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * requests / (time.perf_counter() - started), latencies
+
+
+def run(thread_counts, requests, max_size, connect_ms, query_ms):
+    from django.db import connection
+    from api.core.db.pool import close_pools
+
+    rows = []
+    try:
+        for threads in thread_counts:
+            # Fresh pools for every thread count, so their stats are its own
+            close_pools()
+            if connection.vendor == "postgresql":
+                modes = postgresql_modes(max_size)
+            else:
+                modes = simulated_modes(connect_ms / 1000, query_ms / 1000, max_size)
+            for mode, request, pool in modes:
+                throughput, latencies = load(request, threads, requests)
+                percentiles = statistics.quantiles(latencies, n=100)
+                if callable(pool):
+                    pool = pool()
+                stats = pool.stats() if pool is not None else {}
+                rows.append((
+                    threads, mode, f"{throughput:.0f}",
+                    f"{percentiles[49] * 1000:.2f}", f"{percentiles[98] * 1000:.2f}",
+                    stats.get("opened", threads * requests), stats.get("waits", "-"),
+                ))
+    finally:
+        close_pools()
+
+    print_table(("threads", "mode", "requests/s", "p50 ms", "p99 ms", "connects", "waits"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-size", type=int, default=10)
+    parser.add_argument("--connect-ms", type=float, default=5.0)
+    parser.add_argument("--query-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.threads, args.requests, args.max_size, args.connect_ms, args.query_ms)
+
+
+if __name__ == "__main__":
+    main()
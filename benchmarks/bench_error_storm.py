@@ -0,0 +1,124 @@
+"""
+Load test of LogErrorsMiddleware during an error storm, before and after
+buffering the error logs.
+
+    python -m benchmarks.bench_error_storm [--threads 1 8 32] [--requests 200]
+
+Every thread fails ``--requests`` requests with the same error. "before"
+replays the former process_exception, which inserted one ErrorLog row per
+failure; "after" is the current middleware, which only counts the failure
+in memory, the rows being written by the background flush. Latencies are
+those of process_exception, i.e. what the failing requests pay for the
+logging; with the buffer they should not grow with the number of threads.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from benchmarks.harness import print_table, setup_django, test_database
+
+
+def storm(handle, threads, requests):
+    """
+    Runs ``handle`` ``requests`` times in each of ``threads`` threads, all
+    started together, and returns every latency in seconds along with the
+    number of calls that raised.
+    """
+    from django.db import connections
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        timings = []
+        failed = 0
+        barrier.wait()
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                try:
+                    handle()
+                except Exception:
+                    # e.g. lock timeouts of the database the errors are written to
+                    failed += 1
+                timings.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        with lock:
+            latencies.extend(timings)
+            failures.append(failed)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, sum(failures)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(thread_counts, requests):
+    from django.conf import settings
+    from django.http import JsonResponse
+    from django.test import RequestFactory
+    from rest_framework import status
+    from api.core.errorlog import error_log_buffer
+    from api.core.middleware import LogErrorsMiddleware
+    from api.core.models import ErrorLog
+
+    settings.ERROR_LOG_FLUSH_INTERVAL = 0.5
+    request = RequestFactory().get("/blog/")
+    middleware = LogErrorsMiddleware(lambda request: JsonResponse({}))
+    error = ValueError("invalid literal for int() with base 10: 'abc'")
+
+    def before():
+        # The former process_exception: one INSERT per failed request
+        ErrorLog.objects.create(
+            error_message=str(error),
+            error_type=type(error).__name__,
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+        return JsonResponse({}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def after():
+        return middleware.process_exception(request, error)
+
+    rows = []
+    with test_database():
+        for threads in thread_counts:
+            for label, handle in (("before", before), ("after", after)):
+                ErrorLog.objects.all().delete()
+                latencies, failed = storm(handle, threads, requests)
+                error_log_buffer.flush()
+                rows.append((
+                    threads,
+                    label,
+                    f"{statistics.median(latencies) * 1e6:.0f}",
+                    f"{percentile(latencies, 0.99) * 1e6:.0f}",
+                    ErrorLog.objects.count(),
+                    failed,
+                ))
+        error_log_buffer.close()
+
+    print_table(("threads", "logging", "p50 us", "p99 us", "rows", "failed"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.threads, args.requests)
+
+
+if __name__ == "__main__":
+    main()
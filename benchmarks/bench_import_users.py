@@ -0,0 +1,81 @@
+"""
+Benchmark of the bulk user import against registering users one by one.
+
+    python -m benchmarks.bench_import_users [--users 40] [--workers 0 2] [--memory-users 10000 50000]
+
+"register" saves ``--users`` users through RegisterSerializer (two exists()
+queries, a hash and an INSERT each); "import" feeds the same number of
+records to UserImporter with each ``--workers`` count, with Django's
+default (production) password hashers. The memory table imports
+``--memory-users`` generated records with a fast hasher and reports the
+tracemalloc peak, which should not grow with the input.
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+from benchmarks.harness import print_table, setup_django, test_database
+
+
+def records(count, prefix):
+    for number in range(count):
+        yield {
+            "first_name": "First", "last_name": "Last", "username": f"{prefix}{number}",
+            "email": f"{prefix}{number}@example.com", "password": f"password-{number}",
+        }
+
+
+def run(users, worker_counts, memory_sizes):
+    from django.conf import global_settings
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from api.account.importing import UserImporter, read_jsonl
+    from api.account.serializers import RegisterSerializer
+
+    throughput = []
+    with test_database():
+        with override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS):
+            started = time.perf_counter()
+            for record in records(users, "register"):
+                serializer = RegisterSerializer(data=record)
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+            elapsed = time.perf_counter() - started
+            throughput.append(("register", "-", f"{users / elapsed:.1f}"))
+
+            for workers in worker_counts:
+                summary = UserImporter(batch_size=10, workers=workers).run(records(users, f"import{workers}-"))
+                assert summary["created"] == users
+                throughput.append(("import", workers, f"{users / summary['elapsed']:.1f}"))
+
+        memory = []
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]):
+            for size in memory_sizes:
+                User.objects.filter(username__startswith="memory").delete()
+                source = io.StringIO("".join(json.dumps(record) + "\n" for record in records(size, "memory")))
+                tracemalloc.start()
+                summary = UserImporter(batch_size=1000, workers=0).run(read_jsonl(source))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                memory.append((size, f"{size / summary['elapsed']:.0f}", f"{peak / 2**20:.1f}"))
+
+    print_table(("path", "workers", "users/s"), throughput)
+    print()
+    print_table(("records", "records/s", "peak MiB"), memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--memory-users", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.users, args.workers, args.memory_users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of the authentication overhead per request, with and
+without the user cache.
+
+    python -m benchmarks.bench_jwt_auth [--requests 2000] [--repeat 5]
+
+Authenticates the same access token ``--requests`` times with
+JWTAuthentication (signature check and user SELECT) and with
+CachedJWTAuthentication once the user is cached. "token only" is the
+signature check alone, the floor of both. Uses the configured default
+cache and a throw-away test database.
+"""
+import argparse
+
+from benchmarks.harness import measure, print_table, setup_django, summarize, test_database
+
+
+def run(requests, repeat):
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from api.account.authentication import CachedJWTAuthentication
+    from api.core.tests.factories import UserFactory
+
+    rows = []
+    with test_database():
+        user = UserFactory(username="bench", password="bench-password")
+        token = str(RefreshToken.for_user(user).access_token)
+        request = RequestFactory().get("/blog/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        raw_token = token.encode()
+
+        def authenticate(authentication):
+            def loop():
+                for _ in range(requests):
+                    authentication.authenticate(request)
+            return loop
+
+        def validate():
+            authentication = JWTAuthentication()
+            for _ in range(requests):
+                authentication.get_validated_token(raw_token)
+
+        cases = (
+            ("token only", validate),
+            ("JWTAuthentication", authenticate(JWTAuthentication())),
+            ("CachedJWTAuthentication", authenticate(CachedJWTAuthentication())),
+        )
+        for label, loop in cases:
+            timings = summarize(measure(loop, repeat=repeat))
+            with CaptureQueriesContext(connection) as queries:
+                loop()
+            rows.append((label, f"{timings['median'] / requests * 1e6:.1f}", f"{len(queries) / requests:.2f}"))
+
+    print_table(("authentication", "us/request", "queries/request"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
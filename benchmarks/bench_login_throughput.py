@@ -0,0 +1,93 @@
+"""
+Load test of the login path, in logins per second per core.
+
+    python -m benchmarks.bench_login_throughput [--threads 1 4] [--logins 20]
+
+Every thread logs the same user in ``--logins`` times through
+LoginSerializer, with Django's default (production) password hashers.
+"before" replays the former path: an exists() query, then authenticate(),
+which fetches the user again and hashes on the request thread. "after" is
+the current path: one SELECT, the password verified in the hashing pool.
+Both are bound by the hash; "after" saves a query per login and caps the
+hashing threads at PASSWORD_HASHING_WORKERS whatever the number of request
+threads.
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.harness import print_table, setup_django, test_database
+
+
+def run(thread_counts, logins):
+    from django.conf import global_settings
+    from django.contrib.auth import authenticate
+    from django.contrib.auth.models import User
+    from django.db import connection, connections
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from api.account.serializers import LoginSerializer
+
+    credentials = {"username": "bench", "password": "bench-password"}
+
+    def before():
+        if not User.objects.filter(username=credentials["username"]).exists():
+            raise AssertionError("Account not found")
+        user = authenticate(**credentials)
+        assert user is not None
+        return str(RefreshToken.for_user(user).access_token)
+
+    def after():
+        serializer = LoginSerializer(data=credentials)
+        serializer.is_valid(raise_exception=True)
+        assert "access" in serializer.get_jwt_token(serializer.validated_data)
+
+    def load(login, threads):
+        barrier = threading.Barrier(threads + 1)
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(logins):
+                    login()
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return threads * logins / (time.perf_counter() - started)
+
+    cores = os.cpu_count() or 1
+    rows = []
+    with override_settings(PASSWORD_HASHERS=global_settings.PASSWORD_HASHERS), test_database():
+        User.objects.create_user(**credentials)
+        for label, login in (("before", before), ("after", after)):
+            login()
+            with CaptureQueriesContext(connection) as queries:
+                login()
+            for threads in thread_counts:
+                throughput = load(login, threads)
+                rows.append((label, threads, f"{throughput:.2f}", f"{throughput / cores:.2f}", len(queries)))
+
+    print_table(("path", "threads", "logins/s", "logins/s/core", "queries/login"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.threads, args.logins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Microbenchmark of the per-request cost of the metrics recorded by
+BaseAPIView.dispatch.
+
+    python -m benchmarks.bench_metrics_overhead [--requests 20000] [--repeat 5]
+
+"observe" is MetricsRegistry.observe alone, "instrumentation" everything
+dispatch adds around a response (query counter, timer and observe).
+"dispatch" runs a trivial BaseAPIView through dispatch and rendering with
+METRICS_ENABLED off and on; its overhead is the difference of two noisy
+numbers, the first two rows are the precise ones. No database is needed.
+"""
+import argparse
+import time
+
+from benchmarks.harness import measure, print_table, setup_django, summarize
+
+
+def run(requests, repeat):
+    from django.conf import settings
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from rest_framework.permissions import AllowAny
+    from api.core import metrics
+    from api.core.metrics import MetricsRegistry
+    from api.core.views import BaseAPIView
+
+    class PingView(BaseAPIView):
+        authentication_classes = []
+        permission_classes = [AllowAny]
+
+        def get(self, request):
+            return self.success_response(data={"pong": True})
+
+    view = PingView.as_view()
+    request = RequestFactory().get("/ping/")
+    registry = MetricsRegistry()
+
+    def observe():
+        for _ in range(requests):
+            registry.observe("PingView", "GET", 200, 0.0042, queries=2, query_seconds=0.001, size=120, cache="HIT")
+
+    def dispatch():
+        for _ in range(requests):
+            view(request).render()
+
+    rendered = HttpResponse(b"{}", content_type="application/json")
+
+    def instrumentation():
+        # What dispatch adds around an already rendered response
+        for _ in range(requests):
+            started = time.perf_counter()
+            queries, token = metrics.start_request()
+            metrics.finish_request(token)
+            metrics.track_response("PingView", "GET", rendered, started, queries)
+
+    rows = []
+    for label, func in (("observe", observe), ("instrumentation", instrumentation)):
+        timings = summarize(measure(func, repeat=repeat))
+        rows.append((label, "-", f"{timings['min'] / requests * 1e6:.2f}"))
+
+    # Alternated runs, so drifts of the machine affect both sides alike
+    timings = {False: [], True: []}
+    for _ in range(repeat):
+        for enabled in (False, True):
+            settings.METRICS_ENABLED = enabled
+            timings[enabled] += measure(dispatch, repeat=1)
+    per_request = {enabled: min(runs) / requests for enabled, runs in timings.items()}
+    for enabled in (False, True):
+        rows.append(("dispatch", "on" if enabled else "off", f"{per_request[enabled] * 1e6:.2f}"))
+    rows.append(("dispatch overhead", "-", f"{(per_request[True] - per_request[False]) * 1e6:.2f}"))
+
+    print_table(("path", "metrics", "us/request"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
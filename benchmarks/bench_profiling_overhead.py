@@ -0,0 +1,88 @@
+"""
+Microbenchmark of the cost of the profiling hook of BaseAPIView.dispatch.
+
+    python -m benchmarks.bench_profiling_overhead [--requests 20000] [--repeat 5]
+
+"is_requested" is the check made on every request with PROFILING_ENABLED,
+for a request without the header and no sampling, with sampling at 1%
+(never drawn here) and with a signed header. "dispatch" runs a trivial
+BaseAPIView with PROFILING_ENABLED off and on without triggering it, and
+"profiled" one request that is profiled and stored. No database is needed.
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.harness import measure, print_table, setup_django, summarize
+
+
+def run(requests, repeat):
+    from django.conf import settings
+    from django.test import RequestFactory, override_settings
+    from rest_framework.permissions import AllowAny
+    from api.core import profiling
+    from api.core.views import BaseAPIView
+
+    class PingView(BaseAPIView):
+        authentication_classes = []
+        permission_classes = [AllowAny]
+
+        def get(self, request):
+            return self.success_response(data={"pong": True})
+
+    view = PingView.as_view()
+    factory = RequestFactory()
+    plain = factory.get("/ping/")
+    signed = factory.get("/ping/", HTTP_X_PROFILE_REQUEST=profiling.sign_request("/elsewhere/"))
+    settings.METRICS_ENABLED = False
+
+    def checks(request):
+        def check():
+            for _ in range(requests):
+                profiling.is_requested(request)
+        return check
+
+    def dispatch():
+        for _ in range(requests):
+            view(plain).render()
+
+    rows = []
+    for label, rate, request in (("no header", 0, plain), ("sampled 1%", 0.01, plain), ("signed header", 0, signed)):
+        # The header is signed for another path, so it is verified but never profiles
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=rate):
+            timings = summarize(measure(checks(request), repeat=repeat))
+        rows.append(("is_requested", label, f"{timings['min'] / requests * 1e6:.2f}"))
+
+    timings = {False: [], True: []}
+    for _ in range(repeat):
+        for enabled in (False, True):
+            with override_settings(PROFILING_ENABLED=enabled, PROFILING_SAMPLE_RATE=0):
+                timings[enabled] += measure(dispatch, repeat=1)
+    for enabled in (False, True):
+        rows.append(("dispatch", "on" if enabled else "off", f"{min(timings[enabled]) / requests * 1e6:.2f}"))
+
+    profiled = factory.get("/ping/", HTTP_X_PROFILE_REQUEST=profiling.sign_request("/ping/"))
+    durations = []
+    with tempfile.TemporaryDirectory(prefix="profiles-") as directory:
+        with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=directory):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                view(profiled).render()
+                durations.append(time.perf_counter() - started)
+    rows.append(("profiled", "on", f"{min(durations) * 1e6:.2f}"))
+
+    print_table(("path", "profiling", "us/request"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
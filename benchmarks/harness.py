@@ -0,0 +1,69 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Every benchmark runs against a throw-away test database created from the
+configured ``DATABASES`` (``test_<name>`` on PostgreSQL), so it never touches
+real data. Run them from the project root, e.g.::
+
+    python -m benchmarks.bench_blog_search --sizes 10000 100000
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """
+    Creates the test database, yields, and destroys it again.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Runs ``func`` ``warmup + repeat`` times and returns the timings in seconds
+    of the measured runs.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings):
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = "  ".join(f"{{:>{width}}}" for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))